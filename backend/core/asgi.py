@@ -13,4 +13,18 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after django setup, it uses models
+from forum.push import PATH as ROOM_EVENTS_PATH, room_events  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """
+    Stream room events without going through django request handling,
+    streams stay open for long, everything else is served by django
+    """
+    if scope['type'] == 'http' and ROOM_EVENTS_PATH.match(scope['path']):
+        await room_events(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -59,6 +59,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    # reports N+1 queries, enabled with DEBUG only
+    'forum.middleware.QueryRepeatMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,9 +75,13 @@ INTERNAL_IPS = [
 ]
 
 AUTHENTICATION_BACKENDS = (
-    'django.contrib.auth.backends.ModelBackend',
+    # ModelBackend reading users of sessions from cache, see forum.authentication
+    'forum.authentication.CachedModelBackend',
 )
 
+# Database sessions read through redis
+SESSION_ENGINE = 'forum.sessions'
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -99,6 +105,10 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+# Serves room event streams and async api endpoints, see docker-compose asgi service
+ASGI_APPLICATION = 'core.asgi.application'
+# Room pages open event streams, set where asgi application serves /room/events/, runserver does not
+ROOM_EVENTS = os.environ.get("ROOM_EVENTS", "0") == "1"
 
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
@@ -146,6 +156,20 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.0/howto/static-files/
 
+# Redis used by leaderboards, trending, activity feeds and object cache, see forum.redis_client.
+# BACKEND "fake" keeps data in process memory, for tests and development without redis server
+REDIS = {
+    "BACKEND": os.environ.get("REDIS_BACKEND", "redis"),
+    "URL": os.environ.get("REDIS_URL", "redis://redis:6379/0"),
+    "MAX_CONNECTIONS": int(os.environ.get("REDIS_MAX_CONNECTIONS", 50)),
+    "SOCKET_TIMEOUT": float(os.environ.get("REDIS_SOCKET_TIMEOUT", 1.0)),
+    "SOCKET_CONNECT_TIMEOUT": float(os.environ.get("REDIS_SOCKET_CONNECT_TIMEOUT", 1.0)),
+    "HEALTH_CHECK_INTERVAL": 30,
+}
+
+# Tests run over fake redis unless REDIS_BACKEND is set, see forum.test_runner
+TEST_RUNNER = 'forum.test_runner.TestRunner'
+
 CELERY_BROKER_URL = "redis://redis:6379"
 # CELERY_BROKER_URL = "redis://127.0.0.1:6379/1"
 
@@ -174,23 +198,18 @@ USE_X_FORWARDED_HOST = True
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
 CELERY_BEAT_SCHEDULE = {
-    "first_task": {
-        "task": "forum.tasks.get_users_with_best_score",
-        "schedule": crontab(minute="*/1"),
-    },
-    "second_task": {
-        "task": "forum.tasks.get_top_disliked_messages",
-        "schedule": crontab(minute="*/1"),
-    },
-    "third_task": {
-        "task": "forum.tasks.get_top_liked_messages",
-        "schedule": crontab(minute="*/1"),
+    "recompute_leaderboards": {
+        "task": "forum.tasks.recompute_leaderboards",
+        "schedule": crontab(minute="*/15"),
     },
 }
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'forum.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
+    # Lists are paginated by cursor over view ordering, ?page_size= is capped by KeysetPagination.max_page_size
+    'DEFAULT_PAGINATION_CLASS': 'forum.api.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
\ No newline at end of file
@@ -0,0 +1,144 @@
+from collections import defaultdict
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+from . import object_cache
+from .models import Message
+from .redis_client import client, pipelined, run_safely
+
+# Entries shown on one page of activity feed
+PAGE_SIZE = getattr(settings, 'ACTIVITY_FEED_PAGE_SIZE', 10)
+# Entries kept in every feed
+MAX_SIZE = getattr(settings, 'ACTIVITY_FEED_MAX_SIZE', 200)
+# Seconds feed of user is kept after it was filled or user posted the last time
+USER_FEED_TTL = getattr(settings, 'ACTIVITY_USER_FEED_TTL', 7 * 24 * 3600)
+
+# Feeds are lists of message ids, names are read when feed is shown, so renames are seen at once
+GLOBAL_FEED = 'activity:feed:global'
+
+
+def _user_feed(user_id):
+    return 'activity:feed:user:{}'.format(user_id)
+
+
+def _feeds(author_id):
+    return GLOBAL_FEED, _user_feed(author_id)
+
+
+def push(messages):
+    """
+    Put (message id, author id) pairs on top of global and their authors feeds, feeds are trimmed to MAX_SIZE.
+    Missing feeds are left to be filled from db by recent, so they do not start with the new entry only
+    """
+    def queue(pipe, item):
+        message_id, author_id = item
+        for key in _feeds(author_id):
+            pipe.lpushx(key, message_id)
+            pipe.ltrim(key, 0, MAX_SIZE - 1)
+        pipe.expire(_user_feed(author_id), USER_FEED_TTL)
+    pipelined(messages, queue)
+
+
+def remove(messages):
+    """
+    Remove (message id, author id) pairs of deleted messages from feeds, every feed is read once
+    and only ids it holds are removed
+    """
+    by_feed = defaultdict(set)
+    for message_id, author_id in messages:
+        for key in _feeds(author_id):
+            by_feed[key].add(message_id)
+    pipe = client.pipeline(transaction=False)
+    for key in by_feed:
+        pipe.lrange(key, 0, -1)
+    feeds = pipe.execute()
+    pipe = client.pipeline(transaction=False)
+    for (key, message_ids), entries in zip(by_feed.items(), feeds):
+        for message_id in message_ids.intersection(int(entry) for entry in entries):
+            pipe.lrem(key, 1, message_id)
+    if len(pipe):
+        pipe.execute()
+
+
+def on_create(messages):
+    """
+    Push created messages to feeds after transaction commit
+    """
+    pairs = [(message.id, message.author_id) for message in messages]
+    transaction.on_commit(lambda: run_safely(push, pairs))
+
+
+def on_delete(messages):
+    """
+    Remove (message id, author id) pairs of deleted messages from feeds after transaction commit
+    """
+    pairs = list(messages)
+    if pairs:
+        transaction.on_commit(lambda: run_safely(remove, pairs))
+
+
+def _messages(user_id=None):
+    messages = Message.objects.order_by('-created', '-id')
+    if user_id is not None:
+        messages = messages.filter(author_id=user_id)
+    return messages
+
+
+def _entries(message_ids):
+    """
+    Get entries with everything activity component shows about messages in order of message_ids,
+    authors are read from object cache, deleted messages are skipped
+    """
+    rows = Message.objects.filter(id__in=message_ids).values('id', 'body', 'created', 'author_id', 'room_id',
+                                                             'room__name')
+    messages = {row['id']: row for row in rows}
+    authors = object_cache.users.get_many({row['author_id'] for row in messages.values()})
+    entries = []
+    for pk in message_ids:
+        message = messages.get(pk)
+        if message is None or message['author_id'] not in authors:
+            continue
+        author = authors[message['author_id']]
+        entries.append({
+            'id': pk,
+            'body': message['body'],
+            'created': message['created'],
+            'author': {'id': author['id'], 'username': author['username'], 'avatar': author['avatar']},
+            'room': {'id': message['room_id'], 'name': message['room__name']},
+        })
+    return entries
+
+
+def _fill(key, user_id):
+    """
+    Load feed from db when it is missing in redis
+    """
+    message_ids = list(_messages(user_id).values_list('id', flat=True)[:MAX_SIZE])
+    if message_ids:
+        pipe = client.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.rpush(key, *message_ids)
+        if user_id is not None:
+            pipe.expire(key, USER_FEED_TTL)
+        pipe.execute()
+
+
+def recent(user_id=None, page=1, page_size=PAGE_SIZE):
+    """
+    Get entries on page of global feed or feed of user and whether there are more pages.
+    Feeds keep only MAX_SIZE newest messages
+    """
+    start = (page - 1) * page_size
+    stop = min(start + page_size, MAX_SIZE)
+    if start >= stop:
+        return [], False
+    key = GLOBAL_FEED if user_id is None else _user_feed(user_id)
+    try:
+        if not client.exists(key):
+            _fill(key, user_id)
+        message_ids = [int(pk) for pk in client.lrange(key, start, stop)]
+    except redis.RedisError:
+        message_ids = list(_messages(user_id).values_list('id', flat=True)[start:stop + 1])
+    return _entries(message_ids[:page_size]), len(message_ids) > stop - start and stop < MAX_SIZE
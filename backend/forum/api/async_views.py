@@ -0,0 +1,135 @@
+from functools import wraps
+from types import SimpleNamespace
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.request import Request
+
+from .pagination import KeysetPagination, LeaderboardPagination
+from .serializers import RoomSerializer, MessageSerializer, LeaderboardMessageSerializer, \
+    LeaderboardUserSerializer, TrendingMessageSerializer, TrendingRoomSerializer
+from forum import leaderboards, trending
+from forum.db import database_sync_to_async
+from forum.models import Message, Room
+
+
+def async_api_view(view):
+    """
+    Async read-only endpoint returning view data as json, with errors shaped like rest framework ones
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return JsonResponse({'detail': 'Method "{}" not allowed.'.format(request.method)}, status=405)
+        try:
+            return JsonResponse(await view(Request(request), *args, **kwargs))
+        except APIException as exc:
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            return JsonResponse(data, status=exc.status_code, safe=False)
+        except Http404:
+            return JsonResponse({'detail': 'Not found.'}, status=404)
+    return wrapper
+
+
+def _paginate(request, queryset, serializer_class, ordering=None):
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(serializer_class.setup_queryset(queryset), request,
+                                       SimpleNamespace(ordering=ordering))
+    return paginator.get_paginated_response(serializer_class(page, many=True).data).data
+
+
+def _room(pk):
+    return RoomSerializer(get_object_or_404(RoomSerializer.setup_queryset(Room.objects.all()), pk=pk)).data
+
+
+def _room_messages(request, pk):
+    room = get_object_or_404(Room.objects.only('id'), pk=pk)
+    return _paginate(request, room.message_set.all(), MessageSerializer, Message.HISTORY_ORDERING)
+
+
+@async_api_view
+async def room_list(request):
+    """
+    Shows all rooms
+    """
+    return await database_sync_to_async(_paginate)(request, Room.objects.all(), RoomSerializer)
+
+
+@async_api_view
+async def room_detail(request, pk):
+    """
+    Detail look of room
+    """
+    return await database_sync_to_async(_room)(pk)
+
+
+@async_api_view
+async def room_messages(request, pk):
+    """
+    Show all messages in selected room
+    """
+    return await database_sync_to_async(_room_messages)(request, pk)
+
+
+async def _leaderboard_page(request, board, serializer_class):
+    paginator = LeaderboardPagination()
+    paginator.request = request
+    paginator.limit = paginator.get_limit(request)
+    paginator.offset = paginator.get_offset(request)
+    paginator.count, entries = await board.aslice(paginator.offset, paginator.offset + paginator.limit)
+    return paginator.get_paginated_response(serializer_class(entries, many=True).data).data
+
+
+def leaderboard_view(board, serializer_class):
+    """
+    Build view of leaderboard slice selected with ?limit=&offset=
+    """
+    @async_api_view
+    async def view(request):
+        return await _leaderboard_page(request, board, serializer_class)
+    return view
+
+
+def scoped_leaderboard_view(scope, key, leaderboard_class, serializer_class):
+    """
+    Build view of leaderboard limited to room or topic with id pk
+    """
+    @async_api_view
+    async def view(request, pk):
+        board = leaderboard_class(leaderboards.scoped_key(key, scope, pk))
+        return await _leaderboard_page(request, board, serializer_class)
+    return view
+
+
+def trending_view(boards, serializer_class):
+    """
+    Build view of trending entries in ?window=hour or ?window=day
+    """
+    @async_api_view
+    async def view(request):
+        window = request.query_params.get('window', 'hour')
+        if window not in boards:
+            raise ValidationError({'window': 'Choose one of: {}'.format(', '.join(boards))})
+        return await _leaderboard_page(request, boards[window], serializer_class)
+    return view
+
+
+best_messages = leaderboard_view(leaderboards.best_messages, LeaderboardMessageSerializer)
+worst_messages = leaderboard_view(leaderboards.worst_messages, LeaderboardMessageSerializer)
+users_scoring = leaderboard_view(leaderboards.users_scoring, LeaderboardUserSerializer)
+trending_messages = trending_view(trending.trending_messages, TrendingMessageSerializer)
+trending_rooms = trending_view(trending.trending_rooms, TrendingRoomSerializer)
+
+room_best_messages = scoped_leaderboard_view(leaderboards.ROOM, leaderboards.BEST_MESSAGES,
+                                             leaderboards.MessageLeaderboard, LeaderboardMessageSerializer)
+room_worst_messages = scoped_leaderboard_view(leaderboards.ROOM, leaderboards.WORST_MESSAGES,
+                                              leaderboards.MessageLeaderboard, LeaderboardMessageSerializer)
+room_users_scoring = scoped_leaderboard_view(leaderboards.ROOM, leaderboards.USERS_SCORING,
+                                             leaderboards.UserLeaderboard, LeaderboardUserSerializer)
+topic_best_messages = scoped_leaderboard_view(leaderboards.TOPIC, leaderboards.BEST_MESSAGES,
+                                              leaderboards.MessageLeaderboard, LeaderboardMessageSerializer)
+topic_worst_messages = scoped_leaderboard_view(leaderboards.TOPIC, leaderboards.WORST_MESSAGES,
+                                               leaderboards.MessageLeaderboard, LeaderboardMessageSerializer)
+topic_users_scoring = scoped_leaderboard_view(leaderboards.TOPIC, leaderboards.USERS_SCORING,
+                                              leaderboards.UserLeaderboard, LeaderboardUserSerializer)
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from forum.pagination import InvalidCursor, keyset_page
+
+
+class LeaderboardPagination(LimitOffsetPagination):
+    """
+    Top-N slices of leaderboard, selected with ?limit=&offset=
+    """
+    default_limit = 50
+    max_limit = 500
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over view ordering, next page is selected by ordering values
+    of the last row instead of offset, so page N costs the same as page 1
+    """
+    page_size = api_settings.PAGE_SIZE or 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'ordering', None) or self.ordering
+        return self.paginate_with(lambda size, cursor: keyset_page(queryset, ordering, size, cursor), request)
+
+    def paginate_with(self, get_page, request):
+        """
+        Paginate rows not read from queryset, get_page(size, cursor) returns page and cursor of the next page
+        """
+        self.request = request
+        cursor = request.query_params.get(self.cursor_query_param)
+        try:
+            page, self.next_cursor = get_page(self.get_page_size(request), cursor)
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
@@ -1,17 +1,40 @@
+from forum import exports
 from forum.models import Topic, Room, Message, User, MessageRating
 from rest_framework import serializers
 
 
+class RelatedFieldsMixin:
+    """
+    Serializer mixin declaring relations read by to_representation,
+    views join and prefetch them with setup_queryset, so rows are serialized without queries
+    """
+    select_related = ()
+    prefetch_related = ()
+
+    @classmethod
+    def setup_queryset(cls, queryset):
+        if cls.select_related:
+            queryset = queryset.select_related(*cls.select_related)
+        if cls.prefetch_related:
+            queryset = queryset.prefetch_related(*cls.prefetch_related)
+        return queryset
+
+
 class TopicSerializer(serializers.ModelSerializer):
     class Meta:
         model = Topic
-        fields = ['id', 'name']
+        fields = ['id', 'name', 'room_count']
+        read_only_fields = ['room_count']
+
 
+class RoomSerializer(RelatedFieldsMixin, serializers.ModelSerializer):
+    select_related = ('host', 'topic')
+    prefetch_related = ('participants',)
 
-class RoomSerializer(serializers.ModelSerializer):
     class Meta:
         model = Room
         fields = '__all__'
+        read_only_fields = ['message_count', 'participant_count']
 
     def to_representation(self, instance):
         representation = super(RoomSerializer, self).to_representation(instance)
@@ -22,11 +45,13 @@ class RoomSerializer(serializers.ModelSerializer):
         return representation
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(RelatedFieldsMixin, serializers.ModelSerializer):
+    select_related = ('author', 'room')
+
     class Meta:
         model = Message
         fields = '__all__'
-        read_only_fields = ['user']
+        read_only_fields = ['user', 'likes_count', 'dislikes_count']
 
     def to_representation(self, instance):
         representation = super(MessageSerializer, self).to_representation(instance)
@@ -45,6 +70,44 @@ class MessageCreateSerializer(serializers.ModelSerializer):
         fields = ['room', 'body']
 
 
+class MessageRateSerializer(serializers.Serializer):
+    """
+    Serializer for liking or disliking message
+    """
+    message = serializers.IntegerField()
+    value = serializers.ChoiceField(choices=MessageRating.CHOICES)
+
+
+class MessageSearchSerializer(serializers.Serializer):
+    """
+    Serializer for message search query and filters
+    """
+    q = serializers.CharField()
+    room = serializers.IntegerField(required=False)
+    topic = serializers.IntegerField(required=False)
+    author = serializers.IntegerField(required=False)
+
+
+class ExportSerializer(serializers.Serializer):
+    """
+    Serializer for export format and incremental export filters
+    """
+    output = serializers.ChoiceField(choices=list(exports.CONTENT_TYPES), default=exports.NDJSON)
+    since_id = serializers.IntegerField(required=False)
+
+
+class MessageExportSerializer(ExportSerializer):
+    since = serializers.DateTimeField(required=False)
+
+
+class BulkMessageSerializer(serializers.Serializer):
+    """
+    Serializer for one message of bulk creation
+    """
+    room = serializers.IntegerField()
+    body = serializers.CharField()
+
+
 class MessageUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for updating message
@@ -60,7 +123,9 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['username', 'name', 'date_joined', 'bio', ]
 
 
-class MessageRatingSerializer(serializers.ModelSerializer):
+class MessageRatingSerializer(RelatedFieldsMixin, serializers.ModelSerializer):
+    select_related = ('room', 'topic', 'author', 'user', 'message')
+
     class Meta:
         model = MessageRating
         fields = '__all__'
@@ -74,3 +139,45 @@ class MessageRatingSerializer(serializers.ModelSerializer):
         representation['message'] = instance.message.body
 
         return representation
+
+
+class LeaderboardMessageSerializer(serializers.Serializer):
+    """
+    Serializer for message leaderboard entries
+    """
+    rank = serializers.IntegerField()
+    score = serializers.IntegerField()
+    id = serializers.IntegerField()
+    body = serializers.CharField()
+    author = serializers.CharField()
+    room = serializers.CharField()
+
+
+class LeaderboardUserSerializer(serializers.Serializer):
+    """
+    Serializer for user leaderboard entries
+    """
+    rank = serializers.IntegerField()
+    score = serializers.IntegerField()
+    id = serializers.IntegerField()
+    username = serializers.CharField()
+    name = serializers.CharField()
+
+
+class TrendingMessageSerializer(LeaderboardMessageSerializer):
+    """
+    Serializer for trending message entries
+    """
+    score = serializers.FloatField()
+
+
+class TrendingRoomSerializer(serializers.Serializer):
+    """
+    Serializer for trending room entries
+    """
+    rank = serializers.IntegerField()
+    score = serializers.FloatField()
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    topic = serializers.CharField(allow_null=True)
+    host = serializers.CharField(allow_null=True)
@@ -1,26 +1,41 @@
-import redis
-import json
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework import mixins, generics, permissions, authentication, status
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-from rest_framework.views import APIView
 
+from .pagination import LeaderboardPagination
 from .serializers import TopicSerializer, RoomSerializer, MessageSerializer, UserSerializer, MessageRatingSerializer, \
-    MessageCreateSerializer, MessageUpdateSerializer
+    MessageCreateSerializer, MessageUpdateSerializer, MessageRateSerializer, MessageSearchSerializer, \
+    BulkMessageSerializer, ExportSerializer, MessageExportSerializer, LeaderboardMessageSerializer, \
+    LeaderboardUserSerializer, TrendingMessageSerializer, TrendingRoomSerializer
+from forum import exports, ingest, leaderboards, membership, message_search, trending
+from forum.authentication import CachedTokenAuthentication
 from forum.models import Topic, Message, Room, MessageRating
-
-client = redis.Redis(host='redis', port=6379, db=0)
+from forum.ratings import rate_message
 
 
 class DefaultAuth(generics.GenericAPIView):
     """
     Default view that auths with django
     """
-    authentication_classes = [authentication.SessionAuthentication, authentication.TokenAuthentication]
+    authentication_classes = [authentication.SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
 
+class SerializerQuerysetMixin(generics.GenericAPIView):
+    """
+    View joining and prefetching relations declared by its serializer
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        setup_queryset = getattr(self.get_serializer_class(), 'setup_queryset', None)
+        return setup_queryset(queryset) if setup_queryset else queryset
+
+
 # TOPIC CRUD----------------------------------------------------------------------------------------------------------
-class TopicCRUDBase(generics.GenericAPIView):
+class TopicCRUDBase(SerializerQuerysetMixin):
     queryset = Topic.objects.all()
     serializer_class = TopicSerializer
     lookup_field = 'pk'
@@ -50,15 +65,15 @@ class TopicRoomsView(TopicCRUDBase, generics.RetrieveAPIView):
     """
 
     def get(self, request, *args, **kwargs):
-        topics = Topic.objects.get(id=kwargs['pk'])
-        rooms = topics.room_set
-        serializer = RoomSerializer(rooms, many=True)
-        return Response(serializer.data)
+        topic = self.get_object()
+        page = self.paginate_queryset(RoomSerializer.setup_queryset(topic.room_set.all()))
+        serializer = RoomSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 # ROOM CRUD----------------------------------------------------------------------------------------------------------
 
-class RoomCRUDBase(generics.GenericAPIView):
+class RoomCRUDBase(SerializerQuerysetMixin):
     queryset = Room.objects.all()
     serializer_class = RoomSerializer
     lookup_field = 'pk'
@@ -87,11 +102,13 @@ class RoomMessagesView(RoomCRUDBase, generics.RetrieveAPIView):
     Show all messages in selected room
     """
 
+    ordering = Message.HISTORY_ORDERING
+
     def get(self, request, *args, **kwargs):
-        room = Room.objects.get(id=kwargs['pk'])
-        room_messages = room.message_set
-        serializer = MessageSerializer(room_messages, many=True)
-        return Response(serializer.data)
+        room = self.get_object()
+        page = self.paginate_queryset(MessageSerializer.setup_queryset(room.message_set.all()))
+        serializer = MessageSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 class RoomParticipantsView(RoomCRUDBase, generics.RetrieveAPIView):
@@ -99,15 +116,19 @@ class RoomParticipantsView(RoomCRUDBase, generics.RetrieveAPIView):
     Show all participants in selected room
     """
 
+    queryset = Room.objects.only('id')
+    serializer_class = UserSerializer
+
     def get(self, request, *args, **kwargs):
-        room = Room.objects.get(id=kwargs['pk'])
-        serializer = UserSerializer(room.participants, many=True)
-        return Response(serializer.data)
+        room = self.get_object()
+        page = self.paginator.paginate_with(lambda size, cursor: membership.page(room.pk, size, cursor), request)
+        serializer = UserSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 # MESSAGE CRUD----------------------------------------------------------------------------------------------------------
 
-class MessageCRUDBase(generics.GenericAPIView):
+class MessageCRUDBase(SerializerQuerysetMixin):
     queryset = Message.objects.all()
     serializer_class = MessageSerializer
     lookup_field = 'pk'
@@ -122,6 +143,18 @@ class MessageListView(MessageCRUDBase, mixins.ListModelMixin):
         return self.list(request, *args, **kwargs)
 
 
+class MessageSearchView(MessageCRUDBase, generics.ListAPIView):
+    """
+    Search messages containing every word of ?q=, filtered by ?room=, ?topic= and ?author=
+    """
+
+    def get_queryset(self):
+        params = MessageSearchSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = dict(params.validated_data)
+        return MessageSerializer.setup_queryset(message_search.search(filters.pop('q'), **filters))
+
+
 class MessageCreateAPIView(MessageCRUDBase, DefaultAuth, mixins.CreateModelMixin):
     """
     Create a message
@@ -138,8 +171,82 @@ class MessageCreateAPIView(MessageCRUDBase, DefaultAuth, mixins.CreateModelMixin
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        message = serializer.save(author=self.request.user)
+        membership.join(message.room, self.request.user)
+
+
+class BulkView(DefaultAuth):
+    """
+    Base view that accepts list of items and answers with result per item
+    """
+
+    def validate_items(self):
+        """
+        Get validated data or None and errors or None for every item
+        """
+        if not isinstance(self.request.data, list) or not self.request.data:
+            raise ValidationError('Expected a non-empty list of items.')
+        if len(self.request.data) > ingest.MAX_ITEMS:
+            raise ValidationError('Expected at most {} items.'.format(ingest.MAX_ITEMS))
+        items, errors = [], []
+        for data in self.request.data:
+            serializer = self.get_serializer(data=data)
+            valid = serializer.is_valid()
+            items.append(serializer.validated_data if valid else None)
+            errors.append(None if valid else serializer.errors)
+        return items, errors
+
+    def post(self, request, *args, **kwargs):
+        items, errors = self.validate_items()
+        valid_items = [item for item in items if item is not None]
+        results = iter(self.perform_bulk(valid_items) if valid_items else [])
+        response = []
+        for item, error in zip(items, errors):
+            if item is not None:
+                result = next(results)
+                response.append(self.get_result(item, result))
+            else:
+                response.append({'status': 'error', 'errors': error})
+        return Response({'results': response})
+
+    def perform_bulk(self, items):
+        raise NotImplementedError
+
+    def get_result(self, item, result):
+        raise NotImplementedError
+
+
+class MessageBulkCreateView(BulkView):
+    """
+    Create list of messages
+    """
+    serializer_class = BulkMessageSerializer
+
+    def perform_bulk(self, items):
+        return ingest.create_messages(self.request.user, items)
+
+    def get_result(self, item, result):
+        if isinstance(result, Message):
+            return {'status': 'created', 'id': result.id}
+        return {'status': 'error', 'errors': result}
+
+
+class MessageRatingBulkView(BulkView):
+    """
+    Set list of likes and dislikes of user
+    """
+    serializer_class = MessageRateSerializer
+
+    def perform_bulk(self, items):
+        return ingest.rate_messages(self.request.user, items)
+
+    def get_result(self, item, result):
+        if isinstance(result, tuple):
+            status, value = result
+            return {'status': status, 'message': item['message'], 'value': value}
+        return {'status': 'error', 'errors': result}
 
 
 class MessageRetrieveView(MessageCRUDBase, mixins.RetrieveModelMixin):
@@ -157,11 +264,27 @@ class GetMessageRatesView(MessageCRUDBase, mixins.RetrieveModelMixin):
     """
 
     def get(self, request, *args, **kwargs):
-        message = Message.objects.get(id=kwargs['pk'])
-        rates = message.messagerating_set
-        serializer = MessageRatingSerializer(rates, many=True)
+        message = self.get_object()
+        page = self.paginate_queryset(MessageRatingSerializer.setup_queryset(message.messagerating_set.all()))
+        serializer = MessageRatingSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
-        return Response(serializer.data)
+
+class MessageRateView(DefaultAuth):
+    """
+    Like or dislike a message, repeating the same rating removes it
+    """
+    serializer_class = MessageRateSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        message_id = serializer.validated_data['message']
+        try:
+            rating = rate_message(request.user, message_id, serializer.validated_data['value'])
+        except Message.DoesNotExist:
+            raise NotFound('Message does not exist.')
+        return Response({'message': message_id, 'value': rating.value if rating.pk else None})
 
 
 class MessageUpdateView(MessageCRUDBase, DefaultAuth, mixins.UpdateModelMixin):
@@ -210,7 +333,7 @@ class MessageDestroyView(MessageCRUDBase, mixins.DestroyModelMixin):
 
 # MESSAGE RATING CRUD----------------------------------------------------------------------------------------------------------
 
-class MessageRatingCRUDBase(generics.GenericAPIView):
+class MessageRatingCRUDBase(SerializerQuerysetMixin):
     queryset = MessageRating.objects.all()
     serializer_class = MessageRatingSerializer
     lookup_field = 'pk'
@@ -239,10 +362,7 @@ class MessageRatingLikeList(MessageRatingCRUDBase, generics.ListAPIView):
     Show all dislikes
     """
 
-    def get(self, request, *args, **kwargs):
-        rates = MessageRating.objects.filter(value='Like')
-        serializer = MessageRatingSerializer(rates, many=True)
-        return Response(serializer.data)
+    queryset = MessageRating.objects.filter(value=MessageRating.LIKE)
 
 
 class MessageRatingDislikeList(MessageRatingCRUDBase, generics.ListAPIView):
@@ -250,36 +370,229 @@ class MessageRatingDislikeList(MessageRatingCRUDBase, generics.ListAPIView):
     Show all likes
     """
 
+    queryset = MessageRating.objects.filter(value=MessageRating.DISLIKE)
+
+
+# EXPORTS --------------------------------------------------------------------------------------------------------------
+
+class ExportView(generics.GenericAPIView):
+    """
+    Base view streaming rows as ?output=ndjson or ?output=csv, rows are read from database cursor
+    in chunks, so export of any size takes the same worker memory.
+    Exports are ordered by id, ?since_id= continues export after the last received row
+    """
+    serializer_class = ExportSerializer
+    fields = None
+    filename = None
+
+    def get_rows(self, **params):
+        raise NotImplementedError
+
     def get(self, request, *args, **kwargs):
-        rates = MessageRating.objects.filter(value='Dislike')
-        serializer = MessageRatingSerializer(rates, many=True)
-        return Response(serializer.data)
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = dict(serializer.validated_data)
+        output = params.pop('output')
+        response = StreamingHttpResponse(exports.lines(output, self.fields, self.get_rows(**params)),
+                                         content_type=exports.CONTENT_TYPES[output])
+        response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(self.filename, output)
+        return response
+
+
+class MessageExportView(ExportView):
+    """
+    Export messages, ?since= limits export to messages changed after timestamp
+    """
+    serializer_class = MessageExportSerializer
+    fields = exports.MESSAGE_FIELDS
+    filename = 'messages'
+
+    def get_rows(self, **params):
+        return exports.message_rows(**params)
+
+
+class MessageRatingExportView(ExportView):
+    """
+    Export likes and dislikes
+    """
+    fields = exports.RATING_FIELDS
+    filename = 'ratings'
+
+    def get_rows(self, **params):
+        return exports.rating_rows(**params)
 
 
 # OTHERS --------------------------------------------------------------------------------------------------------------
 
-class GetUserScoringList(APIView):
+class LeaderboardView(generics.ListAPIView):
     """
-    Get user rankings
+    Base view of leaderboard slices, selected with ?limit=&offset=
     """
+    pagination_class = LeaderboardPagination
+    leaderboard = None
+
+    def get_queryset(self):
+        return self.leaderboard
+
+
+class LeaderboardRankView(generics.GenericAPIView):
+    """
+    Base view of leaderboard rank lookup
+    """
+    leaderboard = None
 
     def get(self, request, *args, **kwargs):
-        return Response(json.loads(client.get('users_scoring').decode('utf8')))
+        entry = self.leaderboard.rank(kwargs['pk'])
+        if entry is None:
+            raise NotFound('Not found on leaderboard.')
+        serializer = self.get_serializer(entry)
+        return Response(serializer.data)
+
+
+class ScopedLeaderboardView(LeaderboardView):
+    """
+    Base view of leaderboard limited to room or topic with id pk
+    """
+    scope = None
+    key = None
+    leaderboard_class = None
+
+    def get_queryset(self):
+        return self.leaderboard_class(leaderboards.scoped_key(self.key, self.scope, self.kwargs['pk']))
+
+
+class GetUserScoringList(LeaderboardView):
+    """
+    Get user rankings
+    """
+    leaderboard = leaderboards.users_scoring
+    serializer_class = LeaderboardUserSerializer
 
 
-class GetBestMessagesList(APIView):
+class GetUserScoringRank(LeaderboardRankView):
+    """
+    Get rank of user
+    """
+    leaderboard = leaderboards.users_scoring
+    serializer_class = LeaderboardUserSerializer
+
+
+class GetBestMessagesList(LeaderboardView):
     """
     Get best messages
     """
+    leaderboard = leaderboards.best_messages
+    serializer_class = LeaderboardMessageSerializer
 
-    def get(self, request, *args, **kwargs):
-        return Response(json.loads(client.get('best_messages').decode('utf8')))
+
+class GetBestMessagesRank(LeaderboardRankView):
+    """
+    Get rank of message among best messages
+    """
+    leaderboard = leaderboards.best_messages
+    serializer_class = LeaderboardMessageSerializer
 
 
-class GetWorstMessagesList(APIView):
+class GetWorstMessagesList(LeaderboardView):
     """
     Get worst messages
     """
+    leaderboard = leaderboards.worst_messages
+    serializer_class = LeaderboardMessageSerializer
 
-    def get(self, request, *args, **kwargs):
-        return Response(json.loads(client.get('worst_messages').decode('utf8')))
+
+class GetWorstMessagesRank(LeaderboardRankView):
+    """
+    Get rank of message among worst messages
+    """
+    leaderboard = leaderboards.worst_messages
+    serializer_class = LeaderboardMessageSerializer
+
+
+class TrendingView(LeaderboardView):
+    """
+    Base view of trending entries in ?window=hour or ?window=day
+    """
+    boards = None
+
+    def get_queryset(self):
+        window = self.request.query_params.get('window', 'hour')
+        if window not in self.boards:
+            raise ValidationError({'window': 'Choose one of: {}'.format(', '.join(self.boards))})
+        return self.boards[window]
+
+
+class GetTrendingMessagesList(TrendingView):
+    """
+    Get messages with most ratings recently
+    """
+    boards = trending.trending_messages
+    serializer_class = TrendingMessageSerializer
+
+
+class GetTrendingRoomsList(TrendingView):
+    """
+    Get rooms with most messages and ratings recently
+    """
+    boards = trending.trending_rooms
+    serializer_class = TrendingRoomSerializer
+
+
+class GetRoomBestMessagesList(ScopedLeaderboardView):
+    """
+    Get best messages in room
+    """
+    scope = leaderboards.ROOM
+    key = leaderboards.BEST_MESSAGES
+    leaderboard_class = leaderboards.MessageLeaderboard
+    serializer_class = LeaderboardMessageSerializer
+
+
+class GetRoomWorstMessagesList(ScopedLeaderboardView):
+    """
+    Get worst messages in room
+    """
+    scope = leaderboards.ROOM
+    key = leaderboards.WORST_MESSAGES
+    leaderboard_class = leaderboards.MessageLeaderboard
+    serializer_class = LeaderboardMessageSerializer
+
+
+class GetRoomUserScoringList(ScopedLeaderboardView):
+    """
+    Get user rankings in room
+    """
+    scope = leaderboards.ROOM
+    key = leaderboards.USERS_SCORING
+    leaderboard_class = leaderboards.UserLeaderboard
+    serializer_class = LeaderboardUserSerializer
+
+
+class GetTopicBestMessagesList(ScopedLeaderboardView):
+    """
+    Get best messages in topic
+    """
+    scope = leaderboards.TOPIC
+    key = leaderboards.BEST_MESSAGES
+    leaderboard_class = leaderboards.MessageLeaderboard
+    serializer_class = LeaderboardMessageSerializer
+
+
+class GetTopicWorstMessagesList(ScopedLeaderboardView):
+    """
+    Get worst messages in topic
+    """
+    scope = leaderboards.TOPIC
+    key = leaderboards.WORST_MESSAGES
+    leaderboard_class = leaderboards.MessageLeaderboard
+    serializer_class = LeaderboardMessageSerializer
+
+
+class GetTopicUserScoringList(ScopedLeaderboardView):
+    """
+    Get user rankings in topic
+    """
+    scope = leaderboards.TOPIC
+    key = leaderboards.USERS_SCORING
+    leaderboard_class = leaderboards.UserLeaderboard
+    serializer_class = LeaderboardUserSerializer
@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from .models import User
+from .object_cache import ObjectCache
+
+# Seconds user rows and tokens are served from memory of process and from redis, invalidation
+# on save and delete is broadcast, ttl bounds staleness when broadcast is lost
+LOCAL_TTL = getattr(settings, 'AUTH_CACHE_LOCAL_TTL', 30)
+REDIS_TTL = getattr(settings, 'AUTH_CACHE_REDIS_TTL', 300)
+
+# Fields of user read by authentication, permissions, serializers and navbar of every page, others are
+# deferred. Password hash is not cached, session auth hash derived from it is kept for session check
+CACHED_FIELDS = {'id', 'name', 'username', 'avatar', 'is_active', 'is_staff', 'is_superuser', 'last_login'}
+FIELDS = [field for field in User._meta.concrete_fields if field.attname in CACHED_FIELDS]
+SESSION_AUTH_HASH = 'session_auth_hash'
+
+
+def _row(user):
+    row = {field.attname: None if field.value_from_object(user) is None else field.value_to_string(user)
+           for field in FIELDS}
+    row[SESSION_AUTH_HASH] = user.get_session_auth_hash()
+    return row
+
+
+def load_users(pks):
+    return {user.id: _row(user) for user in User.objects.filter(id__in=pks)}
+
+
+def load_tokens(keys):
+    return dict(Token.objects.filter(key__in=keys).values_list('key', 'user_id'))
+
+
+# Rows of users needed to authenticate them, and user id of every token key
+users = ObjectCache('auth_user_row', load_users, LOCAL_TTL, REDIS_TTL)
+tokens = ObjectCache('auth_token', load_tokens, LOCAL_TTL, REDIS_TTL)
+
+
+def get_user(user_id):
+    """
+    Get user with user_id built from cached row without query, None if it does not exist.
+    Fields which are not cached are loaded on access
+    """
+    row = users.get(user_id)
+    if row is None:
+        return None
+    user = User.from_db(User.objects.db, [field.attname for field in FIELDS],
+                        [None if row[field.attname] is None else field.to_python(row[field.attname])
+                         for field in FIELDS])
+    session_auth_hash = row[SESSION_AUTH_HASH]
+
+    def get_session_auth_hash():
+        # password set on this instance changes the hash
+        if 'password' in user.__dict__:
+            return User.get_session_auth_hash(user)
+        return session_auth_hash
+    user.get_session_auth_hash = get_session_auth_hash
+    return user
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    Model backend loading users of sessions from cache, credentials are still checked against database
+    """
+
+    def get_user(self, user_id):
+        user = get_user(int(user_id))
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication resolving token and its user from cache
+    """
+
+    def authenticate_credentials(self, key):
+        user_id = tokens.get(key)
+        user = get_user(user_id) if user_id is not None else None
+        if user is None:
+            raise AuthenticationFailed(_('Invalid token.'))
+        if not user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return user, Token(key=key, user=user)
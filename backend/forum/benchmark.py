@@ -0,0 +1,234 @@
+import math
+import statistics
+import time
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from . import tasks
+from .models import Topic, Room, Message, MessageRating, User
+from .profiling import QueryRecorder
+
+REPEAT = 20
+WARMUP = 2
+TASK_REPEAT = 3
+PERCENTILES = (50, 95, 99)
+
+TASKS = (tasks.recompute_leaderboards,)
+
+
+def endpoints(user, password, room, topic, message, rating):
+    """
+    Get {url name, or route of unnamed url: (method, url, data[, content type])} of requests to every
+    endpoint of forum, made by user, the author of message
+    """
+    room_pk, topic_pk, message_pk, user_pk = {'pk': room.id}, {'pk': topic.id}, {'pk': message.id}, {'pk': user.id}
+    page = {'page_size': 100}
+    json = 'application/json'
+    new_room = {'topic': topic.id, 'name': 'new', 'description': 'new'}
+    return {
+        'home': ('get', reverse('home'), {}),
+        'room_detail': ('get', reverse('room_detail', kwargs=room_pk), {}),
+        'room_create': ('post', reverse('room_create'), new_room),
+        'room_update': ('post', reverse('room_update', kwargs=room_pk), new_room),
+        'room_delete': ('post', reverse('room_delete', kwargs=room_pk), {}),
+        'topic_create': ('post', reverse('topic_create'), {'name': 'new'}),
+        'topic_search': ('get', reverse('topic_search'), {'q': topic.name}),
+        'message_delete': ('post', reverse('message_delete', kwargs=message_pk), {}),
+        'message_create': ('post', reverse('message_create', kwargs=room_pk), {'body': 'new'}),
+        'message_rate': ('post', reverse('message_rate', kwargs={'option': 'Like', 'pk': message.id}), {}),
+        'profile': ('get', reverse('profile', kwargs=user_pk), {}),
+        'profile_update': ('post', reverse('profile_update', kwargs=user_pk), {'email': user.email, 'name': 'new'}),
+        'account_signup': ('post', reverse('account_signup'),
+                           {'username': 'new', 'email': 'new@example.com', 'name': 'new',
+                            'password1': 'Benchmark-pass-1', 'password2': 'Benchmark-pass-1'}),
+        'account_login': ('post', reverse('account_login'), {'username': user.email, 'password': password}),
+        'account_logout': ('get', reverse('account_logout'), {}),
+        'account_logout_c': ('post', reverse('account_logout_c'), {}),
+
+        'topics-all': ('get', reverse('topics-all'), page),
+        'topics-detail': ('get', reverse('topics-detail', kwargs=topic_pk), {}),
+        'topics-rooms': ('get', reverse('topics-rooms', kwargs=topic_pk), page),
+        'topics-best': ('get', reverse('topics-best', kwargs=topic_pk), {}),
+        'topics-worst': ('get', reverse('topics-worst', kwargs=topic_pk), {}),
+        'topics-scoring': ('get', reverse('topics-scoring', kwargs=topic_pk), {}),
+        'rooms-all': ('get', reverse('rooms-all'), page),
+        'api/rooms/retrieve/<str:pk>/': ('get', '/api/rooms/retrieve/{}/'.format(room.id), {}),
+        'rooms-messages': ('get', reverse('rooms-messages', kwargs=room_pk), page),
+        'rooms-participants': ('get', reverse('rooms-participants', kwargs=room_pk), page),
+        'rooms-best': ('get', reverse('rooms-best', kwargs=room_pk), {}),
+        'rooms-worst': ('get', reverse('rooms-worst', kwargs=room_pk), {}),
+        'rooms-scoring': ('get', reverse('rooms-scoring', kwargs=room_pk), {}),
+        'api-rooms-trending': ('get', reverse('api-rooms-trending'), {}),
+        'api-messages-all': ('get', reverse('api-messages-all'), page),
+        'api/messages/retrieve/<str:pk>/': ('get', '/api/messages/retrieve/{}/'.format(message.id), {}),
+        'api-messages-create': ('post', reverse('api-messages-create'), {'room': room.id, 'body': 'new'}),
+        'api-messages-bulk': ('post', reverse('api-messages-bulk'),
+                              [{'room': room.id, 'body': 'new'}, {'room': 0, 'body': 'new'}], json),
+        'api-messages-update': ('patch', reverse('api-messages-update', kwargs=message_pk), {'body': 'new'}, json),
+        'api-messages-delete': ('delete', reverse('api-messages-delete', kwargs=message_pk), {}),
+        'api-messages-rate': ('post', reverse('api-messages-rate'), {'message': message.id, 'value': 'Like'}),
+        'api-messages-ratings': ('get', reverse('api-messages-ratings', kwargs=message_pk), page),
+        'api-messages-best': ('get', reverse('api-messages-best'), {}),
+        'api-messages-best-rank': ('get', reverse('api-messages-best-rank', kwargs=message_pk), {}),
+        'api-messages-trending': ('get', reverse('api-messages-trending'), {}),
+        'api-messages-search': ('get', reverse('api-messages-search'), {'q': message.body.split()[0]}),
+        'api-messages-export': ('get', reverse('api-messages-export'), {}),
+        'api-messagerating-all': ('get', reverse('api-messagerating-all'), page),
+        'api/ratings/retrieve/<str:pk>': ('get', '/api/ratings/retrieve/{}'.format(rating.id), {}),
+        'api-messagerating-bulk': ('post', reverse('api-messagerating-bulk'),
+                                   [{'message': message.id, 'value': 'Like'}], json),
+        'api-messagerating-export': ('get', reverse('api-messagerating-export'), {}),
+        'api-messagerating-likes': ('get', reverse('api-messagerating-likes'), page),
+        'api-messagerating-dislikes': ('get', reverse('api-messagerating-dislikes'), page),
+        'api-messages-worst': ('get', reverse('api-messages-worst'), {}),
+        'api-messages-worst-rank': ('get', reverse('api-messages-worst-rank', kwargs=message_pk), {}),
+        'api-users-scoring': ('get', reverse('api-users-scoring'), {}),
+        'api-users-scoring-rank': ('get', reverse('api-users-scoring-rank', kwargs=user_pk), {}),
+        'schema-swagger-ui': ('get', reverse('schema-swagger-ui'), {}),
+        'schema-redoc': ('get', reverse('schema-redoc'), {}),
+        'token-auth': ('post', reverse('token-auth'), {'email': user.email, 'password': password}),
+    }
+
+
+def async_endpoints(room, topic):
+    """
+    Get {url name: (method, url, data)} of async endpoints, their queries run on pool threads
+    and are not counted
+    """
+    room_pk, topic_pk = {'pk': room.id}, {'pk': topic.id}
+    return {
+        'async-rooms-all': ('get', reverse('async-rooms-all'), {'page_size': 100}),
+        'async-rooms-detail': ('get', reverse('async-rooms-detail', kwargs=room_pk), {}),
+        'async-rooms-messages': ('get', reverse('async-rooms-messages', kwargs=room_pk), {'page_size': 100}),
+        'async-rooms-best': ('get', reverse('async-rooms-best', kwargs=room_pk), {}),
+        'async-rooms-worst': ('get', reverse('async-rooms-worst', kwargs=room_pk), {}),
+        'async-rooms-scoring': ('get', reverse('async-rooms-scoring', kwargs=room_pk), {}),
+        'async-rooms-trending': ('get', reverse('async-rooms-trending'), {}),
+        'async-topics-best': ('get', reverse('async-topics-best', kwargs=topic_pk), {}),
+        'async-topics-worst': ('get', reverse('async-topics-worst', kwargs=topic_pk), {}),
+        'async-topics-scoring': ('get', reverse('async-topics-scoring', kwargs=topic_pk), {}),
+        'async-messages-best': ('get', reverse('async-messages-best'), {}),
+        'async-messages-worst': ('get', reverse('async-messages-worst'), {}),
+        'async-messages-trending': ('get', reverse('async-messages-trending'), {}),
+        'async-users-scoring': ('get', reverse('async-users-scoring'), {}),
+    }
+
+
+def subjects():
+    """
+    Get (user, room, topic, message, rating) with the most related rows, user is the most active author
+    and message is their most rated one. None when there are no rated messages
+    """
+    top = (Message.objects.order_by().values('author').annotate(count=Count('id')).order_by('-count')
+           .values_list('author', flat=True).first())
+    message = (Message.objects.filter(author=top, messagerating__isnull=False)
+               .order_by('-likes_count', '-dislikes_count').first())
+    if message is None:
+        return None
+    return (User.objects.get(pk=top), Room.objects.order_by('-message_count').first(),
+            Topic.objects.order_by('-room_count').first(), message,
+            MessageRating.objects.filter(message=message).first())
+
+
+def percentile(values, share):
+    """
+    Get nearest-rank percentile of values
+    """
+    values = sorted(values)
+    return values[max(math.ceil(share / 100 * len(values)) - 1, 0)]
+
+
+def summary(seconds):
+    result = {'p{}_ms'.format(share): round(percentile(seconds, share) * 1000, 3) for share in PERCENTILES}
+    result['mean_ms'] = round(statistics.mean(seconds) * 1000, 3)
+    return result
+
+
+def _request(client, user, method, url, data, content_type=None):
+    """
+    Get (seconds, queries, status) of request made by user, changes and session are rolled back
+    """
+    kwargs = {'content_type': content_type} if content_type else {}
+    with transaction.atomic():
+        # session of previous request was rolled back
+        client.cookies.clear()
+        client.force_login(user)
+        with QueryRecorder() as recorder:
+            start = time.perf_counter()
+            response = getattr(client, method)(url, data, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            seconds = time.perf_counter() - start
+        transaction.set_rollback(True)
+    return seconds, len(recorder), response.status_code
+
+
+def measure(user, requests, repeat=REPEAT, warmup=WARMUP, count_queries=True):
+    """
+    Get {name: {'method', 'url', 'status', 'queries', 'p50_ms', 'p95_ms', 'p99_ms', 'mean_ms'}}
+    of requests repeated after warmup runs
+    """
+    # one client loads middleware once
+    client = Client(raise_request_exception=False)
+    results = {}
+    for name, request in requests.items():
+        for _ in range(warmup):
+            _request(client, user, *request)
+        runs = [_request(client, user, *request) for _ in range(repeat)]
+        results[name] = {'method': request[0].upper(), 'url': request[1], 'status': runs[-1][2],
+                         'queries': runs[-1][1] if count_queries else None,
+                         **summary([seconds for seconds, _, _ in runs])}
+    return results
+
+
+def measure_tasks(task_list, repeat=TASK_REPEAT):
+    """
+    Get timings and query counts of celery tasks run in this process, or error of failed task
+    """
+    results = {}
+    for task in task_list:
+        runs = []
+        try:
+            for _ in range(repeat):
+                with QueryRecorder() as recorder:
+                    start = time.perf_counter()
+                    task()
+                    runs.append((time.perf_counter() - start, len(recorder)))
+        except redis.RedisError as exc:
+            results[task.name] = {'error': str(exc)}
+            continue
+        results[task.name] = {'queries': runs[-1][1], **summary([seconds for seconds, _ in runs])}
+    return results
+
+
+def run(password, repeat=REPEAT, warmup=WARMUP, task_repeat=TASK_REPEAT, names=None):
+    """
+    Benchmark leaderboard tasks and every endpoint on current database, names limit measured endpoints
+    and tasks. Tasks run first, so leaderboards are filled for endpoints.
+    Returns report with dataset sizes, task and endpoint results
+    """
+    found = subjects()
+    if found is None:
+        raise ValueError('Database has no rated messages to request')
+    user, room, topic, message, rating = found
+    requests = endpoints(user, password, room, topic, message, rating)
+    async_requests = async_endpoints(room, topic)
+    task_list = TASKS
+    if names:
+        requests = {name: request for name, request in requests.items() if name in names}
+        async_requests = {name: request for name, request in async_requests.items() if name in names}
+        task_list = [task for task in TASKS if task.name in names]
+    report = {'dataset': {model._meta.model_name: model.objects.count()
+                          for model in (User, Topic, Room, Message, MessageRating)},
+              'repeat': repeat,
+              'tasks': measure_tasks(task_list, task_repeat)}
+    # requests are served like in production, test client asks for testserver host
+    with override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        report['endpoints'] = {**measure(user, requests, repeat, warmup),
+                               **measure(user, async_requests, repeat, warmup, count_queries=False)}
+    return report
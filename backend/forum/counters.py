@@ -0,0 +1,73 @@
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .leaderboards import rating_deltas
+from .models import Topic, Room, Message, MessageRating
+
+RECOUNT_CHUNK_SIZE = 10000
+
+# (model, counter field, counted model, field of counted model referencing model, condition)
+COUNTERS = (
+    (Message, 'likes_count', MessageRating, 'message', Q(value=MessageRating.LIKE)),
+    (Message, 'dislikes_count', MessageRating, 'message', Q(value=MessageRating.DISLIKE)),
+    (Room, 'message_count', Message, 'room', Q()),
+    (Room, 'participant_count', Room.participants.through, 'room', Q()),
+    (Topic, 'room_count', Room, 'topic', Q()),
+)
+
+
+def change_rating(message_id, old_value, new_value):
+    """
+    Move message like and dislike counters for rating changed from old_value to new_value
+    """
+    likes, dislikes = rating_deltas(old_value, new_value)
+    if likes or dislikes:
+        Message.objects.filter(pk=message_id).update(likes_count=F('likes_count') + likes,
+                                                      dislikes_count=F('dislikes_count') + dislikes)
+
+
+def add_messages(room_id, count):
+    Room.objects.filter(pk=room_id).update(message_count=F('message_count') + count)
+
+
+def add_participants(room_id, count):
+    Room.objects.filter(pk=room_id).update(participant_count=F('participant_count') + count)
+
+
+def add_rooms(topic_id, count):
+    if topic_id is not None:
+        Topic.objects.filter(pk=topic_id).update(room_count=F('room_count') + count)
+
+
+def _actual(counted, field, condition):
+    """
+    Get expression counting rows of counted model referencing outer row
+    """
+    rows = (counted.objects.filter(condition, **{field: OuterRef('pk')})
+            .order_by().values(field).annotate(count=Count('*')).values('count'))
+    return Coalesce(Subquery(rows), 0)
+
+
+def recount_participants(room_ids):
+    Room.objects.filter(pk__in=room_ids).update(
+        participant_count=_actual(Room.participants.through, 'room', Q()))
+
+
+def recount(chunk_size=RECOUNT_CHUNK_SIZE):
+    """
+    Recount stored counters in id ranges of chunk_size and fix drifted ones.
+    Returns {'model.counter': count of fixed rows}
+    """
+    fixed = {}
+    for model, counter, counted, field, condition in COUNTERS:
+        actual = _actual(counted, field, condition)
+        name = '{}.{}'.format(model._meta.model_name, counter)
+        fixed[name] = 0
+        bounds = model.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            continue
+        for start in range(bounds['low'], bounds['high'] + 1, chunk_size):
+            drifted = (model.objects.filter(pk__gte=start, pk__lt=start + chunk_size)
+                       .annotate(actual=actual).exclude(**{counter: F('actual')}))
+            fixed[name] += drifted.update(**{counter: actual})
+    return fixed
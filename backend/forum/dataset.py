@@ -0,0 +1,115 @@
+import random
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.db.models import Max
+
+from . import activity, counters, leaderboards, message_search, object_cache, search
+from .models import Topic, Room, Message, MessageRating, User
+from .redis_client import client, run_safely
+
+CHUNK_SIZE = 5000
+# Exponent of zipf distribution of rooms over hosts and topics, messages over rooms and authors,
+# ratings over messages: rank r gets share proportional to 1 / r ** SKEW
+SKEW = 1.1
+LIKE_SHARE = 0.7
+PASSWORD = 'benchmark'
+# Words of message bodies, so message search finds some of them
+WORDS = ('django', 'redis', 'postgres', 'celery', 'docker', 'python', 'nginx', 'index', 'cache', 'query')
+
+
+class Zipf:
+    """
+    Random choice of population items, items are shuffled, so popular ones are not the first created
+    """
+
+    def __init__(self, population, skew, rng):
+        self.population = list(population)
+        rng.shuffle(self.population)
+        self.weights = list(accumulate(1 / rank ** skew for rank in range(1, len(self.population) + 1)))
+        self.rng = rng
+
+    def __call__(self):
+        return self.rng.choices(self.population, cum_weights=self.weights)[0]
+
+
+def _chunks(objects, size):
+    objects = iter(objects)
+    while True:
+        chunk = list(islice(objects, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _insert(model, objects, chunk_size):
+    for chunk in _chunks(objects, chunk_size):
+        model.objects.bulk_create(chunk)
+
+
+def _create(model, objects, chunk_size):
+    """
+    Insert objects with bulk_create in chunks, returns ids of created rows in creation order
+    """
+    last = model.objects.aggregate(last=Max('id'))['last'] or 0
+    _insert(model, objects, chunk_size)
+    return list(model.objects.filter(id__gt=last).order_by('id').values_list('id', flat=True))
+
+
+def generate(users, topics, rooms, messages, ratings, skew=SKEW, chunk_size=CHUNK_SIZE, seed=None,
+             password=PASSWORD):
+    """
+    Add synthetic users, topics, rooms with participants, messages and ratings, few rooms hold most
+    of messages and participants, few messages get most of ratings. Rows are inserted without signals,
+    so counters, search indexes and leaderboards are rebuilt afterwards.
+    Returns {model name: count of created rows}
+    """
+    rng = random.Random(seed)
+    start = (User.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    password = make_password(password)
+    user_ids = _create(User, (User(username='bench{}'.format(i), email='bench{}@example.com'.format(i),
+                                   name='Bench {}'.format(i), password=password)
+                              for i in range(start, start + users)), chunk_size)
+    topic_ids = _create(Topic, (Topic(name='topic {}'.format(i)) for i in range(topics)), chunk_size)
+
+    host, topic = Zipf(user_ids, skew, rng), Zipf(topic_ids, skew, rng)
+    room_rows = [(host(), topic()) for _ in range(rooms)]
+    room_ids = _create(Room, (Room(name='room {}'.format(i), host_id=host_id, topic_id=topic_id,
+                                   description='Synthetic room {}'.format(i))
+                              for i, (host_id, topic_id) in enumerate(room_rows)), chunk_size)
+    room_topics = dict(zip(room_ids, (topic_id for _, topic_id in room_rows)))
+
+    room, author = Zipf(room_ids, skew, rng), Zipf(user_ids, skew, rng)
+    message_rows = [(room(), author()) for _ in range(messages)]
+    message_ids = _create(Message, (Message(body='message {} {}'.format(i, rng.choice(WORDS)), room_id=room_id,
+                                            author_id=author_id)
+                                    for i, (room_id, author_id) in enumerate(message_rows)), chunk_size)
+
+    # hosts and authors of messages participate in rooms
+    participants = set(zip(room_ids, (host_id for host_id, _ in room_rows))) | set(message_rows)
+    Participant = Room.participants.through
+    _insert(Participant, (Participant(room_id=room_id, user_id=user_id) for room_id, user_id in participants),
+            chunk_size)
+
+    rated = Zipf(range(len(message_ids)), skew, rng)
+    pairs = set()
+    for _ in range(min(ratings, len(message_ids) * len(user_ids)) * 2):
+        if len(pairs) == ratings:
+            break
+        pairs.add((rated(), rng.choice(user_ids)))
+
+    def rating(index, user_id):
+        room_id, author_id = message_rows[index]
+        value = MessageRating.LIKE if rng.random() < LIKE_SHARE else MessageRating.DISLIKE
+        return MessageRating(message_id=message_ids[index], user_id=user_id, author_id=author_id, room_id=room_id,
+                             topic_id=room_topics[room_id], value=value)
+    _insert(MessageRating, (rating(index, user_id) for index, user_id in pairs), chunk_size)
+
+    counters.recount()
+    search.rebuild()
+    message_search.rebuild()
+    run_safely(leaderboards.recompute)
+    run_safely(client.delete, activity.GLOBAL_FEED)
+    object_cache.topic_lists.invalidate(object_cache.ALL)
+    return {'users': len(user_ids), 'topics': len(topic_ids), 'rooms': len(room_ids),
+            'participants': len(participants), 'messages': len(message_ids), 'ratings': len(pairs)}
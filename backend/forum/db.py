@@ -0,0 +1,16 @@
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def database_sync_to_async(func):
+    """
+    Run ORM code in thread pool, Django 4.0 has no async queries. Pool threads keep their connections,
+    so connections are closed like at the end of request, when unusable or older than CONN_MAX_AGE
+    """
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
@@ -0,0 +1,73 @@
+import csv
+import datetime
+import json
+
+from .models import Message, MessageRating
+
+# Rows fetched from database cursor at once, memory of export does not depend on its size
+CHUNK_SIZE = 2000
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+CONTENT_TYPES = {NDJSON: 'application/x-ndjson', CSV: 'text/csv'}
+
+MESSAGE_FIELDS = ('id', 'room_id', 'author_id', 'body', 'likes_count', 'dislikes_count', 'created', 'updated')
+RATING_FIELDS = ('id', 'message_id', 'user_id', 'author_id', 'room_id', 'topic_id', 'value')
+
+
+def _default(value):
+    # isoformat keeps microseconds, so export can be continued from the last timestamp
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+
+def rows(queryset, fields, since_id=None, chunk_size=CHUNK_SIZE):
+    """
+    Iterate value tuples of fields in id order, starting after since_id
+    """
+    if since_id is not None:
+        queryset = queryset.filter(id__gt=since_id)
+    return queryset.order_by('id').values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def message_rows(since_id=None, since=None):
+    """
+    Iterate exported messages created after since_id and changed after since
+    """
+    messages = Message.objects.all()
+    if since is not None:
+        messages = messages.filter(updated__gt=since)
+    return rows(messages, MESSAGE_FIELDS, since_id)
+
+
+def rating_rows(since_id=None):
+    return rows(MessageRating.objects.all(), RATING_FIELDS, since_id)
+
+
+def ndjson_lines(fields, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), default=_default) + '\n'
+
+
+class _Echo:
+    """
+    File-like object handing written csv line back to caller
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(fields, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def lines(output, fields, rows):
+    """
+    Encode rows as lines of output format
+    """
+    return csv_lines(fields, rows) if output == CSV else ndjson_lines(fields, rows)
@@ -0,0 +1,449 @@
+import asyncio
+import fnmatch
+import math
+import queue
+import threading
+import time
+
+from redis.exceptions import ResponseError
+
+
+def _encode(value):
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).encode()
+
+
+def _range(length, start, end):
+    """
+    Get python slice bounds of redis inclusive range, negative indexes count from the end
+    """
+    if start < 0:
+        start = max(length + start, 0)
+    if end < 0:
+        end = length + end
+    if end < 0:
+        return 0, 0
+    return start, min(end, length - 1) + 1
+
+
+class FakeRedis:
+    """
+    In-process stand-in for redis.Redis with commands used by forum: strings, lists, sorted sets,
+    expiry, pipelines and pub/sub. Values are returned as bytes like from real client.
+    Used by tests and development without redis server, data is not shared between processes
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._subscribers = {}
+        self._lock = threading.RLock()
+
+    # keys
+
+    def _alive(self, key):
+        key = _encode(key)
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key
+
+    def _get(self, key, kind, default=None):
+        key = self._alive(key)
+        value = self._data.get(key)
+        if value is None:
+            return default
+        if not isinstance(value, kind):
+            raise ResponseError('WRONGTYPE Operation against a key holding the wrong kind of value')
+        return value
+
+    def _get_or_create(self, key, kind):
+        with self._lock:
+            value = self._get(key, kind)
+            if value is None:
+                value = self._data[_encode(key)] = kind()
+            return value
+
+    def _set(self, key, value):
+        key = _encode(key)
+        self._data[key] = value
+        self._expires.pop(key, None)
+
+    def _drop_empty(self, key):
+        key = _encode(key)
+        if not self._data.get(key):
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    def ping(self):
+        return True
+
+    def flushall(self):
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+        return True
+
+    def exists(self, *keys):
+        with self._lock:
+            return sum(self._alive(key) in self._data for key in keys)
+
+    def delete(self, *keys):
+        with self._lock:
+            deleted = 0
+            for key in keys:
+                key = self._alive(key)
+                if key in self._data:
+                    del self._data[key]
+                    self._expires.pop(key, None)
+                    deleted += 1
+            return deleted
+
+    def expire(self, key, seconds):
+        with self._lock:
+            key = self._alive(key)
+            if key not in self._data:
+                return False
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def ttl(self, key):
+        with self._lock:
+            key = self._alive(key)
+            if key not in self._data:
+                return -2
+            if key not in self._expires:
+                return -1
+            return math.ceil(self._expires[key] - time.monotonic())
+
+    def rename(self, src, dst):
+        with self._lock:
+            src = self._alive(src)
+            if src not in self._data:
+                raise ResponseError('no such key')
+            self._data[_encode(dst)] = self._data.pop(src)
+            expires = self._expires.pop(src, None)
+            if expires is None:
+                self._expires.pop(_encode(dst), None)
+            else:
+                self._expires[_encode(dst)] = expires
+            return True
+
+    def scan_iter(self, match=None, count=None):
+        with self._lock:
+            keys = [self._alive(key) for key in list(self._data)]
+            keys = [key for key in keys if key in self._data]
+        for key in keys:
+            if match is None or fnmatch.fnmatchcase(key.decode(), match):
+                yield key
+
+    # strings
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key, bytes)
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._set(key, _encode(value))
+            if ex is not None:
+                self._expires[_encode(key)] = time.monotonic() + ex
+            return True
+
+    def mget(self, keys, *args):
+        keys = [keys, *args] if isinstance(keys, (str, bytes)) else [*keys, *args]
+        with self._lock:
+            return [self._get(key, bytes) for key in keys]
+
+    # lists
+
+    def lpush(self, key, *values):
+        with self._lock:
+            items = self._get_or_create(key, list)
+            for value in values:
+                items.insert(0, _encode(value))
+            return len(items)
+
+    def lpushx(self, key, *values):
+        with self._lock:
+            if self._get(key, list) is None:
+                return 0
+            return self.lpush(key, *values)
+
+    def rpush(self, key, *values):
+        with self._lock:
+            items = self._get_or_create(key, list)
+            items.extend(_encode(value) for value in values)
+            return len(items)
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            items = self._get(key, list, [])
+            start, stop = _range(len(items), start, end)
+            return items[start:stop]
+
+    def ltrim(self, key, start, end):
+        with self._lock:
+            items = self._get(key, list, [])
+            start, stop = _range(len(items), start, end)
+            items[:] = items[start:stop]
+            self._drop_empty(key)
+            return True
+
+    def lset(self, key, index, value):
+        with self._lock:
+            items = self._get(key, list)
+            if items is None or not -len(items) <= index < len(items):
+                raise ResponseError('index out of range')
+            items[index] = _encode(value)
+            return True
+
+    def lrem(self, key, count, value):
+        with self._lock:
+            items = self._get(key, list, [])
+            value = _encode(value)
+            positions = [index for index, item in enumerate(items) if item == value]
+            if count < 0:
+                positions = positions[::-1]
+            if count:
+                positions = positions[:abs(count)]
+            for index in sorted(positions, reverse=True):
+                del items[index]
+            self._drop_empty(key)
+            return len(positions)
+
+    # sorted sets
+
+    def zadd(self, name, mapping):
+        with self._lock:
+            scores = self._get_or_create(name, dict)
+            added = sum(_encode(member) not in scores for member in mapping)
+            scores.update((_encode(member), float(score)) for member, score in mapping.items())
+            return added
+
+    def zincrby(self, name, amount, value):
+        with self._lock:
+            scores = self._get_or_create(name, dict)
+            member = _encode(value)
+            scores[member] = scores.get(member, 0.0) + float(amount)
+            return scores[member]
+
+    def zrem(self, name, *values):
+        with self._lock:
+            scores = self._get(name, dict, {})
+            removed = sum(scores.pop(_encode(value), None) is not None for value in values)
+            self._drop_empty(name)
+            return removed
+
+    def zcard(self, name):
+        with self._lock:
+            return len(self._get(name, dict, {}))
+
+    def zscore(self, name, value):
+        with self._lock:
+            return self._get(name, dict, {}).get(_encode(value))
+
+    def _descending(self, name):
+        scores = self._get(name, dict, {})
+        return sorted(scores.items(), key=lambda entry: (entry[1], entry[0]), reverse=True)
+
+    def zrevrank(self, name, value):
+        with self._lock:
+            member = _encode(value)
+            for index, (entry, _) in enumerate(self._descending(name)):
+                if entry == member:
+                    return index
+            return None
+
+    def zrevrange(self, name, start, end, withscores=False):
+        with self._lock:
+            entries = self._descending(name)
+            start, stop = _range(len(entries), start, end)
+            entries = entries[start:stop]
+            return entries if withscores else [member for member, _ in entries]
+
+    def zrevrangebyscore(self, name, max, min, start=None, num=None, withscores=False):
+        def bound(value):
+            value = value.decode() if isinstance(value, bytes) else str(value)
+            return (value[1:], True) if value.startswith('(') else (value, False)
+
+        (high, high_open), (low, low_open) = bound(max), bound(min)
+        high, low = float(high), float(low)
+        with self._lock:
+            entries = [(member, score) for member, score in self._descending(name)
+                       if (score < high if high_open else score <= high) and (score > low if low_open else score >= low)]
+        if start is not None:
+            entries = entries[start:start + num if num is not None and num >= 0 else None]
+        return entries if withscores else [member for member, _ in entries]
+
+    def zunionstore(self, dest, keys, aggregate=None):
+        weights = keys if isinstance(keys, dict) else dict.fromkeys(keys, 1)
+        with self._lock:
+            union = {}
+            for key, weight in weights.items():
+                for member, score in self._get(key, dict, {}).items():
+                    union[member] = union.get(member, 0.0) + score * weight
+            self.delete(dest)
+            if union:
+                self._set(dest, union)
+            return len(union)
+
+    # pub/sub
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(_encode(channel), ()))
+        for subscriber in subscribers:
+            subscriber.deliver(_encode(channel), _encode(message))
+        return len(subscribers)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self, ignore_subscribe_messages)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """
+    Queues commands and runs them on execute, under one lock, so transaction is atomic
+    """
+
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    def __len__(self):
+        return len(self._commands)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.reset()
+
+    def __getattr__(self, name):
+        command = getattr(self._redis, name)
+
+        def queue_command(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+        return queue_command
+
+    def reset(self):
+        self._commands = []
+
+    def execute(self):
+        with self._redis._lock:
+            try:
+                return [command(*args, **kwargs) for command, args, kwargs in self._commands]
+            finally:
+                self.reset()
+
+
+class FakePubSub:
+
+    def __init__(self, redis, ignore_subscribe_messages):
+        self._redis = redis
+        self._ignore_subscribe_messages = ignore_subscribe_messages
+        self._messages = queue.Queue()
+        self.channels = set()
+
+    def deliver(self, channel, data):
+        self._messages.put({'type': 'message', 'pattern': None, 'channel': channel, 'data': data})
+
+    def subscribe(self, *channels):
+        with self._redis._lock:
+            for channel in channels:
+                channel = _encode(channel)
+                self._redis._subscribers.setdefault(channel, set()).add(self)
+                self.channels.add(channel)
+                if not self._ignore_subscribe_messages:
+                    self._messages.put({'type': 'subscribe', 'pattern': None, 'channel': channel,
+                                        'data': len(self.channels)})
+
+    def unsubscribe(self, *channels):
+        with self._redis._lock:
+            for channel in [_encode(channel) for channel in channels] or list(self.channels):
+                self._redis._subscribers.get(channel, set()).discard(self)
+                self.channels.discard(channel)
+
+    def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return self._messages.get(timeout=timeout) if timeout else self._messages.get_nowait()
+        except queue.Empty:
+            return None
+
+    def listen(self):
+        while self.channels:
+            yield self._messages.get()
+
+    def close(self):
+        self.unsubscribe()
+
+    reset = close
+
+
+class AsyncFakeRedis:
+    """
+    Asyncio interface of FakeRedis in the shape of redis.asyncio.Redis, commands run immediately
+    """
+
+    def __init__(self, redis):
+        self._redis = redis
+
+    def __getattr__(self, name):
+        command = getattr(self._redis, name)
+
+        async def run_command(*args, **kwargs):
+            return command(*args, **kwargs)
+        return run_command
+
+    def pipeline(self, transaction=True):
+        return AsyncFakePipeline(self._redis)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return AsyncFakePubSub(self._redis.pubsub(ignore_subscribe_messages))
+
+    async def close(self):
+        pass
+
+
+class AsyncFakePipeline(FakePipeline):
+
+    async def execute(self):
+        return super().execute()
+
+
+class AsyncFakePubSub:
+
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    async def subscribe(self, *channels):
+        self._pubsub.subscribe(*channels)
+
+    async def unsubscribe(self, *channels):
+        self._pubsub.unsubscribe(*channels)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        message = self._pubsub.get_message()
+        if message is None and timeout:
+            await asyncio.sleep(min(timeout, 0.05))
+            message = self._pubsub.get_message()
+        return message
+
+    async def listen(self):
+        while self._pubsub.channels:
+            message = await self.get_message(timeout=1.0)
+            if message is not None:
+                yield message
+
+    async def close(self):
+        self._pubsub.close()
+
+    reset = close
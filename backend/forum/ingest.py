@@ -0,0 +1,125 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from . import activity, counters, leaderboards, membership, message_search, push, trending
+from .leaderboards import rating_deltas
+from .models import Room, Message, MessageRating
+from .ratings import NO_TOPIC, write_ratings
+
+# Items accepted in one request
+MAX_ITEMS = 1000
+
+# Rows written by one INSERT
+BATCH_SIZE = 500
+
+
+def create_messages(author, items):
+    """
+    Create messages from valid {'room': id, 'body': text} items with bulk inserts,
+    author joins rooms on first participation, counters and trending are updated once per batch.
+    Returns list of created message or error per item
+    """
+    rooms = Room.objects.only('id', 'name').in_bulk({item['room'] for item in items})
+    results = [None] * len(items)
+    messages = []
+    for index, item in enumerate(items):
+        if item['room'] in rooms:
+            message = Message(body=item['body'], author=author, room=rooms[item['room']])
+            messages.append(message)
+            results[index] = message
+        else:
+            results[index] = {'room': ['Room does not exist.']}
+    if not messages:
+        return results
+
+    per_room = Counter(message.room_id for message in messages)
+    with transaction.atomic():
+        Message.objects.bulk_create(messages, batch_size=BATCH_SIZE)
+        message_search.index_messages(messages, created=True)
+        # join table is written only for rooms author is not known to participate in
+        joined = set(per_room) - membership.joined_rooms(author.pk, per_room)
+        if joined:
+            Participant = Room.participants.through
+            Participant.objects.bulk_create([Participant(room_id=room_id, user_id=author.pk) for room_id in joined],
+                                            ignore_conflicts=True)
+            counters.recount_participants(joined)
+            membership.on_join((room_id, author.pk) for room_id in joined)
+        for room_id, count in per_room.items():
+            counters.add_messages(room_id, count)
+        trending.on_events([(trending.ROOMS, room_id, count) for room_id, count in per_room.items()])
+        activity.on_create(messages)
+        push.on_create(messages)
+    return results
+
+
+def rate_messages(user, items):
+    """
+    Set ratings of user from valid {'message': id, 'value': value} items, the last item of message wins.
+    Ratings are inserted and updated in bulk, counters and leaderboards are updated once per batch.
+    Returns list of ('created' | 'updated' | 'unchanged' | 'superseded', rating value) or error per item
+    """
+    rows = (Message.objects.filter(id__in={item['message'] for item in items})
+            .values_list('id', 'author_id', 'room_id', 'room__topic_id'))
+    messages = {pk: (author_id, room_id, topic_id) for pk, author_id, room_id, topic_id in rows}
+    values = {}
+    results = [None] * len(items)
+    for index, item in enumerate(items):
+        if item['message'] not in messages:
+            results[index] = {'message': ['Message does not exist.']}
+        elif messages[item['message']][2] is None:
+            results[index] = {'message': [NO_TOPIC]}
+        else:
+            values[item['message']] = item['value']
+
+    statuses = write_ratings(user, lambda creating: _set_ratings(user, messages, values, creating)) if values else {}
+
+    for index, item in enumerate(items):
+        if results[index] is None:
+            message_id = item['message']
+            status = statuses[message_id] if item['value'] == values[message_id] else 'superseded'
+            results[index] = (status, item['value'])
+    return results
+
+
+def _set_ratings(user, messages, values, creating):
+    existing = dict(MessageRating.objects.select_for_update()
+                    .filter(user=user, message_id__in=values).values_list('message_id', 'value'))
+    statuses = {}
+    created = []
+    updated = defaultdict(list)
+    for message_id, value in values.items():
+        old_value = existing.get(message_id)
+        if old_value is None:
+            author_id, room_id, topic_id = messages[message_id]
+            created.append(MessageRating(message_id=message_id, author_id=author_id, room_id=room_id,
+                                         topic_id=topic_id, user=user, value=value))
+            statuses[message_id] = 'created'
+            creating.add(message_id)
+        elif old_value != value:
+            updated[value].append(message_id)
+            statuses[message_id] = 'updated'
+        else:
+            statuses[message_id] = 'unchanged'
+
+    MessageRating.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    for value, message_ids in updated.items():
+        MessageRating.objects.filter(user=user, message_id__in=message_ids).update(value=value)
+
+    changes = [(message_id, *messages[message_id], existing.get(message_id), values[message_id])
+               for message_id, status in statuses.items() if status != 'unchanged']
+    by_delta = defaultdict(list)
+    for message_id, _, _, _, old_value, new_value in changes:
+        by_delta[rating_deltas(old_value, new_value)].append(message_id)
+    for (likes, dislikes), message_ids in by_delta.items():
+        Message.objects.filter(id__in=message_ids).update(likes_count=F('likes_count') + likes,
+                                                           dislikes_count=F('dislikes_count') + dislikes)
+
+    leaderboards.on_rating_changes(changes)
+    push.on_ratings([(message_id, room_id, old_value, new_value)
+                     for message_id, _, room_id, _, old_value, new_value in changes])
+    rooms = Counter(room_id for _, _, room_id, _, _, _ in changes)
+    trending.on_events([(trending.MESSAGES, message_id, 1) for message_id, *_ in changes] +
+                       [(trending.ROOMS, room_id, count) for room_id, count in rooms.items()])
+    return statuses
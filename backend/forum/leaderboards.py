@@ -0,0 +1,289 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+
+from .db import database_sync_to_async
+from .models import Message, MessageRating, User
+from .redis_client import client, get_async_client, run_safely
+
+BEST_MESSAGES = 'leaderboard:best_messages'
+WORST_MESSAGES = 'leaderboard:worst_messages'
+USERS_SCORING = 'leaderboard:users_scoring'
+LEADERBOARDS = (BEST_MESSAGES, WORST_MESSAGES, USERS_SCORING)
+
+ROOM = 'room'
+TOPIC = 'topic'
+
+RECOMPUTE_CHUNK_SIZE = 10000
+
+LIKE_POINTS = 2
+DISLIKE_POINTS = 3
+
+
+def rating_deltas(old_value, new_value):
+    """
+    Get (likes, dislikes) deltas of rating changed from old_value to new_value,
+    None means that rating doesn't exist
+    """
+    likes = (new_value == MessageRating.LIKE) - (old_value == MessageRating.LIKE)
+    dislikes = (new_value == MessageRating.DISLIKE) - (old_value == MessageRating.DISLIKE)
+    return likes, dislikes
+
+
+def score(likes, dislikes):
+    """
+    User score calculated by formula
+    likes_count * 2 - dislike_count * 3
+    """
+    return likes * LIKE_POINTS - dislikes * DISLIKE_POINTS
+
+
+def scoped_key(key, scope, pk):
+    """
+    Get key of leaderboard limited to one room or topic
+    """
+    return '{}:{}:{}'.format(key, scope, pk)
+
+
+def _keys(key, room_id, topic_id):
+    """
+    Get keys of global, room and topic leaderboards rating counts in
+    """
+    return key, scoped_key(key, ROOM, room_id), scoped_key(key, TOPIC, topic_id)
+
+
+def apply_rating_change(message_id, author_id, room_id, topic_id, old_value, new_value):
+    """
+    Apply rating change to sorted sets, O(log n) for every leaderboard
+    """
+    apply_rating_changes([(message_id, author_id, room_id, topic_id, old_value, new_value)])
+
+
+def apply_rating_changes(changes):
+    """
+    Apply (message id, author id, room id, topic id, old value, new value) rating changes in one pipeline
+    """
+    pipe = client.pipeline()
+    for message_id, author_id, room_id, topic_id, old_value, new_value in changes:
+        likes, dislikes = rating_deltas(old_value, new_value)
+        if not likes and not dislikes:
+            continue
+        if likes:
+            for key in _keys(BEST_MESSAGES, room_id, topic_id):
+                pipe.zincrby(key, likes, message_id)
+        if dislikes:
+            for key in _keys(WORST_MESSAGES, room_id, topic_id):
+                pipe.zincrby(key, dislikes, message_id)
+        for key in _keys(USERS_SCORING, room_id, topic_id):
+            pipe.zincrby(key, score(likes, dislikes), author_id)
+    if len(pipe):
+        pipe.execute()
+
+
+def forget_message(message_id, room_id, topic_ids):
+    """
+    Remove deleted message from global, room and topic message leaderboards, topic_ids are topics
+    its ratings were counted in
+    """
+    pipe = client.pipeline()
+    for key in (BEST_MESSAGES, WORST_MESSAGES):
+        pipe.zrem(key, message_id)
+        pipe.zrem(scoped_key(key, ROOM, room_id), message_id)
+        for topic_id in topic_ids:
+            pipe.zrem(scoped_key(key, TOPIC, topic_id), message_id)
+    pipe.execute()
+
+
+def forget_scope(scope, pk):
+    """
+    Remove leaderboards of deleted room or topic
+    """
+    client.delete(*(scoped_key(key, scope, pk) for key in LEADERBOARDS))
+
+
+def on_rating_change(message_id, author_id, room_id, topic_id, old_value, new_value):
+    """
+    Apply rating change to leaderboards after transaction commit
+    """
+    transaction.on_commit(lambda: run_safely(apply_rating_change, message_id, author_id, room_id, topic_id,
+                                             old_value, new_value))
+
+
+def on_rating_changes(changes):
+    """
+    Apply batch of rating changes to leaderboards after transaction commit
+    """
+    transaction.on_commit(lambda: run_safely(apply_rating_changes, changes))
+
+
+def on_message_delete(message_id, room_id, topic_ids):
+    """
+    Remove message from leaderboards after transaction commit
+    """
+    transaction.on_commit(lambda: run_safely(forget_message, message_id, room_id, topic_ids))
+
+
+def on_scope_delete(scope, pk):
+    """
+    Remove room or topic leaderboards after transaction commit
+    """
+    transaction.on_commit(lambda: run_safely(forget_scope, scope, pk))
+
+
+def _aggregate(start, stop):
+    """
+    Get (message id, author id, room id, topic id, likes, dislikes) rows for messages with ids in [start, stop)
+    """
+    return (MessageRating.objects.order_by()
+            .filter(message_id__gte=start, message_id__lt=stop)
+            .values_list('message_id', 'author_id', 'room_id', 'topic_id')
+            .annotate(likes=Count('id', filter=Q(value=MessageRating.LIKE)),
+                      dislikes=Count('id', filter=Q(value=MessageRating.DISLIKE)))
+            .iterator(chunk_size=RECOMPUTE_CHUNK_SIZE))
+
+
+def _scoped_keys():
+    """
+    Get keys of existing room and topic leaderboards
+    """
+    for scope in (ROOM, TOPIC):
+        for key in client.scan_iter(match='leaderboard:*:{}:*'.format(scope)):
+            key = key.decode()
+            if not key.endswith(':rebuild'):
+                yield key
+
+
+def recompute(chunk_size=RECOMPUTE_CHUNK_SIZE):
+    """
+    Rebuild global, room and topic leaderboards from one grouped aggregation over ratings.
+    Ratings are read in message id ranges of chunk_size, so only one range is kept in memory,
+    leaderboards are published together in one transaction
+    """
+    built = set()
+
+    bounds = MessageRating.objects.aggregate(low=Min('message_id'), high=Max('message_id'))
+    if bounds['low'] is not None:
+        for start in range(bounds['low'], bounds['high'] + 1, chunk_size):
+            messages = defaultdict(lambda: defaultdict(int))
+            users = defaultdict(lambda: defaultdict(int))
+            for message_id, author_id, room_id, topic_id, likes, dislikes in _aggregate(start, start + chunk_size):
+                for key in _keys(BEST_MESSAGES, room_id, topic_id):
+                    messages[key][message_id] += likes
+                for key in _keys(WORST_MESSAGES, room_id, topic_id):
+                    messages[key][message_id] += dislikes
+                for key in _keys(USERS_SCORING, room_id, topic_id):
+                    users[key][author_id] += score(likes, dislikes)
+
+            pipe = client.pipeline(transaction=False)
+            for key, scores in messages.items():
+                if key not in built:
+                    pipe.delete(key + ':rebuild')
+                pipe.zadd(key + ':rebuild', scores)
+            for key, scores in users.items():
+                if key not in built:
+                    pipe.delete(key + ':rebuild')
+                for author_id, points in scores.items():
+                    pipe.zincrby(key + ':rebuild', points, author_id)
+            pipe.execute()
+            built.update(messages, users)
+
+    stale = [key for key in _scoped_keys() if key not in built]
+    pipe = client.pipeline(transaction=True)
+    for key in built:
+        pipe.rename(key + ':rebuild', key)
+    for key in set(LEADERBOARDS).difference(built).union(stale):
+        pipe.delete(key)
+    pipe.execute()
+
+
+class Leaderboard:
+    """
+    Read-only sequence over sorted set ordered by score, so it can be paginated
+    like a queryset: slicing reads only requested ranks, O(log n + limit)
+    """
+
+    def __init__(self, key):
+        self.key = key
+
+    def __len__(self):
+        return client.zcard(self.key)
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            raise TypeError('Leaderboard supports only slicing')
+        start = item.start or 0
+        stop = -1 if item.stop is None else item.stop - 1
+        if stop < start and stop != -1:
+            return []
+        entries = client.zrevrange(self.key, start, stop, withscores=True)
+        return self._with_details([(start + index + 1, int(member), value)
+                                   for index, (member, value) in enumerate(entries)])
+
+    def rank(self, pk):
+        """
+        Get entry of member with its rank starting from 1, None if member is not on leaderboard
+        """
+        pipe = client.pipeline(transaction=False)
+        pipe.zrevrank(self.key, pk)
+        pipe.zscore(self.key, pk)
+        index, value = pipe.execute()
+        if index is None:
+            return None
+        entries = self._with_details([(index + 1, int(pk), value)])
+        return entries[0] if entries else None
+
+    async def get_key(self):
+        """
+        Get key of sorted set read by aslice. Leaderboards building their key on read override it
+        with async client calls, sync key property is used by sync reads
+        """
+        return self.key
+
+    async def aslice(self, start, stop):
+        """
+        Get (member count, entries ranked start to stop - 1) with async client in one round trip,
+        for async views
+        """
+        key = await self.get_key()
+        pipe = get_async_client().pipeline(transaction=False)
+        pipe.zcard(key)
+        pipe.zrevrange(key, start, stop - 1, withscores=True)
+        count, entries = await pipe.execute()
+        if not entries:
+            return count, []
+        return count, await database_sync_to_async(self._with_details)(
+            [(start + index + 1, int(member), value) for index, (member, value) in enumerate(entries)])
+
+    def _with_details(self, entries):
+        details = self.get_details([pk for _, pk, _ in entries])
+        return [{'rank': rank, 'score': self.format_score(value), **details[pk]}
+                for rank, pk, value in entries if pk in details]
+
+    def format_score(self, value):
+        return int(value)
+
+    def get_details(self, ids):
+        """
+        Get {id: display fields} for members in one query
+        """
+        raise NotImplementedError
+
+
+class MessageLeaderboard(Leaderboard):
+
+    def get_details(self, ids):
+        messages = Message.objects.filter(id__in=ids).values_list('id', 'body', 'author__username', 'room__name')
+        return {pk: {'id': pk, 'body': body, 'author': author, 'room': room} for pk, body, author, room in messages}
+
+
+class UserLeaderboard(Leaderboard):
+
+    def get_details(self, ids):
+        users = User.objects.filter(id__in=ids).values('id', 'username', 'name')
+        return {user['id']: user for user in users}
+
+
+best_messages = MessageLeaderboard(BEST_MESSAGES)
+worst_messages = MessageLeaderboard(WORST_MESSAGES)
+users_scoring = UserLeaderboard(USERS_SCORING)
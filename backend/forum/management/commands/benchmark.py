@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from forum import benchmark, dataset
+
+
+class Command(BaseCommand):
+    help = 'Measure latency percentiles and query counts of every endpoint and leaderboard task, as json'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=benchmark.REPEAT, help='Measured requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=benchmark.WARMUP, help='Requests made before measuring')
+        parser.add_argument('--task-repeat', type=int, default=benchmark.TASK_REPEAT)
+        parser.add_argument('--only', nargs='*', help='Url names or task names to measure')
+        parser.add_argument('--password', default=dataset.PASSWORD, help='Password of benchmarked user')
+        parser.add_argument('--label', default='', help='Label of report, e.g. commit id')
+        parser.add_argument('--output', help='File for report instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            report = benchmark.run(options['password'], repeat=options['repeat'], warmup=options['warmup'],
+                                   task_repeat=options['task_repeat'], names=options['only'])
+        except ValueError as exc:
+            raise CommandError('{}, run generate_dataset first'.format(exc))
+        report = json.dumps({'label': options['label'], **report}, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(report + '\n')
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from forum import dataset
+
+
+class Command(BaseCommand):
+    help = 'Add synthetic users, topics, rooms, messages and ratings with skewed distributions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--topics', type=int, default=20)
+        parser.add_argument('--rooms', type=int, default=500)
+        parser.add_argument('--messages', type=int, default=50000)
+        parser.add_argument('--ratings', type=int, default=200000)
+        parser.add_argument('--skew', type=float, default=dataset.SKEW,
+                            help='Zipf exponent, 0 spreads rows evenly')
+        parser.add_argument('--chunk-size', type=int, default=dataset.CHUNK_SIZE,
+                            help='Rows inserted by one bulk_create')
+        parser.add_argument('--seed', type=int, default=None, help='Seed of random choices')
+        parser.add_argument('--password', default=dataset.PASSWORD, help='Password of generated users')
+
+    def handle(self, *args, **options):
+        created = dataset.generate(options['users'], options['topics'], options['rooms'], options['messages'],
+                                   options['ratings'], skew=options['skew'], chunk_size=options['chunk_size'],
+                                   seed=options['seed'], password=options['password'])
+        for name, count in created.items():
+            self.stdout.write('{}: {} created'.format(name, count))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from forum import message_search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild message search index in chunks of message ids indexed in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=message_search.REBUILD_CHUNK_SIZE,
+                            help='Messages indexed by one job')
+        # sqlite allows one writer, parallel jobs fail with "database is locked"
+        parser.add_argument('--workers', type=int, default=1 if connection.vendor == 'sqlite' else 4,
+                            help='Jobs run in parallel, each with own database connection')
+
+    def handle(self, *args, **options):
+        chunks = message_search.rebuild(chunk_size=options['chunk_size'], workers=options['workers'])
+        self.stdout.write('{} chunks indexed'.format(chunks))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from forum import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild room search index from all rooms'
+
+    def handle(self, *args, **options):
+        search.rebuild()
+        self.stdout.write('Room search index rebuilt')
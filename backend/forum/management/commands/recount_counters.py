@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from forum import counters
+
+
+class Command(BaseCommand):
+    help = 'Recount stored message, room and topic counters and fix drifted ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=counters.RECOUNT_CHUNK_SIZE,
+                            help='Rows recounted in one query')
+
+    def handle(self, *args, **options):
+        fixed = counters.recount(chunk_size=options['chunk_size'])
+        for name, count in fixed.items():
+            self.stdout.write('{}: {} fixed'.format(name, count))
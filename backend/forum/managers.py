@@ -53,10 +53,25 @@ class MessageRatingManager(models.Manager):
     def get_queryset(self):
         return MessageRatingQueryset(self.model, using=self._db)
 
+    def _message(self):
+        """
+        Get message if manager is message.messagerating_set
+        """
+        field = getattr(self, 'field', None)
+        if field is not None and field.name == 'message':
+            return self.instance
+        return None
+
     def count_likes(self):
+        message = self._message()
+        if message is not None:
+            return message.likes_count
         return self.get_queryset().get_likes().count()
 
     def count_dislikes(self):
+        message = self._message()
+        if message is not None:
+            return message.dislikes_count
         return self.get_queryset().get_dislikes().count()
 
     def check_user_rate_exist(self, user):
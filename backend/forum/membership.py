@@ -0,0 +1,156 @@
+from collections import defaultdict
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+from .models import Room, User
+from .pagination import decode_cursor, encode_cursor, keyset_page
+from .redis_client import client, pipelined, run_safely
+
+# Seconds participants of room are kept in redis after they were loaded from join table
+TTL = getattr(settings, 'ROOM_MEMBERSHIP_TTL', 24 * 3600)
+
+# Member marking that set holds all participants, user ids start from 1
+LOADED = 0
+
+Participant = Room.participants.through
+
+ORDERING = ('-id',)
+
+
+def key(room_id):
+    """
+    Sorted set of participant ids scored by id, so it is paged in the order of participants api
+    """
+    return 'room:{}:members'.format(room_id)
+
+
+def _participants(room_ids):
+    members = {room_id: {LOADED} for room_id in room_ids}
+    for room_id, user_id in Participant.objects.filter(room_id__in=room_ids).values_list('room_id', 'user_id'):
+        members[room_id].add(user_id)
+    return members
+
+
+def _load(room_ids):
+    """
+    Copy participants of rooms from join table to redis, returns {room id: participant ids}.
+    Participations committed between the read and the write found sets not loaded and were skipped,
+    so join table is read again and sets are corrected
+    """
+    members = _participants(room_ids)
+
+    def queue(pipe, item):
+        room_id, user_ids = item
+        pipe.delete(key(room_id))
+        pipe.zadd(key(room_id), {user_id: user_id for user_id in user_ids})
+        pipe.expire(key(room_id), TTL)
+    pipelined(members.items(), queue, transaction=True)
+
+    current = _participants(room_ids)
+    pipe = client.pipeline(transaction=False)
+    for room_id, user_ids in current.items():
+        joined, left = user_ids - members[room_id], members[room_id] - user_ids
+        if joined:
+            pipe.zadd(key(room_id), {user_id: user_id for user_id in joined})
+        if left:
+            pipe.zrem(key(room_id), *left)
+    if len(pipe):
+        pipe.execute()
+    return current
+
+
+def _ensure_loaded(room_id):
+    if client.zscore(key(room_id), LOADED) is None:
+        _load([room_id])
+
+
+def joined_rooms(user_id, room_ids):
+    """
+    Get ids of rooms among room_ids user participates in, one redis round trip when rooms are cached
+    """
+    room_ids = list(room_ids)
+    try:
+        pipe = client.pipeline(transaction=False)
+        for room_id in room_ids:
+            pipe.zscore(key(room_id), user_id)
+            pipe.zscore(key(room_id), LOADED)
+        scores = pipe.execute()
+        joined = {room_id for room_id, score in zip(room_ids, scores[::2]) if score is not None}
+        missing = [room_id for room_id, loaded in zip(room_ids, scores[1::2]) if loaded is None]
+        if missing:
+            joined.update(room_id for room_id, user_ids in _load(missing).items() if user_id in user_ids)
+        return joined
+    except redis.RedisError:
+        return set(Participant.objects.filter(user_id=user_id, room_id__in=room_ids)
+                   .values_list('room_id', flat=True))
+
+
+def join(room, user):
+    """
+    Add user to participants of room on first participation, join table is not touched
+    for known participants. Returns whether user joined now
+    """
+    if room.pk in joined_rooms(user.pk, [room.pk]):
+        return False
+    room.participants.add(user)
+    return True
+
+
+def add(pairs):
+    """
+    Put (room id, user id) participations to loaded sets, sets which are not loaded are left for the next read
+    """
+    by_room = defaultdict(set)
+    for room_id, user_id in pairs:
+        by_room[room_id].add(user_id)
+    pipe = client.pipeline(transaction=False)
+    for room_id in by_room:
+        pipe.zscore(key(room_id), LOADED)
+    loaded = pipe.execute()
+    pipe = client.pipeline(transaction=False)
+    for (room_id, user_ids), marker in zip(by_room.items(), loaded):
+        if marker is not None:
+            pipe.zadd(key(room_id), {user_id: user_id for user_id in user_ids})
+    if len(pipe):
+        pipe.execute()
+
+
+def on_join(pairs):
+    """
+    Add (room id, user id) participations after commit
+    """
+    pairs = list(pairs)
+    if pairs:
+        transaction.on_commit(lambda: run_safely(add, pairs))
+
+
+def forget(room_ids):
+    """
+    Drop cached participants of rooms now and after commit, they are loaded again on the next read
+    """
+    keys = [key(room_id) for room_id in room_ids]
+    if keys:
+        run_safely(client.delete, *keys)
+        transaction.on_commit(lambda: run_safely(client.delete, *keys))
+
+
+def page(room_id, size, cursor=None):
+    """
+    Get size participants of room in descending id order following cursor and cursor of the next page or None,
+    cursors are the same as of keyset pagination by -id
+    """
+    before = decode_cursor(cursor, User, ORDERING)[0] if cursor else None
+    try:
+        _ensure_loaded(room_id)
+        ids = [int(member) for member in client.zrevrangebyscore(
+            key(room_id), '({}'.format(before) if before is not None else '+inf', '({}'.format(LOADED),
+            start=0, num=size + 1)]
+    except redis.RedisError:
+        return keyset_page(User.objects.filter(participants=room_id), ORDERING, size, cursor)
+    users = User.objects.in_bulk(ids[:size])
+    rows = [users[pk] for pk in ids[:size] if pk in users]
+    if len(ids) <= size or not rows:
+        return rows, None
+    return rows, encode_cursor([rows[-1].id])
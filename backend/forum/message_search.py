@@ -0,0 +1,88 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.db.models import Max, Min
+
+from .models import Message, MessageToken
+
+# Messages tokenized by one rebuild job
+REBUILD_CHUNK_SIZE = 5000
+
+# Postings written by one INSERT
+BATCH_SIZE = 1000
+
+
+def tokens(text):
+    """
+    Get unique lowercase words of text, words longer than token column are skipped
+    """
+    return {word for word in re.findall(r'\w+', text.lower()) if len(word) <= MessageToken.MAX_LENGTH}
+
+
+def _postings(rows):
+    return [MessageToken(token=token, message_id=pk) for pk, body in rows for token in tokens(body)]
+
+
+def index_messages(messages, created=False):
+    """
+    Replace postings of messages with tokens of their current bodies,
+    created messages have no postings yet
+    """
+    messages = list(messages)
+    if not created:
+        MessageToken.objects.filter(message__in=messages).delete()
+    MessageToken.objects.bulk_create(_postings((message.pk, message.body) for message in messages),
+                                     batch_size=BATCH_SIZE)
+
+
+def _index_range(start, stop):
+    rows = Message.objects.filter(id__gte=start, id__lt=stop).values_list('id', 'body')
+    with transaction.atomic():
+        MessageToken.objects.filter(message_id__gte=start, message_id__lt=stop).delete()
+        MessageToken.objects.bulk_create(_postings(rows), batch_size=BATCH_SIZE)
+
+
+def _index_range_in_thread(start, stop):
+    try:
+        _index_range(start, stop)
+    finally:
+        connection.close()
+
+
+def rebuild(chunk_size=REBUILD_CHUNK_SIZE, workers=1):
+    """
+    Rebuild index in chunks of message id range, chunks are indexed by workers threads
+    with own database connections. Returns number of indexed chunks
+    """
+    bounds = Message.objects.aggregate(start=Min('id'), stop=Max('id'))
+    if bounds['start'] is None:
+        return 0
+    ranges = [(start, start + chunk_size) for start in range(bounds['start'], bounds['stop'] + 1, chunk_size)]
+    if workers == 1:
+        for start, stop in ranges:
+            _index_range(start, stop)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda bounds: _index_range_in_thread(*bounds), ranges))
+    return len(ranges)
+
+
+def search(query, room=None, topic=None, author=None):
+    """
+    Get messages containing every word of query, filtered by room, topic and author ids.
+    Every word narrows messages down to its posting list
+    """
+    words = set(re.findall(r'\w+', query.lower()))
+    if not words or any(len(word) > MessageToken.MAX_LENGTH for word in words):
+        return Message.objects.none()
+    messages = Message.objects.all()
+    for word in words:
+        messages = messages.filter(id__in=MessageToken.objects.filter(token=word).values('message_id'))
+    if room is not None:
+        messages = messages.filter(room_id=room)
+    if topic is not None:
+        messages = messages.filter(room__topic_id=topic)
+    if author is not None:
+        messages = messages.filter(author_id=author)
+    return messages
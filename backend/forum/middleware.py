@@ -0,0 +1,40 @@
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .profiling import QueryRecorder
+
+logger = logging.getLogger(__name__)
+
+# Times the same query shape may run in one request before it is reported as N+1,
+# raising instead of logging makes it fail tests and pages in development
+QUERY_REPEAT_LIMIT = getattr(settings, 'QUERY_REPEAT_LIMIT', 10)
+QUERY_REPEAT_RAISE = getattr(settings, 'QUERY_REPEAT_RAISE', False)
+
+
+class RepeatedQueries(Exception):
+    pass
+
+
+class QueryRepeatMiddleware:
+    """
+    Report requests running the same query shape more than QUERY_REPEAT_LIMIT times, enabled with DEBUG only.
+    Queries of streamed responses run after the middleware and are not seen
+    """
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        repeated = recorder.repeated(QUERY_REPEAT_LIMIT)
+        if repeated:
+            report = '\n'.join('{} x {}'.format(count, sql) for sql, count in repeated.items())
+            if QUERY_REPEAT_RAISE:
+                raise RepeatedQueries('{} {}\n{}'.format(request.method, request.path, report))
+            logger.warning('Repeated queries in %s %s\n%s', request.method, request.path, report)
+        return response
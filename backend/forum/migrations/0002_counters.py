@@ -0,0 +1,59 @@
+# Generated by Django 4.0.3 on 2026-10-18 07:59
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count(model, field, condition=Q()):
+    rows = (model.objects.filter(condition, **{field: OuterRef('pk')})
+            .order_by().values(field).annotate(count=Count('*')).values('count'))
+    return Coalesce(Subquery(rows), 0)
+
+
+def fill_counters(apps, schema_editor):
+    Topic = apps.get_model('forum', 'Topic')
+    Room = apps.get_model('forum', 'Room')
+    Message = apps.get_model('forum', 'Message')
+    MessageRating = apps.get_model('forum', 'MessageRating')
+    Message.objects.update(likes_count=count(MessageRating, 'message', Q(value='Like')),
+                           dislikes_count=count(MessageRating, 'message', Q(value='Dislike')))
+    Room.objects.update(message_count=count(Message, 'room'),
+                        participant_count=count(Room.participants.through, 'room'))
+    Topic.objects.update(room_count=count(Room, 'topic'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='dislikes_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='likes_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='message_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='participant_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='room_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.0.3 on 2026-10-18 08:01
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_ratings(apps, schema_editor):
+    """
+    Keep only the latest rating of every user and message
+    """
+    Message = apps.get_model('forum', 'Message')
+    MessageRating = apps.get_model('forum', 'MessageRating')
+    duplicates = (MessageRating.objects.order_by().values('user', 'message')
+                  .annotate(count=Count('id'), latest=Max('id')).filter(count__gt=1))
+    message_ids = set()
+    for duplicate in duplicates.iterator():
+        MessageRating.objects.filter(user=duplicate['user'], message=duplicate['message']) \
+            .exclude(id=duplicate['latest']).delete()
+        message_ids.add(duplicate['message'])
+
+    def count(value):
+        rows = (MessageRating.objects.filter(message=OuterRef('pk'), value=value)
+                .order_by().values('message').annotate(count=Count('*')).values('count'))
+        return Coalesce(Subquery(rows), 0)
+
+    Message.objects.filter(id__in=message_ids).update(likes_count=count('Like'), dislikes_count=count('Dislike'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_ratings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='messagerating',
+            constraint=models.UniqueConstraint(fields=('user', 'message'), name='unique_user_message_rating'),
+        ),
+    ]
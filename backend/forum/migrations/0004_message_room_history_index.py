@@ -0,0 +1,17 @@
+# Generated by Django 4.0.3 on 2026-10-18 08:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0003_unique_message_rating'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['room', '-updated', '-created', '-id'], name='message_room_history_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.0.3 on 2026-10-18 09:12
+
+from django.db import migrations
+
+POSTGRES_SCHEMA = [
+    'CREATE TABLE forum_room_search ('
+    'room_id bigint PRIMARY KEY REFERENCES forum_room (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+    'name text NOT NULL, topic text NOT NULL, description text NOT NULL, document tsvector NOT NULL)',
+    'CREATE INDEX forum_room_search_document_idx ON forum_room_search USING gin (document)',
+    "INSERT INTO forum_room_search (room_id, name, topic, description, document) "
+    "SELECT room.id, room.name, COALESCE(topic.name, ''), room.description, "
+    "setweight(to_tsvector('simple', room.name), 'A') || "
+    "setweight(to_tsvector('simple', COALESCE(topic.name, '')), 'B') || "
+    "setweight(to_tsvector('simple', room.description), 'C') "
+    "FROM forum_room room LEFT JOIN forum_topic topic ON topic.id = room.topic_id",
+]
+
+SQLITE_SCHEMA = [
+    'CREATE VIRTUAL TABLE forum_room_search USING fts5(name, topic, description)',
+    "INSERT INTO forum_room_search (rowid, name, topic, description) "
+    "SELECT room.id, room.name, COALESCE(topic.name, ''), room.description "
+    "FROM forum_room room LEFT JOIN forum_topic topic ON topic.id = room.topic_id",
+]
+
+
+def create_search_index(apps, schema_editor):
+    schema = POSTGRES_SCHEMA if schema_editor.connection.vendor == 'postgresql' else SQLITE_SCHEMA
+    for statement in schema:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    schema_editor.execute('DROP TABLE IF EXISTS forum_room_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0004_message_room_history_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
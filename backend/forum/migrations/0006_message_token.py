@@ -0,0 +1,41 @@
+# Generated by Django 4.0.3 on 2026-10-18 08:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+
+
+def index_messages(apps, schema_editor):
+    Message = apps.get_model('forum', 'Message')
+    MessageToken = apps.get_model('forum', 'MessageToken')
+    postings = []
+    for pk, body in Message.objects.values_list('id', 'body').iterator(chunk_size=5000):
+        postings.extend(MessageToken(token=token, message_id=pk)
+                        for token in {word for word in re.findall(r'\w+', body.lower()) if len(word) <= 50})
+        if len(postings) >= 1000:
+            MessageToken.objects.bulk_create(postings)
+            postings = []
+    MessageToken.objects.bulk_create(postings)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0005_room_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=50)),
+                ('message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='forum.message')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='messagetoken',
+            constraint=models.UniqueConstraint(fields=('token', 'message'), name='unique_message_token'),
+        ),
+        migrations.RunPython(index_messages, migrations.RunPython.noop),
+    ]
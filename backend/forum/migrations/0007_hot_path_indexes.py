@@ -0,0 +1,41 @@
+# Generated by Django 4.0.3 on 2026-10-18 08:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0006_message_token'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['-created', '-id'], name='message_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['author', '-created', '-id'], name='message_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='messagerating',
+            index=models.Index(fields=['message', 'value'], name='rating_message_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='messagerating',
+            index=models.Index(fields=['author', 'value'], name='rating_author_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='messagerating',
+            index=models.Index(fields=['value', '-id'], name='rating_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['-created', '-updated'], name='room_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['topic', '-id'], name='room_topic_idx'),
+        ),
+    ]
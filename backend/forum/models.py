@@ -26,6 +26,7 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 class Topic(models.Model):
     name = models.CharField(max_length=25)
+    room_count = models.IntegerField(default=0)
 
     def __str__(self):
         return self.name
@@ -39,28 +40,70 @@ class Room(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     description = models.TextField()
+    message_count = models.IntegerField(default=0)
+    participant_count = models.IntegerField(default=0)
 
     class Meta:
         ordering = ['-created', '-updated']
+        indexes = [
+            models.Index(fields=['-created', '-updated'], name='room_created_idx'),
+            models.Index(fields=['topic', '-id'], name='room_topic_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember stored topic, so topic room counters can be moved on topic change
+        instance._loaded_topic_id = instance.__dict__.get('topic_id')
+        return instance
+
 
 class Message(models.Model):
+    # Newest first, id makes order stable for keyset pagination
+    HISTORY_ORDERING = ('-updated', '-created', '-id')
+
     body = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
+    likes_count = models.IntegerField(default=0)
+    dislikes_count = models.IntegerField(default=0)
 
     class Meta:
         ordering = ['-updated', '-created']
+        indexes = [
+            models.Index(fields=['room', '-updated', '-created', '-id'], name='message_room_history_idx'),
+            # activity feeds of everybody and of author
+            models.Index(fields=['-created', '-id'], name='message_created_idx'),
+            models.Index(fields=['author', '-created', '-id'], name='message_author_created_idx'),
+        ]
 
     def __str__(self):
         return self.body[:100]
 
 
+class MessageToken(models.Model):
+    """
+    Posting of message in search index, every token of message body is stored once
+    """
+    MAX_LENGTH = 50
+
+    token = models.CharField(max_length=MAX_LENGTH)
+    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='tokens')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['token', 'message'], name='unique_message_token'),
+        ]
+
+    def __str__(self):
+        return self.token
+
+
 class MessageRating(models.Model):
     LIKE = 'Like'
     DISLIKE = 'Dislike'
@@ -79,5 +122,24 @@ class MessageRating(models.Model):
 
     objects = MessageRatingManager()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'message'], name='unique_user_message_rating'),
+        ]
+        indexes = [
+            # like and dislike counts of message and score of author
+            models.Index(fields=['message', 'value'], name='rating_message_value_idx'),
+            models.Index(fields=['author', 'value'], name='rating_author_value_idx'),
+            # like and dislike lists
+            models.Index(fields=['value', '-id'], name='rating_value_idx'),
+        ]
+
     def __str__(self):
         return str(self.value)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember stored value, so rating changes can be applied as deltas
+        instance._loaded_value = instance.__dict__.get('value')
+        return instance
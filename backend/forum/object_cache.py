@@ -0,0 +1,218 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+from .models import Topic, User
+from .redis_client import client, run_safely
+
+# Entries kept in memory of every process and seconds they are served without asking redis,
+# ttl bounds staleness when invalidation message is lost while redis is unreachable
+LOCAL_SIZE = getattr(settings, 'OBJECT_CACHE_LOCAL_SIZE', 10000)
+LOCAL_TTL = getattr(settings, 'OBJECT_CACHE_LOCAL_TTL', 60)
+# Seconds entries are kept in redis
+REDIS_TTL = getattr(settings, 'OBJECT_CACHE_REDIS_TTL', 300)
+
+CHANNEL = 'object_cache:invalidate'
+RECONNECT_SECONDS = 5
+LISTEN_SECONDS = 1.0
+
+ALL = 'all'
+
+
+class LRUCache:
+    """
+    Thread-safe mapping of at most max_size entries, each expiring ttl seconds after set,
+    least recently used entries are dropped first
+    """
+
+    def __init__(self, max_size, ttl, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires <= self.clock():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+caches = {}
+
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def _invalidate_local(kind, pk):
+    if kind in caches:
+        caches[kind].local.delete(pk)
+
+
+def _listen():
+    while True:
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CHANNEL)
+            # Invalidations published while this process was not subscribed are lost
+            for cache in caches.values():
+                cache.local.clear()
+            while True:
+                # Waiting with timeout instead of blocking read, blocking read fails on socket timeout
+                message = pubsub.get_message(timeout=LISTEN_SECONDS)
+                if message is not None:
+                    _invalidate_local(*json.loads(message['data']))
+        except redis.RedisError:
+            time.sleep(RECONNECT_SECONDS)
+
+
+def ensure_listener():
+    """
+    Start thread dropping entries invalidated by other processes, once per process,
+    forked workers start their own
+    """
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid != os.getpid():
+            threading.Thread(target=_listen, name='object-cache-invalidation', daemon=True).start()
+            _listener_pid = os.getpid()
+
+
+def broadcast(kind, pk):
+    pipe = client.pipeline(transaction=False)
+    pipe.delete(ObjectCache.key(kind, pk))
+    pipe.publish(CHANNEL, json.dumps([kind, pk]))
+    pipe.execute()
+
+
+class ObjectCache:
+    """
+    Dicts of objects by pk, read from process memory, then redis, then load(pks) returning {pk: dict}
+    """
+
+    def __init__(self, kind, load, local_ttl=LOCAL_TTL, redis_ttl=REDIS_TTL):
+        self.kind = kind
+        self.load = load
+        self.local = LRUCache(LOCAL_SIZE, local_ttl)
+        self.redis_ttl = redis_ttl
+        caches[kind] = self
+
+    @staticmethod
+    def key(kind, pk):
+        return 'object_cache:{}:{}'.format(kind, pk)
+
+    def get(self, pk):
+        return self.get_many([pk]).get(pk)
+
+    def get_many(self, pks):
+        ensure_listener()
+        found = {}
+        missing = []
+        for pk in set(pks):
+            value = self.local.get(pk)
+            if value is None:
+                missing.append(pk)
+            else:
+                found[pk] = value
+        if missing:
+            missing = self._get_shared(missing, found)
+        if missing:
+            self._load(missing, found)
+        return found
+
+    def _get_shared(self, pks, found):
+        try:
+            values = client.mget([self.key(self.kind, pk) for pk in pks])
+        except redis.RedisError:
+            return pks
+        missing = []
+        for pk, raw in zip(pks, values):
+            if raw is None:
+                missing.append(pk)
+            else:
+                found[pk] = json.loads(raw)
+                self.local.set(pk, found[pk])
+        return missing
+
+    def _load(self, pks, found):
+        loaded = self.load(pks)
+        for pk, value in loaded.items():
+            found[pk] = value
+            self.local.set(pk, value)
+        run_safely(self._set_shared, loaded)
+
+    def _set_shared(self, values):
+        pipe = client.pipeline(transaction=False)
+        for pk, value in values.items():
+            pipe.set(self.key(self.kind, pk), json.dumps(value), ex=self.redis_ttl)
+        pipe.execute()
+
+    def invalidate(self, pk):
+        """
+        Drop entry in this process and redis now, and once more after commit together
+        with other processes, as entry can be cached again before commit
+        """
+        self.local.delete(pk)
+        run_safely(client.delete, self.key(self.kind, pk))
+        kind = self.kind
+        transaction.on_commit(lambda: run_safely(broadcast, kind, pk))
+
+
+def load_users(pks):
+    users = User.objects.filter(id__in=pks).only('id', 'username', 'name', 'avatar')
+    return {user.id: {'id': user.id, 'username': user.username, 'name': user.name,
+                      'avatar': user.avatar.url if user.avatar else None} for user in users}
+
+
+def load_topics(pks):
+    return {topic['id']: topic for topic in Topic.objects.filter(id__in=pks).values('id', 'name', 'room_count')}
+
+
+def load_topic_lists(pks):
+    return {ALL: list(Topic.objects.order_by('id').values_list('id', flat=True))}
+
+
+# User cards: id, username, name and avatar url
+users = ObjectCache('user', load_users)
+# Topics with room counts and list of all topic ids
+topics = ObjectCache('topic', load_topics)
+topic_lists = ObjectCache('topic_list', load_topic_lists)
+
+
+def all_topics():
+    ids = topic_lists.get(ALL)
+    found = topics.get_many(ids)
+    return [found[pk] for pk in ids if pk in found]
@@ -0,0 +1,67 @@
+import base64
+import datetime
+import json
+import operator
+from functools import reduce
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """
+    Get opaque cursor of ordering values of the last row on page
+    """
+    values = [value.isoformat() if isinstance(value, datetime.date) else value for value in values]
+    data = json.dumps(values, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor, model, ordering):
+    """
+    Get ordering values from cursor, converted to python values of ordering fields
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise InvalidCursor(cursor)
+    fields = [model._meta.get_field(name.lstrip('-')) for name in ordering]
+    try:
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except Exception:
+        raise InvalidCursor(cursor)
+
+
+def after(ordering, values):
+    """
+    Get filter of rows placed after row with values in ordering,
+    e.g. for (-updated, -id): updated < U or (updated = U and id < I)
+    """
+    names = [name.lstrip('-') for name in ordering]
+    conditions = []
+    for position, name in enumerate(ordering):
+        lookup = '{}__{}'.format(names[position], 'lt' if name.startswith('-') else 'gt')
+        equal = dict(zip(names[:position], values[:position]))
+        conditions.append(Q(**equal, **{lookup: values[position]}))
+    return reduce(operator.or_, conditions)
+
+
+def keyset_page(queryset, ordering, size, cursor=None):
+    """
+    Get page of size rows following cursor and cursor of the next page or None.
+    Page is selected by ordering values instead of offset, so every page costs the same,
+    ordering must end with unique field
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(after(ordering, decode_cursor(cursor, queryset.model, ordering)))
+    rows = list(queryset[:size + 1])
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    return rows, encode_cursor([getattr(rows[-1], name.lstrip('-')) for name in ordering])
@@ -0,0 +1,55 @@
+import re
+import time
+from collections import Counter
+
+from django.db import connections
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_LISTS = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+
+
+def shape(sql):
+    """
+    Get sql with literals and lists of parameters replaced, so queries differing only by values look the same
+    """
+    return PLACEHOLDER_LISTS.sub('(...)', LITERALS.sub('?', sql))
+
+
+class QueryRecorder:
+    """
+    Context manager recording sql and duration of queries run on database connections of this thread
+    """
+
+    def __init__(self, using=None):
+        self.aliases = [using] if using else list(connections)
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    def __enter__(self):
+        for alias in self.aliases:
+            connections[alias].execute_wrappers.append(self)
+        return self
+
+    def __exit__(self, *args):
+        for alias in self.aliases:
+            connections[alias].execute_wrappers.remove(self)
+
+    def __len__(self):
+        return len(self.queries)
+
+    @property
+    def time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def repeated(self, limit):
+        """
+        Get {shape: count} of queries run more than limit times
+        """
+        counts = Counter(shape(sql) for sql, _ in self.queries)
+        return {sql: count for sql, count in counts.items() if count > limit}
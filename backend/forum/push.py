@@ -0,0 +1,258 @@
+import asyncio
+import json
+import logging
+import re
+
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .leaderboards import rating_deltas
+from .models import Room
+from .redis_client import get_async_client, pipelined, run_safely
+
+logger = logging.getLogger(__name__)
+
+# Seconds between comments keeping idle streams open through proxies
+HEARTBEAT_SECONDS = getattr(settings, 'ROOM_EVENTS_HEARTBEAT', 15)
+# Events buffered for one subscriber, subscriber which does not read them is disconnected
+QUEUE_SIZE = getattr(settings, 'ROOM_EVENTS_QUEUE_SIZE', 100)
+# Milliseconds browser waits before reconnecting
+RETRY_MILLISECONDS = 5000
+LISTEN_SECONDS = 1.0
+
+# Whether room pages open event streams, see ROOM_EVENTS setting
+ENABLED = getattr(settings, 'ROOM_EVENTS', False)
+PATH = re.compile(r'^/room/events/(?P<pk>\d+)/$')
+
+# Event types, data of every event is json
+CREATED = 'message'
+UPDATED = 'message_update'
+DELETED = 'message_delete'
+RATED = 'rating'
+
+KEEPALIVE = b': keepalive\n\n'
+
+
+def channel(room_id):
+    return 'room:{}:events'.format(room_id)
+
+
+def frame(kind, data):
+    """
+    Encode event as server-sent events frame, it is built once by publisher and sent as is to every subscriber
+    """
+    return 'event: {}\ndata: {}\n\n'.format(kind, json.dumps(data, separators=(',', ':')))
+
+
+def publish(events):
+    """
+    Publish (room id, type, data) events to channels of their rooms
+    """
+    pipelined(events, lambda pipe, event: pipe.publish(channel(event[0]), frame(*event[1:])))
+
+
+def _publish_on_commit(events):
+    if events:
+        transaction.on_commit(lambda: run_safely(publish, events))
+
+
+def entry(message):
+    """
+    Get event data with everything room page shows about created message
+    """
+    author = message.author
+    return {
+        'id': message.id,
+        'body': message.body,
+        'created': message.created.isoformat(),
+        'author': {'id': author.id, 'username': author.username,
+                   'avatar': author.avatar.url if author.avatar else None},
+        'room': {'id': message.room_id, 'name': message.room.name},
+    }
+
+
+def on_create(messages):
+    _publish_on_commit([(message.room_id, CREATED, entry(message)) for message in messages])
+
+
+def on_update(message):
+    _publish_on_commit([(message.room_id, UPDATED, {'id': message.id, 'body': message.body})])
+
+
+def on_delete(message):
+    _publish_on_commit([(message.room_id, DELETED, {'id': message.id})])
+
+
+def on_ratings(changes):
+    """
+    Publish changes of rating counters from (message id, room id, old value, new value) rating changes
+    """
+    events = []
+    for message_id, room_id, old_value, new_value in changes:
+        likes, dislikes = rating_deltas(old_value, new_value)
+        if likes or dislikes:
+            events.append((room_id, RATED, {'id': message_id, 'likes': likes, 'dislikes': dislikes}))
+    _publish_on_commit(events)
+
+
+class RoomHub:
+    """
+    Fans events of rooms out to subscribers of this process. Process holds one redis pub/sub connection
+    subscribed to rooms having subscribers, so idle subscriber costs a queue and no redis connection
+    """
+
+    def __init__(self, get_client=get_async_client):
+        self._get_client = get_client
+        self._rooms = {}
+        self._pubsub = None
+        self._reader = None
+
+    def __len__(self):
+        return sum(len(queues) for queues in self._rooms.values())
+
+    async def subscribe(self, room_id):
+        queue = asyncio.Queue(QUEUE_SIZE)
+        queues = self._rooms.setdefault(room_id, set())
+        queues.add(queue)
+        if len(queues) == 1:
+            try:
+                if self._pubsub is None:
+                    self._pubsub = self._get_client().pubsub(ignore_subscribe_messages=True)
+                await self._pubsub.subscribe(channel(room_id))
+            except redis.RedisError:
+                self.unsubscribe(room_id, queue)
+                raise
+        if self._reader is None:
+            self._reader = asyncio.ensure_future(self._read())
+        return queue
+
+    def unsubscribe(self, room_id, queue):
+        queues = self._rooms.get(room_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._rooms[room_id]
+            if self._pubsub is not None:
+                asyncio.ensure_future(self._leave(room_id))
+
+    async def _leave(self, room_id):
+        # Room could get new subscriber before this runs
+        if room_id in self._rooms or self._pubsub is None:
+            return
+        try:
+            await self._pubsub.unsubscribe(channel(room_id))
+        except redis.RedisError:
+            # reader drops connection and subscribers on failure
+            pass
+
+    def dispatch(self, name, data):
+        room_id = int(name.split(b':')[1])
+        for queue in list(self._rooms.get(room_id, ())):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                self.unsubscribe(room_id, queue)
+                _close(queue)
+
+    async def _read(self):
+        try:
+            while True:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=LISTEN_SECONDS)
+                if message is not None and message['type'] == 'message':
+                    self.dispatch(message['channel'], message['data'])
+        except redis.RedisError:
+            logger.warning('Room events connection failed', exc_info=True)
+        finally:
+            # Events published while disconnected are lost, clients reconnect and reload what they show
+            rooms, self._rooms = self._rooms, {}
+            pubsub, self._pubsub, self._reader = self._pubsub, None, None
+            for queues in rooms.values():
+                for queue in queues:
+                    _close(queue)
+            if pubsub is not None:
+                try:
+                    await pubsub.close()
+                except redis.RedisError:
+                    pass
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+
+def _close(queue):
+    """
+    Replace pending events of subscriber with end of stream
+    """
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(None)
+
+
+hub = RoomHub()
+
+
+def _room_exists(room_id):
+    close_old_connections()
+    try:
+        return Room.objects.filter(pk=room_id).exists()
+    finally:
+        close_old_connections()
+
+
+async def _respond(send, status, body):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'text/plain; charset=utf-8')]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def room_events(scope, receive, send, hub=hub):
+    """
+    ASGI application streaming events of room at /room/events/<pk>/ as server-sent events,
+    events carry only what changed: created message, new body, deleted id or rating counter deltas
+    """
+    room_id = int(PATH.match(scope['path'])['pk'])
+    if not await sync_to_async(_room_exists)(room_id):
+        await _respond(send, 404, b'Room not found')
+        return
+    try:
+        queue = await hub.subscribe(room_id)
+    except redis.RedisError:
+        await _respond(send, 503, b'Room events are unavailable')
+        return
+
+    disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+    next_event = asyncio.ensure_future(queue.get())
+    try:
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'),
+                                (b'x-accel-buffering', b'no')]})
+        await send({'type': 'http.response.body', 'body': 'retry: {}\n\n'.format(RETRY_MILLISECONDS).encode(),
+                    'more_body': True})
+        while True:
+            await asyncio.wait({disconnected, next_event}, timeout=HEARTBEAT_SECONDS,
+                               return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                return
+            if next_event.done():
+                data = next_event.result()
+                if data is None:
+                    await send({'type': 'http.response.body', 'body': b''})
+                    return
+                next_event = asyncio.ensure_future(queue.get())
+            else:
+                data = KEEPALIVE
+            await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+    finally:
+        disconnected.cancel()
+        next_event.cancel()
+        hub.unsubscribe(room_id, queue)
@@ -0,0 +1,60 @@
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import Message, MessageRating
+
+# Concurrent first ratings of the same message by the same user hit unique constraint,
+# retry sees the ratings created by the other request
+ATTEMPTS = 2
+
+# Ratings are kept per topic, messages of rooms without topic can not be rated
+NO_TOPIC = 'Message room has no topic.'
+
+
+def write_ratings(user, write):
+    """
+    Run write(creating) in transaction, write adds to creating set ids of messages it inserts ratings of user for.
+    Write is run again when the other request created one of these ratings first, other integrity errors are raised
+    """
+    for attempt in range(ATTEMPTS):
+        creating = set()
+        try:
+            with transaction.atomic():
+                return write(creating)
+        except IntegrityError:
+            conflict = MessageRating.objects.filter(user=user, message_id__in=creating).exists()
+            if attempt == ATTEMPTS - 1 or not conflict:
+                raise
+
+
+def rate_message(user, message_id, value):
+    """
+    Like or dislike message, rating message again with the same value removes rating.
+    Counters are updated in the same transaction, leaderboards after commit.
+    Returns rating, its pk is None if rating was removed.
+    Raises ValidationError when message room has no topic
+    """
+    if value not in dict(MessageRating.CHOICES):
+        raise ValueError('Unknown rating value {!r}'.format(value))
+    return write_ratings(user, lambda creating: _toggle(user, message_id, value, creating))
+
+
+def _toggle(user, message_id, value, creating):
+    rating = (MessageRating.objects.select_for_update()
+              .filter(user=user, message_id=message_id)
+              .only('value', 'message_id', 'author_id', 'room_id', 'topic_id', 'user_id')
+              .first())
+    if rating is None:
+        message = Message.objects.select_related('room').only('author_id', 'room__topic_id').get(pk=message_id)
+        if message.room.topic_id is None:
+            raise ValidationError({'message': [NO_TOPIC]})
+        creating.add(message_id)
+        return MessageRating.objects.create(room_id=message.room_id, topic_id=message.room.topic_id,
+                                            author_id=message.author_id, user=user, message_id=message.pk,
+                                            value=value)
+    if rating.value == value:
+        rating.delete()
+    else:
+        rating.value = value
+        rating.save(update_fields=['value'])
+    return rating
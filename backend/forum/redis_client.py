@@ -0,0 +1,141 @@
+import logging
+import threading
+
+import redis
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .fake_redis import FakeRedis
+
+logger = logging.getLogger(__name__)
+
+REAL = 'redis'
+FAKE = 'fake'
+
+DEFAULTS = {
+    'BACKEND': REAL,
+    'URL': 'redis://redis:6379/0',
+    'MAX_CONNECTIONS': 50,
+    'SOCKET_TIMEOUT': 1.0,
+    'SOCKET_CONNECT_TIMEOUT': 1.0,
+    'HEALTH_CHECK_INTERVAL': 30,
+}
+
+# Commands sent in one round trip by pipelined
+PIPELINE_BATCH_SIZE = 1000
+
+_client = None
+_async_client = None
+_lock = threading.Lock()
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REDIS', {})}
+
+
+def _options(config):
+    return {
+        'max_connections': config['MAX_CONNECTIONS'],
+        'socket_timeout': config['SOCKET_TIMEOUT'],
+        'socket_connect_timeout': config['SOCKET_CONNECT_TIMEOUT'],
+        'health_check_interval': config['HEALTH_CHECK_INTERVAL'],
+    }
+
+
+def create_client(config=None):
+    """
+    Create client of configured backend, real client shares one connection pool between threads
+    and reconnects lazily, so creating it does not connect
+    """
+    config = config or get_config()
+    if config['BACKEND'] == FAKE:
+        return FakeRedis()
+    if config['BACKEND'] != REAL:
+        raise ImproperlyConfigured('Unknown REDIS backend {!r}'.format(config['BACKEND']))
+    return redis.Redis(connection_pool=redis.ConnectionPool.from_url(config['URL'], **_options(config)))
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = create_client()
+    return _client
+
+
+def set_client(new_client):
+    """
+    Replace shared client, e.g. with FakeRedis in tests, returns previous one
+    """
+    global _client
+    previous, _client = _client, new_client
+    return previous
+
+
+class ClientProxy:
+    """
+    Module level client created on first command, so importing modules opens no connections
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_client(), name)
+
+
+client = ClientProxy()
+
+
+def pipelined(items, queue, batch_size=PIPELINE_BATCH_SIZE, transaction=False):
+    """
+    Queue commands of every item with queue(pipe, item), pipeline is sent every batch_size items,
+    so bulk writes take few round trips without building unbounded buffers. Returns results of all commands
+    """
+    results = []
+    pipe = client.pipeline(transaction=transaction)
+    for index, item in enumerate(items, 1):
+        queue(pipe, item)
+        if index % batch_size == 0:
+            results.extend(pipe.execute())
+    if len(pipe):
+        results.extend(pipe.execute())
+    return results
+
+
+def run_safely(func, *args):
+    """
+    Redis keeps only derived data, so redis failure must not break the write.
+    Drift is fixed by rebuilds, like leaderboard recompute, or by expiry of keys
+    """
+    try:
+        func(*args)
+    except redis.RedisError:
+        logger.warning('Redis update %s%s failed', func.__name__, args, exc_info=True)
+
+
+def get_async_client():
+    """
+    Get shared asyncio client of configured backend, it needs redis>=4.2
+    """
+    global _async_client
+    if _async_client is None:
+        config = get_config()
+        if config['BACKEND'] == FAKE:
+            from .fake_redis import AsyncFakeRedis
+            _async_client = AsyncFakeRedis(get_client())
+        else:
+            try:
+                from redis import asyncio as redis_asyncio
+            except ImportError:
+                raise ImproperlyConfigured('Async redis client needs redis>=4.2')
+            _async_client = redis_asyncio.Redis(
+                connection_pool=redis_asyncio.ConnectionPool.from_url(config['URL'], **_options(config)))
+    return _async_client
+
+
+def set_async_client(new_client):
+    """
+    Replace shared asyncio client, returns previous one
+    """
+    global _async_client
+    previous, _async_client = _async_client, new_client
+    return previous
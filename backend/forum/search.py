@@ -0,0 +1,150 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Room
+
+# Room search index created by 0005_room_search migration, it is a postgres table of weighted
+# tsvector documents with GIN index or FTS5 virtual table with rowid of room on sqlite
+TABLE = 'forum_room_search'
+
+# Searched columns, name weighs more than topic and topic more than description
+NAME = 'name'
+TOPIC = 'topic'
+DESCRIPTION = 'description'
+COLUMNS = (NAME, TOPIC, DESCRIPTION)
+WEIGHTS = {NAME: 'A', TOPIC: 'B', DESCRIPTION: 'C'}
+BM25_WEIGHTS = {NAME: 10.0, TOPIC: 5.0, DESCRIPTION: 1.0}
+
+# Rooms returned by one search
+LIMIT = 100
+# Words around match in snippet
+SNIPPET_WORDS = 12
+
+# Snippet highlight markers, replaced by <mark> after snippet text is escaped
+START, STOP = '\x02', '\x03'
+
+
+def _postgres():
+    return connection.vendor == 'postgresql'
+
+
+def _document(room):
+    return [room.name, room.topic.name if room.topic_id else '', room.description or '']
+
+
+def index_rooms(rooms):
+    """
+    Put current name, topic and description of rooms to search index
+    """
+    rows = [(room.id, *_document(room)) for room in rooms]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if _postgres():
+            document = ' || '.join("setweight(to_tsvector('simple', %s), '{}')".format(WEIGHTS[column])
+                                   for column in COLUMNS)
+            cursor.executemany(
+                'INSERT INTO {table} (room_id, name, topic, description, document) '
+                'VALUES (%s, %s, %s, %s, {document}) '
+                'ON CONFLICT (room_id) DO UPDATE SET name = EXCLUDED.name, topic = EXCLUDED.topic, '
+                'description = EXCLUDED.description, document = EXCLUDED.document'.format(table=TABLE,
+                                                                                         document=document),
+                [(pk, name, topic, description, name, topic, description) for pk, name, topic, description in rows])
+        else:
+            cursor.executemany('DELETE FROM {} WHERE rowid = %s'.format(TABLE), [(row[0],) for row in rows])
+            cursor.executemany('INSERT INTO {} (rowid, name, topic, description) '
+                               'VALUES (%s, %s, %s, %s)'.format(TABLE), rows)
+
+
+def _indexed(rooms):
+    return rooms.select_related('topic').only('id', 'name', 'description', 'topic__name')
+
+
+def index_topic(topic):
+    """
+    Reindex rooms of renamed topic
+    """
+    index_rooms(_indexed(Room.objects.filter(topic=topic)))
+
+
+def index_room_ids(room_ids):
+    """
+    Reindex rooms changed without room signals, like rooms of deleted topic
+    """
+    index_rooms(_indexed(Room.objects.filter(id__in=room_ids)))
+
+
+def forget_room(room_id):
+    # postgres index rows are deleted by foreign key cascade
+    if not _postgres():
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM {} WHERE rowid = %s'.format(TABLE), [room_id])
+
+
+def rebuild():
+    """
+    Fill search index with all rooms
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM {}'.format(TABLE))
+    rooms = _indexed(Room.objects.order_by('id'))
+    batch = []
+    for room in rooms.iterator(chunk_size=1000):
+        batch.append(room)
+        if len(batch) == 1000:
+            index_rooms(batch)
+            batch = []
+    index_rooms(batch)
+
+
+def _words(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def _highlight(snippet):
+    return mark_safe(escape(snippet).replace(START, '<mark>').replace(STOP, '</mark>'))
+
+
+def search(query, columns=COLUMNS, limit=LIMIT):
+    """
+    Get [(room id, snippet)] of rooms matching every word of query as prefix in columns,
+    best ranked first. Snippet is html of description with matches highlighted
+    """
+    words = _words(query)
+    if not words:
+        return []
+    with connection.cursor() as cursor:
+        if _postgres():
+            weights = ''.join(WEIGHTS[column] for column in columns)
+            cursor.execute(
+                "SELECT room_id, ts_headline('simple', description, query, %s) FROM ("
+                "SELECT room_id, description, query FROM {table}, to_tsquery('simple', %s) query "
+                "WHERE document @@ query ORDER BY ts_rank(document, query) DESC, room_id LIMIT %s) found".format(
+                    table=TABLE),
+                ['StartSel={}, StopSel={}, MaxWords={}, MinWords=1'.format(START, STOP, SNIPPET_WORDS),
+                 ' & '.join('{}:*{}'.format(word, weights) for word in words), limit])
+        else:
+            match = '{{{}}} : ({})'.format(' '.join(columns), ' '.join('"{}"*'.format(word) for word in words))
+            cursor.execute(
+                'SELECT rowid, snippet({table}, 2, %s, %s, %s, %s) FROM {table} WHERE {table} MATCH %s '
+                'ORDER BY bm25({table}, {weights}), rowid LIMIT %s'.format(
+                    table=TABLE, weights=', '.join(str(BM25_WEIGHTS[column]) for column in COLUMNS)),
+                [START, STOP, '…', SNIPPET_WORDS, match, limit])
+        return [(pk, _highlight(snippet or '')) for pk, snippet in cursor.fetchall()]
+
+
+def search_rooms(query, columns=COLUMNS, limit=LIMIT):
+    """
+    Get best ranked rooms matching query with room.snippet set, host and topic are selected
+    """
+    found = search(query, columns, limit)
+    rooms = Room.objects.select_related('host', 'topic').in_bulk([pk for pk, _ in found])
+    result = []
+    for pk, snippet in found:
+        if pk in rooms:
+            rooms[pk].snippet = snippet
+            result.append(rooms[pk])
+    return result
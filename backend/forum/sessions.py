@@ -0,0 +1,64 @@
+import redis
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+
+from .redis_client import client, run_safely
+
+KEY_PREFIX = 'session:'
+
+
+class SessionStore(DBStore):
+    """
+    Database sessions read through redis, so authenticated page views do not query django_session.
+    Database stays the source of truth, redis failures fall back to it
+    """
+
+    @staticmethod
+    def cache_key_of(session_key):
+        return KEY_PREFIX + session_key
+
+    @property
+    def cache_key(self):
+        return self.cache_key_of(self._get_or_create_session_key())
+
+    def _cache(self, data, age):
+        if age > 0:
+            run_safely(client.set, self.cache_key, self.encode(data), age)
+
+    def load(self):
+        try:
+            raw = client.get(self.cache_key)
+        except redis.RedisError:
+            raw = None
+        if raw is not None:
+            return self.decode(raw.decode())
+        session = self._get_session_from_db()
+        if not session:
+            return {}
+        data = self.decode(session.session_data)
+        self._cache(data, self.get_expiry_age(expiry=session.expire_date))
+        return data
+
+    def exists(self, session_key):
+        try:
+            if session_key and client.exists(self.cache_key_of(session_key)):
+                return True
+        except redis.RedisError:
+            pass
+        return super().exists(session_key)
+
+    def save(self, must_create=False):
+        super().save(must_create)
+        self._cache(self._session, self.get_expiry_age())
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        run_safely(client.delete, self.cache_key_of(session_key))
+
+    def flush(self):
+        self.clear()
+        self.delete(self.session_key)
+        self._session_key = None
@@ -0,0 +1,183 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import activity, authentication, counters, leaderboards, membership, message_search, object_cache, push, \
+    search, trending
+from .models import Topic, Room, Message, MessageRating, User
+
+# {pk: instance} of messages and rooms being deleted in this thread, counters of deleted rows are not moved
+# for every cascaded rating and message
+_deleting = threading.local()
+
+
+def _being_deleted(model):
+    if not hasattr(_deleting, 'instances'):
+        _deleting.instances = {Message: {}, Room: {}}
+    return _deleting.instances[model]
+
+
+@receiver(pre_delete, sender=Message)
+@receiver(pre_delete, sender=Room)
+def deleting(sender, instance, **kwargs):
+    _being_deleted(sender)[instance.pk] = instance
+    if sender is Message:
+        # ratings keep topic they were counted in when room changes topic
+        instance._rating_topic_ids = set()
+    else:
+        # (message id, author id) of cascaded messages, feeds drop them together
+        instance._deleted_messages = []
+
+
+@receiver(post_save, sender=MessageRating)
+def rating_saved(sender, instance, created, **kwargs):
+    old_value = None if created else getattr(instance, '_loaded_value', None)
+    leaderboards.on_rating_change(instance.message_id, instance.author_id, instance.room_id, instance.topic_id,
+                                  old_value, instance.value)
+    counters.change_rating(instance.message_id, old_value, instance.value)
+    if instance.value != old_value:
+        trending.on_rating(instance.message_id, instance.room_id)
+        push.on_ratings([(instance.message_id, instance.room_id, old_value, instance.value)])
+    instance._loaded_value = instance.value
+
+
+@receiver(post_delete, sender=MessageRating)
+def rating_deleted(sender, instance, **kwargs):
+    leaderboards.on_rating_change(instance.message_id, instance.author_id, instance.room_id, instance.topic_id,
+                                  instance.value, None)
+    message = _being_deleted(Message).get(instance.message_id)
+    if message is None:
+        counters.change_rating(instance.message_id, instance.value, None)
+    else:
+        message._rating_topic_ids.add(instance.topic_id)
+    push.on_ratings([(instance.message_id, instance.room_id, instance.value, None)])
+
+
+@receiver(post_save, sender=Message)
+def message_saved(sender, instance, created, **kwargs):
+    message_search.index_messages([instance], created)
+    if created:
+        counters.add_messages(instance.room_id, 1)
+        trending.on_message(instance.room_id)
+        activity.on_create([instance])
+        push.on_create([instance])
+    else:
+        push.on_update(instance)
+
+
+@receiver(post_delete, sender=Message)
+def message_deleted(sender, instance, **kwargs):
+    _being_deleted(Message).pop(instance.pk, None)
+    # messages of deleted room do not query it one by one
+    room = _being_deleted(Room).get(instance.room_id)
+    if room is None:
+        counters.add_messages(instance.room_id, -1)
+        activity.on_delete([(instance.pk, instance.author_id)])
+        room = instance.room
+    else:
+        room._deleted_messages.append((instance.pk, instance.author_id))
+    topic_ids = {room.topic_id, *getattr(instance, '_rating_topic_ids', ())} - {None}
+    leaderboards.on_message_delete(instance.pk, instance.room_id, topic_ids)
+    push.on_delete(instance)
+
+
+@receiver(post_save, sender=Room)
+def room_saved(sender, instance, created, **kwargs):
+    old_topic_id = None if created else getattr(instance, '_loaded_topic_id', instance.topic_id)
+    if instance.topic_id != old_topic_id:
+        counters.add_rooms(old_topic_id, -1)
+        counters.add_rooms(instance.topic_id, 1)
+        object_cache.topics.invalidate(old_topic_id)
+        object_cache.topics.invalidate(instance.topic_id)
+    instance._loaded_topic_id = instance.topic_id
+    search.index_rooms([instance])
+    if created:
+        # id of rolled back room can be used again
+        membership.forget([instance.pk])
+
+
+@receiver(post_delete, sender=Room)
+def room_deleted(sender, instance, **kwargs):
+    _being_deleted(Room).pop(instance.pk, None)
+    activity.on_delete(getattr(instance, '_deleted_messages', []))
+    counters.add_rooms(instance.topic_id, -1)
+    object_cache.topics.invalidate(instance.topic_id)
+    leaderboards.on_scope_delete(leaderboards.ROOM, instance.pk)
+    search.forget_room(instance.pk)
+    membership.forget([instance.pk])
+
+
+@receiver(post_save, sender=Topic)
+def topic_saved(sender, instance, created, **kwargs):
+    if created:
+        object_cache.topic_lists.invalidate(object_cache.ALL)
+    else:
+        search.index_topic(instance)
+    object_cache.topics.invalidate(instance.pk)
+
+
+@receiver(pre_delete, sender=Topic)
+def topic_deleting(sender, instance, **kwargs):
+    # rooms lose topic by SET_NULL update, which sends no room signals
+    instance._room_ids = list(Room.objects.filter(topic=instance).values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Topic)
+def topic_deleted(sender, instance, **kwargs):
+    room_ids = getattr(instance, '_room_ids', [])
+    if room_ids:
+        transaction.on_commit(lambda: search.index_room_ids(room_ids))
+    leaderboards.on_scope_delete(leaderboards.TOPIC, instance.pk)
+    object_cache.topics.invalidate(instance.pk)
+    object_cache.topic_lists.invalidate(object_cache.ALL)
+
+
+@receiver(m2m_changed, sender=Room.participants.through)
+def participants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._cleared_room_ids = list(instance.participants.values_list('pk', flat=True))
+    elif action == 'post_add' and not reverse:
+        # pk_set holds only users which were not participants yet
+        counters.add_participants(instance.pk, len(pk_set))
+        membership.on_join((instance.pk, user_id) for user_id in pk_set)
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            room_ids = [instance.pk]
+        elif pk_set is not None:
+            room_ids = pk_set
+        else:
+            room_ids = instance._cleared_room_ids
+        counters.recount_participants(room_ids)
+        if action == 'post_add':
+            membership.on_join((room_id, instance.pk) for room_id in room_ids)
+        else:
+            membership.forget(room_ids)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    object_cache.users.invalidate(instance.pk)
+    # password change and deactivation must reach authentication at once
+    authentication.users.invalidate(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    instance._participated_room_ids = list(instance.participants.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    counters.recount_participants(instance._participated_room_ids)
+    membership.forget(instance._participated_room_ids)
+    object_cache.users.invalidate(instance.pk)
+    authentication.users.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed(sender, instance, **kwargs):
+    authentication.tokens.invalidate(instance.key)
@@ -0,0 +1,27 @@
+import os
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+from . import redis_client
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Run tests over in-process redis, so code paths using redis do not wait out connection timeouts
+    when there is no server. Tests run over configured backend when REDIS_BACKEND is set
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._redis_settings = settings.REDIS
+        if 'REDIS_BACKEND' not in os.environ:
+            settings.REDIS = {**settings.REDIS, 'BACKEND': redis_client.FAKE}
+        redis_client.set_client(None)
+        redis_client.set_async_client(None)
+
+    def teardown_test_environment(self, **kwargs):
+        settings.REDIS = self._redis_settings
+        redis_client.set_client(None)
+        redis_client.set_async_client(None)
+        super().teardown_test_environment(**kwargs)
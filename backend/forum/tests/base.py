@@ -0,0 +1,19 @@
+from forum import redis_client
+from forum.fake_redis import AsyncFakeRedis, FakeRedis
+
+
+class FakeRedisMixin:
+    """
+    Give every test own empty fake redis as shared sync and async client, self.redis
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.redis = FakeRedis()
+        previous = redis_client.set_client(self.redis), redis_client.set_async_client(AsyncFakeRedis(self.redis))
+        self.addCleanup(self._restore_redis, *previous)
+
+    @staticmethod
+    def _restore_redis(previous, previous_async):
+        redis_client.set_client(previous)
+        redis_client.set_async_client(previous_async)
@@ -0,0 +1,109 @@
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum import activity
+from forum.models import Room, User, Topic, Message
+from forum.tests.base import FakeRedisMixin
+
+client = Client()
+
+
+class ActivityFeedTest(TestCase):
+
+    def setUp(self):
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+
+    @mock.patch('forum.activity.remove')
+    @mock.patch('forum.activity.push')
+    def test_signals(self, push, remove):
+        with self.captureOnCommitCallbacks(execute=True):
+            message = Message.objects.create(body='test', author=self.user, room=self.room)
+        push.assert_called_once_with([(message.id, self.user.id)])
+
+        message_id = message.id
+        with self.captureOnCommitCallbacks(execute=True):
+            message.delete()
+        remove.assert_called_once_with([(message_id, self.user.id)])
+
+        remove.reset_mock()
+        message_ids = [Message.objects.create(body='test', author=self.user, room=self.room).id for _ in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.delete()
+        remove.assert_called_once()
+        self.assertCountEqual(remove.call_args.args[0], [(pk, self.user.id) for pk in message_ids])
+
+    def test_pages_without_redis(self):
+        for i in range(activity.PAGE_SIZE + 1):
+            Message.objects.create(body='test{}'.format(i), author=self.user, room=self.room)
+
+        response = client.get(reverse('home'))
+        messages = response.context['room_messages']
+        self.assertEqual(len(messages), activity.PAGE_SIZE)
+        self.assertEqual(messages[0]['body'], 'test{}'.format(activity.PAGE_SIZE))
+        self.assertEqual(response.context['activity_next_page'], 2)
+
+        response = client.get(reverse('profile', kwargs={'pk': self.user.id}), {'activity_page': 2})
+        self.assertEqual([message['body'] for message in response.context['room_messages']], ['test0'])
+        self.assertIsNone(response.context['activity_next_page'])
+
+
+class ActivityFeedRedisTest(FakeRedisMixin, TestCase):
+    """
+    Feeds kept in redis over fake backend
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+
+    def create(self, body):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Message.objects.create(body=body, author=self.user, room=self.room)
+
+    def test_push_to_missing_feed(self):
+        for i in range(activity.PAGE_SIZE):
+            self.create('old{}'.format(i))
+        self.redis.flushall()
+
+        self.create('new')
+        for user_id in (None, self.user.id):
+            rows, has_more = activity.recent(user_id)
+            self.assertEqual([row['body'] for row in rows[:2]], ['new', 'old{}'.format(activity.PAGE_SIZE - 1)])
+            self.assertTrue(has_more)
+
+        self.create('newer')
+        rows, _ = activity.recent()
+        self.assertEqual([row['body'] for row in rows[:2]], ['newer', 'new'])
+
+    def test_names_read_on_show(self):
+        self.create('test')
+        self.user.username = 'renamed'
+        self.user.save()
+        self.room.name = 'renamed room'
+        self.room.save()
+        row, = activity.recent()[0]
+        self.assertEqual((row['author']['username'], row['room']['name']), ('renamed', 'renamed room'))
+
+    def test_user_feed_expires(self):
+        self.create('test')
+        activity.recent(self.user.id)
+        self.assertLessEqual(self.redis.ttl(activity._user_feed(self.user.id)), activity.USER_FEED_TTL)
+        self.assertGreater(self.redis.ttl(activity._user_feed(self.user.id)), 0)
+
+    def test_delete(self):
+        messages = [self.create('test{}'.format(i)) for i in range(3)]
+        activity.recent()
+        activity.recent(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            messages[1].delete()
+        for user_id in (None, self.user.id):
+            self.assertEqual([row['body'] for row in activity.recent(user_id)[0]], ['test2', 'test0'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.delete()
+        self.assertEqual(self.redis.lrange(activity.GLOBAL_FEED, 0, -1), [])
@@ -19,9 +19,9 @@ class GetTopicsListTest(TestCase):
 
     def test_get_topics_list(self):
         response = client.get(reverse('topics-all'))
-        topics = Topic.objects.all()
+        topics = Topic.objects.order_by('-id')
         serializer = TopicSerializer(topics, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
 
@@ -68,9 +68,9 @@ class GetTopicRoomsTest(TestCase):
 
     def test_get_topic_rooms(self):
         response = client.get(reverse('topics-rooms', kwargs={'pk': self.topic_1.id}))
-        rooms = Room.objects.filter(topic=self.topic_1)
+        rooms = Room.objects.filter(topic=self.topic_1).order_by('-id')
         serializer = RoomSerializer(rooms, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
 
 # ROOMS API TEST
@@ -99,8 +99,8 @@ class GetRoomParticipantsTest(TestCase):
 
     def test_get_room_participants(self):
         response = client.get(reverse('rooms-participants', kwargs={'pk': self.room.id}))
-        serializer = UserSerializer(self.room.participants, many=True)
-        self.assertEqual(response.data, serializer.data)
+        serializer = UserSerializer(self.room.participants.order_by('-id'), many=True)
+        self.assertEqual(response.data['results'], serializer.data)
 
 
 class CreateDeleteUpdateMessageTest(TestCase):
@@ -200,11 +200,16 @@ class GetMessageRatingsFilteredTest(TestCase):
             message=self.message,
             value='Like',
         )
+        self.user2 = User.objects.create_user(
+            username='test2',
+            email='test2@gmail.com',
+            password='test2'
+        )
         MessageRating2 = MessageRating.objects.create(
             room=self.room,
             topic=self.topic,
             author=self.user,
-            user=self.user,
+            user=self.user2,
             message=self.message,
             value='Dislike',
         )
@@ -213,10 +218,10 @@ class GetMessageRatingsFilteredTest(TestCase):
         response = client.get(reverse('api-messagerating-likes'))
         likes = MessageRating.objects.filter(value='Like')
         serializer = MessageRatingSerializer(likes, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_get_message_rating_dislike_list(self):
         response = client.get(reverse('api-messagerating-dislikes'))
         dislikes = MessageRating.objects.filter(value='Dislike')
         serializer = MessageRatingSerializer(dislikes, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
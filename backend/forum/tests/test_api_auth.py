@@ -1,8 +1,13 @@
 from django.test import TestCase, Client
 from django.urls import reverse
 
+from forum import redis_client
+from forum.authentication import CachedModelBackend, CachedTokenAuthentication, users as cached_users
 from forum.models import User
+from forum.sessions import SessionStore
+from forum.tests.base import FakeRedisMixin
 from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
 
 client = Client()
 
@@ -28,3 +33,63 @@ class AuthTest(TestCase):
         token = auth_response.json()['token']
         token_db = Token.objects.get(user=self.user)
         self.assertEqual(token, token_db.key)
+
+
+class CachedAuthTest(FakeRedisMixin, TestCase):
+    """
+    Users of tokens and sessions are read from cache and dropped from it on changes
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='cached', email='cached@gmail.com', password='test')
+        self.token = Token.objects.create(user=self.user)
+
+    def test_token_read_from_cache(self):
+        authentication = CachedTokenAuthentication()
+        self.assertEqual(authentication.authenticate_credentials(self.token.key)[0], self.user)
+        with self.assertNumQueries(0):
+            user, token = authentication.authenticate_credentials(self.token.key)
+            self.assertEqual((user.pk, user.name, user.username, user.is_active, token.key),
+                             (self.user.pk, self.user.name, 'cached', True, self.token.key))
+            self.assertEqual(user.get_session_auth_hash(), self.user.get_session_auth_hash())
+        self.assertNotIn('password', cached_users.get(self.user.pk))
+        self.assertNotIn(self.user.password.encode(),
+                         self.redis.get(cached_users.key(cached_users.kind, self.user.pk)))
+        # fields which are not cached are loaded from database
+        self.assertEqual(user.email, 'cached@gmail.com')
+        user.set_password('new')
+        self.assertNotEqual(user.get_session_auth_hash(), self.user.get_session_auth_hash())
+
+    def test_token_rotation(self):
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(self.token.key)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+            new_token = Token.objects.create(user=self.user)
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(authentication.authenticate_credentials(new_token.key)[0], self.user)
+
+    def test_deactivated_user(self):
+        backend = CachedModelBackend()
+        self.assertEqual(backend.get_user(self.user.pk), self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertIsNone(backend.get_user(self.user.pk))
+
+    def test_session(self):
+        session_client = Client()
+        session_client.login(email='cached@gmail.com', password='test')
+        session_key = session_client.cookies['sessionid'].value
+        self.assertTrue(redis_client.client.exists(SessionStore.cache_key_of(session_key)))
+        response = session_client.get(reverse('home'))
+        self.assertEqual(response.context['user'], self.user)
+
+        # Password change logs out other sessions
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('changed')
+            self.user.save()
+        self.assertFalse(session_client.get(reverse('home')).context['user'].is_authenticated)
+        self.assertFalse(redis_client.client.exists(SessionStore.cache_key_of(session_key)))
@@ -0,0 +1,45 @@
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from forum.models import Room, User, Topic, Message, MessageRating
+
+client = Client()
+
+
+class ListQueriesTest(TestCase):
+    """
+    Serialized rows must not load their relations one by one
+    """
+
+    def setUp(self):
+        self.topic = Topic.objects.create(name='test')
+        self.message = None
+
+    def add_rows(self, count):
+        start = User.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create_user(username='user{}'.format(i), email='user{}@gmail.com'.format(i))
+            room = Room.objects.create(name='room', host=user, topic=self.topic, description='test')
+            room.participants.add(user)
+            self.message = self.message or Message.objects.create(body='test', author=user, room=room)
+            Message.objects.create(body='test', author=user, room=room)
+            MessageRating.objects.create(room=self.message.room, topic=self.topic, author=self.message.author,
+                                         user=user, message=self.message, value='Like')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_queries_do_not_depend_on_page_size(self):
+        urls = [reverse('topics-all'), reverse('rooms-all'), reverse('api-messages-all'),
+                reverse('api-messagerating-all'), reverse('api-messagerating-likes'),
+                reverse('topics-rooms', kwargs={'pk': self.topic.id})]
+        self.add_rows(2)
+        message_ratings = reverse('api-messages-ratings', kwargs={'pk': self.message.id})
+        counts = [self.count_queries(url) for url in urls + [message_ratings]]
+        self.add_rows(10)
+        self.assertEqual([self.count_queries(url) for url in urls + [message_ratings]], counts)
@@ -0,0 +1,63 @@
+from asgiref.sync import sync_to_async
+from django.test import TransactionTestCase, AsyncClient, Client
+from django.urls import reverse
+
+from forum.models import Room, User, Topic, Message, MessageRating
+from forum.tests.base import FakeRedisMixin
+
+client = Client()
+async_client = AsyncClient()
+
+
+class AsyncApiTest(FakeRedisMixin, TransactionTestCase):
+    """
+    Async endpoints answer like their sync counterparts
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+        for i in range(3):
+            message = Message.objects.create(body='message{}'.format(i), author=self.user, room=self.room)
+            MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user, user=self.user,
+                                         message=message, value='Like' if i else 'Dislike')
+
+    async def test_same_as_sync(self):
+        room, topic = {'pk': self.room.id}, {'pk': self.topic.id}
+        pairs = [
+            ('rooms-all', 'async-rooms-all', {}, {}),
+            ('rooms-messages', 'async-rooms-messages', room, {'page_size': 2}),
+            ('rooms-best', 'async-rooms-best', room, {}),
+            ('rooms-scoring', 'async-rooms-scoring', room, {}),
+            ('topics-worst', 'async-topics-worst', topic, {}),
+            ('api-messages-best', 'async-messages-best', {}, {'limit': 1, 'offset': 1}),
+            ('api-users-scoring', 'async-users-scoring', {}, {}),
+            ('api-rooms-trending', 'async-rooms-trending', {}, {'window': 'day'}),
+        ]
+        for name, async_name, kwargs, params in pairs:
+            with self.subTest(name):
+                expected = (await sync_to_async(client.get)(reverse(name, kwargs=kwargs), params)).json()
+                response = await async_client.get(reverse(async_name, kwargs=kwargs), params)
+                self.assertEqual(response.status_code, 200)
+                # page links differ only by path
+                response = response.json()
+                for link in ('next', 'previous'):
+                    if expected.get(link):
+                        self.assertEqual(response[link].split('?')[1], expected[link].split('?')[1])
+                        response[link] = expected[link] = None
+                self.assertEqual(response, expected)
+
+    async def test_room_detail(self):
+        response = await async_client.get(reverse('async-rooms-detail', kwargs={'pk': self.room.id}))
+        self.assertEqual((response.json()['id'], response.json()['host']), (self.room.id, 'test'))
+
+    async def test_errors(self):
+        response = await async_client.get(reverse('async-rooms-messages', kwargs={'pk': 0}))
+        self.assertEqual((response.status_code, response.json()), (404, {'detail': 'Not found.'}))
+        response = await async_client.get(reverse('async-messages-trending'), {'window': 'year'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('window', response.json())
+        response = await async_client.post(reverse('async-rooms-all'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,42 @@
+from django.test import TestCase
+
+from forum import benchmark, counters, dataset
+from forum.models import Room, User, Message, MessageRating
+from forum.tests.base import FakeRedisMixin
+
+
+class BenchmarkTest(FakeRedisMixin, TestCase):
+    """
+    Synthetic dataset and benchmark report over it
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.created = dataset.generate(users=30, topics=3, rooms=10, messages=300, ratings=500, seed=1,
+                                        chunk_size=40)
+
+    def test_dataset(self):
+        self.assertEqual((User.objects.count(), Message.objects.count(), MessageRating.objects.count()),
+                         (30, 300, 500))
+        # counters were recounted after inserts without signals
+        self.assertEqual(set(counters.recount().values()), {0})
+        # few rooms hold most of messages and participants
+        rooms = list(Room.objects.order_by('-message_count').values_list('message_count', 'participant_count'))
+        self.assertGreater(rooms[0][0], 3 * rooms[len(rooms) // 2][0])
+        self.assertGreater(rooms[0][1], rooms[-1][1])
+
+    def test_percentile(self):
+        self.assertEqual([benchmark.percentile(range(1, 101), share) for share in (50, 95, 99)], [50, 95, 99])
+        self.assertEqual(benchmark.percentile([3.0], 99), 3.0)
+
+    def test_report(self):
+        report = benchmark.run(dataset.PASSWORD, repeat=3, warmup=1, task_repeat=1,
+                               names=['home', 'account_login', 'rooms-messages', 'forum.tasks.recompute_leaderboards'])
+        self.assertEqual(report['dataset']['message'], 300)
+        self.assertEqual(set(report['endpoints']), {'home', 'account_login', 'rooms-messages'})
+        # login redirects when password of generated users is accepted
+        self.assertEqual(report['endpoints']['account_login']['status'], 302)
+        for result in list(report['endpoints'].values()) + list(report['tasks'].values()):
+            self.assertGreater(result['queries'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertLessEqual(result['p95_ms'], result['p99_ms'])
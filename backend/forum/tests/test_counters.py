@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from forum.models import Room, User, Topic, Message, MessageRating
+
+
+class CountersTest(TestCase):
+
+    def setUp(self):
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+
+    def test_room_counters(self):
+        message = Message.objects.create(body='test', author=self.user, room=self.room)
+        Message.objects.create(body='test', author=self.user, room=self.room)
+        self.room.participants.add(self.user)
+        self.room.participants.add(self.user)
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.message_count, self.room.participant_count), (2, 1))
+
+        message.delete()
+        self.user.participants.clear()
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.message_count, self.room.participant_count), (1, 0))
+
+    def test_topic_counter(self):
+        self.topic.refresh_from_db()
+        self.assertEqual(self.topic.room_count, 1)
+
+        other_topic = Topic.objects.create(name='other')
+        room = Room.objects.get(id=self.room.id)
+        room.topic = other_topic
+        room.save()
+        self.topic.refresh_from_db()
+        other_topic.refresh_from_db()
+        self.assertEqual((self.topic.room_count, other_topic.room_count), (0, 1))
+
+    def test_message_counters(self):
+        message = Message.objects.create(body='test', author=self.user, room=self.room)
+        rating = MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user,
+                                              user=self.user, message=message, value='Like')
+        message.refresh_from_db()
+        self.assertEqual((message.likes_count, message.dislikes_count), (1, 0))
+
+        rating = MessageRating.objects.get(id=rating.id)
+        rating.value = 'Dislike'
+        rating.save()
+        message.refresh_from_db()
+        self.assertEqual((message.likes_count, message.dislikes_count), (0, 1))
+        self.assertEqual(message.messagerating_set.count_dislikes(), 1)
+
+        rating.delete()
+        message.refresh_from_db()
+        self.assertEqual((message.likes_count, message.dislikes_count), (0, 0))
+
+    def test_cascade_delete(self):
+        deleted = Message.objects.create(body='test', author=self.user, room=self.room)
+        message = Message.objects.create(body='test', author=self.user, room=self.room)
+        for target in (deleted, message):
+            MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user,
+                                         user=self.user, message=target, value='Like')
+        deleted.delete()
+        MessageRating.objects.get(message=message).delete()
+        message.refresh_from_db()
+        self.room.refresh_from_db()
+        self.assertEqual((message.likes_count, self.room.message_count), (0, 1))
+
+        self.room.delete()
+        self.topic.refresh_from_db()
+        self.assertEqual(self.topic.room_count, 0)
+
+    def test_recount_fixes_drift(self):
+        message = Message.objects.create(body='test', author=self.user, room=self.room)
+        Message.objects.filter(id=message.id).update(likes_count=5)
+        Room.objects.filter(id=self.room.id).update(message_count=0)
+
+        out = StringIO()
+        call_command('recount_counters', stdout=out)
+
+        message.refresh_from_db()
+        self.room.refresh_from_db()
+        self.assertEqual((message.likes_count, self.room.message_count), (0, 1))
+        self.assertIn('message.likes_count: 1 fixed', out.getvalue())
@@ -0,0 +1,51 @@
+import csv
+import io
+import json
+
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum.models import Room, User, Topic, Message, MessageRating
+
+client = Client()
+
+
+class ExportTest(TestCase):
+
+    def setUp(self):
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+        self.messages = [Message.objects.create(body='message{}'.format(i), author=self.user, room=self.room)
+                         for i in range(3)]
+        MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user, user=self.user,
+                                     message=self.messages[0], value='Like')
+
+    def export(self, name, **params):
+        response = client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        rows = [json.loads(line) for line in self.export('api-messages-export').splitlines()]
+        self.assertEqual([row['body'] for row in rows], ['message0', 'message1', 'message2'])
+        self.assertEqual(rows[0]['likes_count'], 1)
+
+        rows = self.export('api-messages-export', since_id=self.messages[1].id).splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in rows], [self.messages[2].id])
+
+    def test_since_timestamp(self):
+        Message.objects.filter(id=self.messages[0].id).update(body='edited')
+        message = Message.objects.get(id=self.messages[0].id)
+        message.save()
+        rows = self.export('api-messages-export', since=self.messages[2].updated.isoformat()).splitlines()
+        self.assertEqual([json.loads(line)['body'] for line in rows], ['edited'])
+
+    def test_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('api-messagerating-export', output='csv'))))
+        self.assertEqual([(row['message_id'], row['value']) for row in rows], [(str(self.messages[0].id), 'Like')])
+
+    def test_invalid_output(self):
+        response = client.get(reverse('api-messages-export'), {'output': 'xml'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,58 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+
+from forum.models import Room, User, Topic, Message, MessageRating
+
+client = Client()
+
+
+class BulkIngestTest(TestCase):
+
+    def setUp(self):
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+        client.force_login(self.user)
+
+    def test_bulk_create_messages(self):
+        data = [{'room': self.room.id, 'body': 'first'}, {'room': -1, 'body': 'lost'},
+                {'room': self.room.id}, {'room': self.room.id, 'body': 'second'}]
+        response = client.post(reverse('api-messages-bulk'), data=data, content_type='application/json')
+        results = response.json()['results']
+
+        self.assertEqual([result['status'] for result in results], ['created', 'error', 'error', 'created'])
+        self.assertEqual(Message.objects.get(id=results[0]['id']).body, 'first')
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.message_count, self.room.participant_count), (2, 1))
+
+    def test_bulk_create_requires_list(self):
+        response = client.post(reverse('api-messages-bulk'), data={'room': self.room.id, 'body': 'first'},
+                               content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_rate_messages(self):
+        first = Message.objects.create(body='first', author=self.user, room=self.room)
+        second = Message.objects.create(body='second', author=self.user, room=self.room)
+        MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user, user=self.user,
+                                     message=second, value='Like')
+        data = [{'message': first.id, 'value': 'Like'}, {'message': second.id, 'value': 'Dislike'},
+                {'message': -1, 'value': 'Like'}, {'message': first.id, 'value': 'Love'}]
+        response = client.post(reverse('api-messagerating-bulk'), data=data, content_type='application/json')
+        results = response.json()['results']
+
+        self.assertEqual([result['status'] for result in results], ['created', 'updated', 'error', 'error'])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.likes_count, first.dislikes_count), (1, 0))
+        self.assertEqual((second.likes_count, second.dislikes_count), (0, 1))
+        self.assertEqual(MessageRating.objects.count(), 2)
+
+    def test_bulk_rate_room_without_topic(self):
+        message = Message.objects.create(body='first', author=self.user, room=self.room)
+        self.topic.delete()
+        response = client.post(reverse('api-messagerating-bulk'), data=[{'message': message.id, 'value': 'Like'}],
+                               content_type='application/json')
+        result, = response.json()['results']
+        self.assertEqual((result['status'], result['errors']), ('error', {'message': ['Message room has no topic.']}))
+        self.assertFalse(MessageRating.objects.exists())
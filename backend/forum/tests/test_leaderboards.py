@@ -0,0 +1,317 @@
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum import leaderboards
+from forum.models import Room, User, Topic, Message, MessageRating
+from forum.tests.base import FakeRedisMixin
+
+client = Client()
+
+
+class RatingDeltasTest(TestCase):
+
+    def test_rating_deltas(self):
+        self.assertEqual(leaderboards.rating_deltas(None, 'Like'), (1, 0))
+        self.assertEqual(leaderboards.rating_deltas('Like', 'Dislike'), (-1, 1))
+        self.assertEqual(leaderboards.rating_deltas('Dislike', None), (0, -1))
+        self.assertEqual(leaderboards.rating_deltas('Like', 'Like'), (0, 0))
+
+    def test_score(self):
+        self.assertEqual(leaderboards.score(-1, 1), -5)
+
+
+class RatingChangeSignalsTest(TestCase):
+
+    def setUp(self):
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+        self.message = Message.objects.create(body='test', author=self.user, room=self.room)
+
+    @mock.patch('forum.leaderboards.apply_rating_change')
+    def test_rating_changes_applied_on_commit(self, apply_rating_change):
+        with self.captureOnCommitCallbacks(execute=True):
+            rating = MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user,
+                                                  user=self.user, message=self.message, value='Like')
+        apply_rating_change.assert_called_with(self.message.id, self.user.id, self.room.id, self.topic.id,
+                                               None, 'Like')
+
+        rating = MessageRating.objects.get(id=rating.id)
+        rating.value = 'Dislike'
+        with self.captureOnCommitCallbacks(execute=True):
+            rating.save()
+        apply_rating_change.assert_called_with(self.message.id, self.user.id, self.room.id, self.topic.id,
+                                               'Like', 'Dislike')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rating.delete()
+        apply_rating_change.assert_called_with(self.message.id, self.user.id, self.room.id, self.topic.id,
+                                               'Dislike', None)
+
+    @mock.patch('forum.leaderboards.forget_message')
+    @mock.patch('forum.leaderboards.apply_rating_change')
+    def test_message_delete_removes_ratings(self, apply_rating_change, forget_message):
+        MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user,
+                                     user=self.user, message=self.message, value='Like')
+        message_id = self.message.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.message.delete()
+        apply_rating_change.assert_called_with(message_id, self.user.id, self.room.id, self.topic.id, 'Like', None)
+        forget_message.assert_called_with(message_id, self.room.id, {self.topic.id})
+
+
+class RecomputeTest(FakeRedisMixin, TestCase):
+    """
+    Leaderboards rebuilt from ratings over fake redis
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.topics = [Topic.objects.create(name='topic{}'.format(i)) for i in range(2)]
+        self.users = [User.objects.create_user(username='user{}'.format(i), email='user{}@gmail.com'.format(i))
+                      for i in range(3)]
+        self.rooms = [Room.objects.create(name='room{}'.format(i), host=self.users[0], topic=topic,
+                                          description='test') for i, topic in enumerate(self.topics)]
+        self.messages = [Message.objects.create(body='test{}'.format(i), author=self.users[i % 2],
+                                                room=self.rooms[i % 2]) for i in range(5)]
+        # ratings are saved without commit, so leaderboards are not updated
+        for message in self.messages:
+            for user in self.users[:message.id % 3 + 1]:
+                MessageRating.objects.create(room=message.room, topic=message.room.topic, author=message.author,
+                                             user=user, message=message,
+                                             value='Dislike' if user == self.users[2] else 'Like')
+
+    def expected(self, key, room=None, topic=None):
+        """
+        Get {member: score} of leaderboard counted from ratings
+        """
+        ratings = MessageRating.objects.all()
+        if room is not None:
+            ratings = ratings.filter(room=room)
+        if topic is not None:
+            ratings = ratings.filter(topic=topic)
+        scores = {}
+        for rating in ratings:
+            like, dislike = rating.value == 'Like', rating.value == 'Dislike'
+            if key == leaderboards.USERS_SCORING:
+                member, points = rating.author_id, leaderboards.score(like, dislike)
+            else:
+                member, points = rating.message_id, like if key == leaderboards.BEST_MESSAGES else dislike
+            scores[str(member).encode()] = scores.get(str(member).encode(), 0) + points
+        return scores
+
+    def test_recompute(self):
+        empty_room = Room.objects.create(name='empty', host=self.users[0], topic=self.topics[0])
+        self.redis.zadd(leaderboards.BEST_MESSAGES, {self.messages[0].id: 100, 0: 1})
+        self.redis.zadd(leaderboards.scoped_key(leaderboards.WORST_MESSAGES, leaderboards.ROOM, empty_room.id),
+                        {self.messages[1].id: 1})
+        self.redis.delete(leaderboards.USERS_SCORING)
+
+        leaderboards.recompute(chunk_size=2)
+
+        for key in leaderboards.LEADERBOARDS:
+            boards = [(key, {}), *((leaderboards.scoped_key(key, leaderboards.ROOM, room.id), {'room': room})
+                                   for room in self.rooms),
+                      *((leaderboards.scoped_key(key, leaderboards.TOPIC, topic.id), {'topic': topic})
+                        for topic in self.topics)]
+            for board, scope in boards:
+                with self.subTest(board):
+                    self.assertEqual(dict(self.redis.zrevrange(board, 0, -1, withscores=True)),
+                                     self.expected(key, **scope))
+        self.assertEqual(self.redis.zcard(
+            leaderboards.scoped_key(leaderboards.WORST_MESSAGES, leaderboards.ROOM, empty_room.id)), 0)
+        self.assertEqual(list(self.redis.scan_iter(match='*:rebuild')), [])
+
+    def test_recompute_without_ratings(self):
+        MessageRating.objects.all().delete()
+        self.redis.zadd(leaderboards.BEST_MESSAGES, {self.messages[0].id: 1})
+        leaderboards.recompute()
+        self.assertEqual(list(self.redis.scan_iter()), [])
+
+
+class ScopedLeaderboardTest(FakeRedisMixin, TestCase):
+    """
+    Room and topic leaderboards over fake redis, message i of room has i + 1 likes and one dislike
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.topic = Topic.objects.create(name='test')
+        self.users = [User.objects.create_user(username='user{}'.format(i), email='user{}@gmail.com'.format(i))
+                      for i in range(6)]
+        self.room = Room.objects.create(name='test', host=self.users[0], topic=self.topic, description='test')
+        self.other = Room.objects.create(name='other', host=self.users[0], topic=self.topic, description='test')
+        self.messages = [Message.objects.create(body='test{}'.format(i), author=self.users[i], room=self.room)
+                         for i in range(5)]
+        self.other_message = Message.objects.create(body='other', author=self.users[0], room=self.other)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i, message in enumerate(self.messages):
+                for user in self.users[:i + 2]:
+                    MessageRating.objects.create(room=self.room, topic=self.topic, author=message.author, user=user,
+                                                 message=message, value='Dislike' if user == self.users[0] else 'Like')
+            MessageRating.objects.create(room=self.other, topic=self.topic, author=self.users[0], user=self.users[1],
+                                         message=self.other_message, value='Dislike')
+
+    def ids(self, name, pk, **params):
+        response = client.get(reverse(name, kwargs={'pk': pk}), params)
+        return response.json()['count'], [entry['id'] for entry in response.json()['results']]
+
+    def test_message_delete(self):
+        best = self.messages[-1]
+        with self.captureOnCommitCallbacks(execute=True):
+            best.delete()
+        for name, pk in (('rooms-best', self.room.id), ('topics-best', self.topic.id)):
+            with self.subTest(name):
+                self.assertEqual(self.ids(name, pk), (4, [message.id for message in self.messages[3::-1]]))
+        self.assertEqual(self.ids('rooms-worst', self.room.id)[0], 4)
+        self.assertEqual(self.ids('topics-worst', self.topic.id)[0], 5)
+        for key in (leaderboards.BEST_MESSAGES, leaderboards.WORST_MESSAGES):
+            for scope, pk in ((leaderboards.ROOM, self.room.id), (leaderboards.TOPIC, self.topic.id)):
+                self.assertIsNone(self.redis.zscore(leaderboards.scoped_key(key, scope, pk), best.id))
+
+    def test_message_delete_after_topic_change(self):
+        new_topic = Topic.objects.create(name='new')
+        self.room.topic = new_topic
+        self.room.save()
+        message = self.messages[-1]
+        with self.captureOnCommitCallbacks(execute=True):
+            message.delete()
+        self.assertEqual(self.ids('topics-best', self.topic.id),
+                         (4, [message.id for message in self.messages[3::-1]]))
+        self.assertEqual(self.ids('topics-worst', self.topic.id)[0], 5)
+        scores = dict(self.redis.zrevrange(
+            leaderboards.scoped_key(leaderboards.USERS_SCORING, leaderboards.TOPIC, self.topic.id), 0, -1,
+            withscores=True))
+        self.assertEqual(scores[str(message.author_id).encode()], 0)
+
+    def test_room_delete(self):
+        room_id = self.room.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.delete()
+        self.assertEqual(self.ids('rooms-best', room_id), (0, []))
+        self.assertEqual(self.ids('topics-best', self.topic.id), (0, []))
+        self.assertEqual(self.ids('topics-worst', self.topic.id), (1, [self.other_message.id]))
+
+    def test_pages(self):
+        best = [message.id for message in reversed(self.messages)]
+        for name, pk in (('rooms-best', self.room.id), ('topics-best', self.topic.id)):
+            with self.subTest(name):
+                self.assertEqual(self.ids(name, pk, limit=2), (5, best[:2]))
+                self.assertEqual(self.ids(name, pk, limit=2, offset=2), (5, best[2:4]))
+                self.assertEqual(self.ids(name, pk, limit=2, offset=4), (5, best[4:]))
+                self.assertEqual(self.ids(name, pk, limit=2, offset=5), (5, []))
+
+        response = client.get(reverse('topics-scoring', kwargs={'pk': self.topic.id}), {'limit': 2, 'offset': 1})
+        self.assertIsNotNone(response.json()['next'])
+        self.assertEqual([entry['rank'] for entry in response.json()['results']], [2, 3])
+        response = client.get(reverse('rooms-worst', kwargs={'pk': self.room.id}), {'limit': 2, 'offset': 4})
+        self.assertEqual([entry['rank'] for entry in response.json()['results']], [5])
+        self.assertIsNone(response.json()['next'])
+
+
+class TrendingSignalsTest(TestCase):
+
+    def setUp(self):
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+
+    @mock.patch('forum.leaderboards.apply_rating_change')
+    @mock.patch('forum.trending.record')
+    def test_activity_recorded_on_commit(self, record, apply_rating_change):
+        with self.captureOnCommitCallbacks(execute=True):
+            message = Message.objects.create(body='test', author=self.user, room=self.room)
+        record.assert_called_once_with('rooms', self.room.id)
+
+        record.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user,
+                                         user=self.user, message=message, value='Like')
+        record.assert_has_calls([mock.call('messages', message.id), mock.call('rooms', self.room.id)])
+
+
+class LeaderboardApiTest(FakeRedisMixin, TestCase):
+    """
+    Leaderboard endpoints over fake redis backend
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+        self.message = Message.objects.create(body='best', author=self.user, room=self.room)
+        with self.captureOnCommitCallbacks(execute=True):
+            MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user, user=self.user,
+                                         message=self.message, value='Like')
+
+    def test_best_messages(self):
+        response = client.get(reverse('api-messages-best'))
+        self.assertEqual(response.json()['results'], [{'rank': 1, 'score': 1, 'id': self.message.id, 'body': 'best',
+                                                       'author': 'test', 'room': 'test'}])
+        response = client.get(reverse('rooms-best', kwargs={'pk': self.room.id}))
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_users_scoring(self):
+        response = client.get(reverse('api-users-scoring'))
+        self.assertEqual([(entry['username'], entry['score']) for entry in response.json()['results']], [('test', 2)])
+
+    def rate(self, count, value):
+        """
+        Create message of new author rated with value by count new users, returns the message and its author
+        """
+        index = User.objects.count()
+        author = User.objects.create_user(username='author{}'.format(index), email='author{}@gmail.com'.format(index))
+        message = Message.objects.create(body='message{}'.format(index), author=author, room=self.room)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                user = User.objects.create_user(username='user{}-{}'.format(index, i),
+                                                email='user{}-{}@gmail.com'.format(index, i))
+                MessageRating.objects.create(room=self.room, topic=self.topic, author=author, user=user,
+                                             message=message, value=value)
+        return message, author
+
+    def test_ranks(self):
+        liked, liked_author = self.rate(3, 'Like')
+        disliked, disliked_author = self.rate(2, 'Dislike')
+
+        response = client.get(reverse('api-messages-best-rank', kwargs={'pk': self.message.id}))
+        self.assertEqual((response.json()['rank'], response.json()['score']), (2, 1))
+        response = client.get(reverse('api-messages-worst-rank', kwargs={'pk': disliked.id}))
+        self.assertEqual(response.json(), {'rank': 1, 'score': 2, 'id': disliked.id, 'body': disliked.body,
+                                           'author': disliked_author.username, 'room': 'test'})
+        response = client.get(reverse('api-users-scoring-rank', kwargs={'pk': liked_author.id}))
+        self.assertEqual((response.json()['rank'], response.json()['score'], response.json()['username']),
+                         (1, 6, liked_author.username))
+        response = client.get(reverse('api-users-scoring-rank', kwargs={'pk': disliked_author.id}))
+        self.assertEqual((response.json()['rank'], response.json()['score']), (3, -6))
+
+        for name, pk in (('api-messages-best-rank', disliked.id), ('api-messages-worst-rank', liked.id),
+                         ('api-users-scoring-rank', 0)):
+            with self.subTest(name):
+                self.assertEqual(client.get(reverse(name, kwargs={'pk': pk})).status_code, 404)
+
+    def test_pages(self):
+        for count in range(2, 6):
+            self.rate(count, 'Like')
+        best = [entry['id'] for entry in client.get(reverse('api-messages-best')).json()['results']]
+        self.assertEqual(len(best), 5)
+
+        response = client.get(reverse('api-messages-best'), {'limit': 2, 'offset': 2})
+        self.assertEqual(response.json()['count'], 5)
+        self.assertEqual([(entry['rank'], entry['id']) for entry in response.json()['results']],
+                         [(3, best[2]), (4, best[3])])
+        self.assertIsNotNone(response.json()['previous'])
+        self.assertIsNotNone(response.json()['next'])
+
+        response = client.get(reverse('api-messages-best'), {'limit': 2, 'offset': 4})
+        self.assertEqual([entry['id'] for entry in response.json()['results']], best[4:])
+        self.assertIsNone(response.json()['next'])
+        response = client.get(reverse('api-messages-best'), {'limit': 2, 'offset': 5})
+        self.assertEqual(response.json()['results'], [])
+
+        response = client.get(reverse('api-users-scoring'), {'limit': 1})
+        self.assertEqual([entry['rank'] for entry in response.json()['results']], [1])
+        self.assertEqual(response.json()['count'], 5)
@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum import ingest, membership
+from forum.models import Room, User, Topic
+from forum.tests.base import FakeRedisMixin
+
+client = Client()
+
+
+class MembershipTest(FakeRedisMixin, TestCase):
+    """
+    Participants cached in redis over fake backend
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.topic = Topic.objects.create(name='test')
+        self.users = [User.objects.create_user(username='user{}'.format(i), email='user{}@gmail.com'.format(i))
+                      for i in range(5)]
+        self.room = Room.objects.create(name='test', host=self.users[0], topic=self.topic, description='test')
+
+    def join(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            return membership.join(self.room, user)
+
+    def test_join_table_is_written_once(self):
+        self.assertTrue(self.join(self.users[1]))
+        with self.assertNumQueries(0):
+            self.assertFalse(self.join(self.users[1]))
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.participant_count, 1)
+        self.assertEqual(membership.joined_rooms(self.users[2].pk, [self.room.pk]), set())
+
+    def test_message_post_joins_room(self):
+        client.force_login(self.users[1])
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                client.post(reverse('message_create', kwargs={'pk': self.room.id}), {'body': 'hello'})
+        self.assertEqual(list(self.room.participants.all()), [self.users[1]])
+        self.assertEqual(membership.joined_rooms(self.users[1].pk, [self.room.pk]), {self.room.pk})
+
+    def test_ingest_skips_known_participants(self):
+        self.join(self.users[1])
+        other = Room.objects.create(name='other', host=self.users[0], topic=self.topic, description='test')
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest.create_messages(self.users[1], [{'room': self.room.id, 'body': 'a'},
+                                                   {'room': other.id, 'body': 'b'}])
+        self.assertEqual(membership.joined_rooms(self.users[1].pk, [self.room.pk, other.pk]),
+                         {self.room.pk, other.pk})
+        self.assertEqual(Room.objects.get(pk=other.pk).participant_count, 1)
+
+    def test_participants_pages(self):
+        for user in self.users:
+            self.join(user)
+        response = client.get(reverse('rooms-participants', kwargs={'pk': self.room.id}), {'page_size': 3})
+        self.assertEqual([user['username'] for user in response.data['results']], ['user4', 'user3', 'user2'])
+        response = client.get(response.data['next'])
+        self.assertEqual([user['username'] for user in response.data['results']], ['user1', 'user0'])
+        self.assertIsNone(response.data['next'])
+
+    def test_removed_participant_is_forgotten(self):
+        self.join(self.users[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.participants.remove(self.users[1])
+        self.assertEqual(membership.joined_rooms(self.users[1].pk, [self.room.pk]), set())
+        self.assertEqual(membership.page(self.room.pk, 10), ([], None))
+
+    def test_changes_committed_while_loading(self):
+        self.join(self.users[1])
+        self.redis.flushall()
+        read = membership._participants
+
+        def participants(room_ids):
+            members = read(room_ids)
+            if not changed:
+                changed.append(True)
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.room.participants.add(self.users[2])
+                    self.room.participants.remove(self.users[1])
+            return members
+        changed = []
+        with mock.patch('forum.membership._participants', side_effect=participants):
+            self.assertEqual(membership.joined_rooms(self.users[2].pk, [self.room.pk]), {self.room.pk})
+        self.assertEqual(membership.joined_rooms(self.users[1].pk, [self.room.pk]), set())
+        self.assertEqual(membership.joined_rooms(self.users[2].pk, [self.room.pk]), {self.room.pk})
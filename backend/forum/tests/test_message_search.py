@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum import ingest
+from forum.models import Room, User, Topic, Message, MessageToken
+
+client = Client()
+
+
+class MessageSearchTest(TestCase):
+
+    def setUp(self):
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+        self.other_room = Room.objects.create(name='other', host=self.user, topic=self.topic, description='test')
+        self.message = Message.objects.create(body='Redis streams are fast', author=self.user, room=self.room)
+        self.other = Message.objects.create(body='Fast redis', author=self.user, room=self.other_room)
+
+    def found(self, **params):
+        response = client.get(reverse('api-messages-search'), params)
+        self.assertEqual(response.status_code, 200)
+        return [message['id'] for message in response.json()['results']]
+
+    def test_search(self):
+        self.assertEqual(self.found(q='REDIS fast'), [self.other.id, self.message.id])
+        self.assertEqual(self.found(q='redis streams'), [self.message.id])
+        self.assertEqual(self.found(q='redis', room=self.other_room.id), [self.other.id])
+        self.assertEqual(self.found(q='redis', topic=self.topic.id, page_size=1), [self.other.id])
+        self.assertEqual(self.found(q='redis', author=self.user.id + 1), [])
+
+        response = client.get(reverse('api-messages-search'), {'room': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_index_follows_changes(self):
+        self.message.body = 'Postgres streams'
+        self.message.save()
+        self.assertEqual(self.found(q='redis'), [self.other.id])
+        self.assertEqual(self.found(q='postgres'), [self.message.id])
+
+        self.message.delete()
+        self.assertEqual(self.found(q='postgres'), [])
+
+        message, = ingest.create_messages(self.user, [{'room': self.room.id, 'body': 'bulk body'}])
+        self.assertEqual(self.found(q='bulk'), [message.id])
+
+    def test_rebuild(self):
+        MessageToken.objects.all().delete()
+        call_command('rebuild_message_index', '--chunk-size=1', '--workers=1', stdout=StringIO())
+        self.assertEqual(self.found(q='fast'), [self.other.id, self.message.id])
@@ -0,0 +1,46 @@
+from django.test import TestCase
+
+from forum import object_cache
+from forum.models import User, Topic
+
+
+class LRUCacheTest(TestCase):
+
+    def test_size_and_ttl(self):
+        now = [0]
+        cache = object_cache.LRUCache(max_size=2, ttl=10, clock=lambda: now[0])
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+        now[0] = 10
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 1)
+
+
+class ObjectCacheTest(TestCase):
+
+    def setUp(self):
+        for cache in object_cache.caches.values():
+            cache.local.clear()
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+
+    def test_served_from_memory(self):
+        card = object_cache.users.get(self.user.id)
+        self.assertEqual(card, {'id': self.user.id, 'username': 'test', 'name': '', 'avatar': None})
+        with self.assertNumQueries(0):
+            self.assertEqual(object_cache.users.get(self.user.id), card)
+
+    def test_invalidated_on_save(self):
+        object_cache.users.get(self.user.id)
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertEqual(object_cache.users.get(self.user.id)['username'], 'renamed')
+
+        self.assertEqual(object_cache.all_topics(), [])
+        topic = Topic.objects.create(name='test')
+        self.assertEqual(object_cache.all_topics(), [{'id': topic.id, 'name': 'test', 'room_count': 0}])
+        topic.delete()
+        self.assertEqual(object_cache.all_topics(), [])
@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+
+from forum.api.pagination import KeysetPagination
+from forum.models import Room, User, Topic, Message
+
+client = Client()
+
+
+class RoomHistoryPaginationTest(TestCase):
+
+    def setUp(self):
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+        for i in range(5):
+            Message.objects.create(body='message{}'.format(i), author=self.user, room=self.room)
+        # Same timestamps must not break page boundaries
+        Message.objects.filter(body__in=['message1', 'message2', 'message3']).update(
+            updated=Message.objects.get(body='message1').updated)
+        self.expected = list(self.room.message_set.order_by(*Message.HISTORY_ORDERING).values_list('id', flat=True))
+
+    def test_api_pages(self):
+        url = reverse('rooms-messages', kwargs={'pk': self.room.id}) + '?page_size=2'
+        ids = []
+        while url:
+            response = client.get(url)
+            ids += [message['id'] for message in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(ids, self.expected)
+
+    def test_api_invalid_cursor(self):
+        response = client.get(reverse('rooms-messages', kwargs={'pk': self.room.id}) + '?cursor=abc')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_room_detail_pages(self):
+        url = reverse('room_detail', kwargs={'pk': self.room.id})
+        response = client.get(url)
+        self.assertEqual([message.id for message in response.context['room_messages']], self.expected)
+        self.assertIsNone(response.context['next_cursor'])
+
+        response = client.get(url + '?cursor=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ListPaginationTest(TestCase):
+
+    def setUp(self):
+        for i in range(5):
+            Topic.objects.create(name='topic{}'.format(i))
+
+    def test_list_pages(self):
+        url = reverse('topics-all') + '?page_size=2'
+        names = []
+        while url:
+            response = client.get(url)
+            self.assertLessEqual(len(response.data['results']), 2)
+            names += [topic['name'] for topic in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(names, ['topic{}'.format(i) for i in reversed(range(5))])
+
+    def test_page_size_capped(self):
+        with mock.patch.object(KeysetPagination, 'max_page_size', 3):
+            response = client.get(reverse('topics-all'), {'page_size': 100})
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNotNone(response.data['next'])
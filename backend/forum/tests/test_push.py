@@ -0,0 +1,128 @@
+import asyncio
+import json
+
+from django.test import TestCase, TransactionTestCase
+
+from forum import push
+from forum.fake_redis import AsyncFakeRedis, FakeRedis
+from forum.models import Room, User, Topic, Message, MessageRating
+from forum.tests.base import FakeRedisMixin
+
+
+def events(pubsub):
+    result = []
+    while (message := pubsub.get_message()) is not None:
+        kind, data = message['data'].decode().split('\n')[:2]
+        result.append((kind[len('event: '):], json.loads(data[len('data: '):])))
+    return result
+
+
+class PublishTest(FakeRedisMixin, TestCase):
+    """
+    Writes publish deltas to channel of their room after commit
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.topic = Topic.objects.create(name='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(push.channel(self.room.id))
+
+    def test_message_and_rating_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            message = Message.objects.create(body='hello', author=self.user, room=self.room)
+        with self.captureOnCommitCallbacks(execute=True):
+            rating = MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user,
+                                                  user=self.user, message=message, value='Like')
+        with self.captureOnCommitCallbacks(execute=True):
+            rating.value = 'Dislike'
+            rating.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            message.body = 'edited'
+            message.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            message_id = message.id
+            message.delete()
+
+        (kind, data), *rest = events(self.pubsub)
+        self.assertEqual((kind, data['id'], data['body'], data['author']['username']),
+                         (push.CREATED, message_id, 'hello', 'test'))
+        self.assertEqual(rest, [
+            (push.RATED, {'id': message_id, 'likes': 1, 'dislikes': 0}),
+            (push.RATED, {'id': message_id, 'likes': -1, 'dislikes': 1}),
+            (push.UPDATED, {'id': message_id, 'body': 'edited'}),
+            (push.RATED, {'id': message_id, 'likes': 0, 'dislikes': -1}),
+            (push.DELETED, {'id': message_id}),
+        ])
+
+    def test_rolled_back_write_is_not_published(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            Message.objects.create(body='hello', author=self.user, room=self.room)
+        self.assertEqual(events(self.pubsub), [])
+
+
+class RoomEventsTest(TransactionTestCase):
+    """
+    Server-sent events stream of room over fake redis
+    """
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.hub = push.RoomHub(lambda: AsyncFakeRedis(self.redis))
+        user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=user, description='test')
+
+    async def request(self, path, until):
+        """
+        Stream path until until(sent bodies) is true, then disconnect, returns response status and body
+        """
+        sent = []
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        task = asyncio.ensure_future(push.room_events({'type': 'http', 'path': path}, receive, send, hub=self.hub))
+        for _ in range(100):
+            if task.done() or until(b''.join(message.get('body', b'') for message in sent)):
+                break
+            await asyncio.sleep(0.02)
+        disconnect.set()
+        await task
+        return sent[0]['status'], b''.join(message.get('body', b'') for message in sent)
+
+    async def test_stream(self):
+        path = '/room/events/{}/'.format(self.room.id)
+
+        async def publish():
+            while not len(self.hub):
+                await asyncio.sleep(0.01)
+            self.redis.publish(push.channel(self.room.id), push.frame(push.DELETED, {'id': 1}))
+
+        publisher = asyncio.ensure_future(publish())
+        status, body = await self.request(path, lambda body: b'event' in body)
+        await publisher
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'retry: 5000\n\nevent: message_delete\ndata: {"id":1}\n\n')
+        self.assertEqual(len(self.hub), 0)
+        await self.hub.close()
+
+    async def test_subscribers_share_subscription(self):
+        queues = [await self.hub.subscribe(self.room.id) for _ in range(1000)]
+        self.assertEqual(len(self.redis._subscribers[push.channel(self.room.id).encode()]), 1)
+
+        self.redis.publish(push.channel(self.room.id), 'event')
+        await asyncio.wait_for(queues[-1].get(), 1)
+        self.assertTrue(all(queue.qsize() == 1 for queue in queues[:-1]))
+        await self.hub.close()
+        self.assertTrue(all(queue.get_nowait() is None for queue in queues))
+
+    async def test_missing_room(self):
+        status, body = await self.request('/room/events/0/', lambda body: True)
+        self.assertEqual((status, body), (404, b'Room not found'))
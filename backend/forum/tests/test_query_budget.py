@@ -0,0 +1,172 @@
+from django.db import transaction
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.urls import URLResolver
+
+from forum import benchmark, leaderboards, middleware, object_cache, trending, urls
+from forum.middleware import QueryRepeatMiddleware, RepeatedQueries
+from forum.models import Room, User, Topic, Message, MessageRating
+from forum.profiling import QueryRecorder, shape
+from forum.tests.base import FakeRedisMixin
+
+# Rows related to the room, topic, message and user every endpoint is requested with
+SIZES = (2, 6, 18)
+
+# Async endpoints run queries on pool threads outside of test transaction,
+# they share querysets and serializers with their sync counterparts
+ASYNC_COUNTERPARTS = {
+    'async-rooms-all': 'rooms-all',
+    'async-rooms-detail': 'api/rooms/retrieve/<str:pk>/',
+    'async-rooms-messages': 'rooms-messages',
+    'async-rooms-best': 'rooms-best',
+    'async-rooms-worst': 'rooms-worst',
+    'async-rooms-scoring': 'rooms-scoring',
+    'async-rooms-trending': 'api-rooms-trending',
+    'async-topics-best': 'topics-best',
+    'async-topics-worst': 'topics-worst',
+    'async-topics-scoring': 'topics-scoring',
+    'async-messages-best': 'api-messages-best',
+    'async-messages-worst': 'api-messages-worst',
+    'async-messages-trending': 'api-messages-trending',
+    'async-users-scoring': 'api-users-scoring',
+}
+
+# Route with regex in path(), '?' of the regex starts query string, so it can not be requested
+UNREACHABLE = {'schema-json'}
+
+# Routes streamed by asgi application before requests reach django, they are named for reversing only
+SERVED_BY_ASGI = {'room_events'}
+
+# Endpoints requested without login and their status, so wrong credentials do not pass
+ANONYMOUS = {'account_login': 302, 'token-auth': 200}
+
+
+def url_names(patterns=None, prefix=''):
+    """
+    Get names of forum url patterns, or routes of unnamed ones
+    """
+    for pattern in urls.urlpatterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            yield from url_names(pattern.url_patterns, prefix + str(pattern.pattern))
+        else:
+            yield pattern.name or prefix + str(pattern.pattern)
+
+
+class QueryBudgetTest(FakeRedisMixin, TestCase):
+    """
+    Query count of every endpoint does not grow with rows it shows or changes
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+        self.room.participants.add(self.user)
+        self.message = Message.objects.create(body='test', author=self.user, room=self.room)
+        self.rating = MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user,
+                                                   user=self.user, message=self.message, value='Like')
+        self.size = 0
+
+    def grow(self, size):
+        """
+        Add rows until room, topic, message and user have size related rows of every kind
+        """
+        for i in range(self.size, size):
+            user = User.objects.create_user(username='user{}'.format(i), email='user{}@gmail.com'.format(i))
+            room = Room.objects.create(name='room{}'.format(i), host=user, topic=self.topic, description='test')
+            own_room = Room.objects.create(name='own{}'.format(i), host=self.user, topic=self.topic)
+            self.room.participants.add(user)
+            Message.objects.create(body='room{}'.format(i), author=user, room=self.room)
+            Message.objects.create(body='own{}'.format(i), author=self.user, room=own_room)
+            other = Message.objects.create(body='other{}'.format(i), author=user, room=room)
+            MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user, user=user,
+                                         message=self.message, value='Like' if i % 3 else 'Dislike')
+            MessageRating.objects.create(room=room, topic=self.topic, author=user, user=self.user,
+                                         message=other, value='Like')
+            Topic.objects.create(name='topic{}'.format(i))
+        self.size = size
+
+    def endpoints(self):
+        return benchmark.endpoints(self.user, 'test', self.room, self.topic, self.message, self.rating)
+
+    def reset_caches(self):
+        """
+        Start request with empty caches and leaderboards and trending filled from database
+        """
+        self.redis.flushall()
+        for cache in object_cache.caches.values():
+            cache.local.clear()
+        leaderboards.recompute()
+        trending.record_many([(trending.MESSAGES, message_id, 1) for message_id in
+                              Message.objects.values_list('id', flat=True)] +
+                             [(trending.ROOMS, room_id, 1) for room_id in Room.objects.values_list('id', flat=True)])
+
+    def measure(self, name, method, url, data, content_type=None):
+        """
+        Get query count and seconds spent in queries of request, changes are rolled back
+        """
+        self.reset_caches()
+        client = Client()
+        if name not in ANONYMOUS:
+            client.force_login(self.user)
+        kwargs = {'content_type': content_type} if content_type else {}
+        with transaction.atomic():
+            with QueryRecorder() as recorder:
+                response = getattr(client, method)(url, data, **kwargs)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            transaction.set_rollback(True)
+        if name in ANONYMOUS:
+            self.assertEqual(response.status_code, ANONYMOUS[name], url)
+        else:
+            self.assertLess(response.status_code, 400, url)
+        return len(recorder), recorder.time
+
+    def test_every_url_is_measured(self):
+        measured = set(self.endpoints()) | set(ASYNC_COUNTERPARTS) | UNREACHABLE | SERVED_BY_ASGI
+        self.assertEqual(set(url_names()) - measured, set())
+        self.assertLessEqual(set(ASYNC_COUNTERPARTS.values()), set(self.endpoints()))
+
+    def test_queries_do_not_depend_on_rows(self):
+        report = {}
+        for size in SIZES:
+            self.grow(size)
+            for name, request in self.endpoints().items():
+                report.setdefault(name, []).append(self.measure(name, *request))
+        for name, measures in report.items():
+            with self.subTest(name):
+                counts = [count for count, _ in measures]
+                self.assertEqual(len(set(counts)), 1, 'queries at {} rows: {}, seconds: {}'.format(
+                    SIZES, counts, ['{:.4f}'.format(seconds) for _, seconds in measures]))
+
+
+class QueryRepeatMiddlewareTest(TestCase):
+    """
+    Repeated query shapes are reported in development
+    """
+
+    def setUp(self):
+        self.topic = Topic.objects.create(name='test')
+        self.previous = middleware.QUERY_REPEAT_RAISE
+
+    def tearDown(self):
+        middleware.QUERY_REPEAT_RAISE = self.previous
+
+    def get_response(self, request):
+        for topic_id in range(middleware.QUERY_REPEAT_LIMIT + 1):
+            Topic.objects.filter(id=topic_id).first()
+        return 'response'
+
+    @override_settings(DEBUG=True)
+    def test_repeated_queries(self):
+        request = RequestFactory().get('/')
+        with self.assertLogs('forum.middleware', 'WARNING') as logs:
+            self.assertEqual(QueryRepeatMiddleware(self.get_response)(request), 'response')
+        self.assertIn('{} x SELECT'.format(middleware.QUERY_REPEAT_LIMIT + 1), logs.output[0])
+        middleware.QUERY_REPEAT_RAISE = True
+        with self.assertRaises(RepeatedQueries):
+            QueryRepeatMiddleware(self.get_response)(request)
+
+    def test_shape(self):
+        self.assertEqual(shape('SELECT 1 FROM t WHERE a IN (%s, %s) AND b = \'x\' LIMIT 21'),
+                         'SELECT ? FROM t WHERE a IN (...) AND b = ? LIMIT ?')
@@ -0,0 +1,89 @@
+import re
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from forum import activity, membership
+from forum.models import Room, User, Topic, Message, MessageRating
+from forum.pagination import after
+
+ROOM, USER, MESSAGE = 1, 1, 1
+NOW = timezone.now()
+
+
+def hot_queries():
+    """
+    (name, queryset, whether sorting outside of index is allowed) of queries run on every page of forum
+    """
+    history = Message.objects.filter(room=ROOM).order_by(*Message.HISTORY_ORDERING)
+    ratings = MessageRating.objects.all()
+    return [
+        ('room history', history[:21], False),
+        ('room history after cursor', history.filter(after(Message.HISTORY_ORDERING, [NOW, NOW, 1]))[:21], False),
+        ('global feed', activity._messages()[:100], False),
+        ('author feed', activity._messages(USER)[:100], False),
+        ('room list', Room.objects.order_by('-created', '-updated')[:20], False),
+        ('rooms of topic', Room.objects.filter(topic=1).order_by('-id')[:20], False),
+        ('ratings of message', ratings.filter(message=MESSAGE).order_by('-id')[:20], True),
+        ('likes of message', ratings.filter(message=MESSAGE, value=MessageRating.LIKE).values('id'), True),
+        ('likes of author', ratings.filter(author=USER, value=MessageRating.LIKE).values('id'), True),
+        ('ratings of user', ratings.filter(user=USER, message__in=[1, 2, 3]).values_list('message_id', 'value'),
+         True),
+        ('like list', ratings.filter(value=MessageRating.LIKE).order_by('-id')[:20], False),
+        ('participants', membership.Participant.objects.filter(room_id__in=[ROOM]), True),
+        ('joined rooms', membership.Participant.objects.filter(user_id=USER, room_id__in=[ROOM]), True),
+        ('token', Token.objects.filter(key='0' * 40), True),
+    ]
+
+
+def full_scans(queryset, allow_sort):
+    """
+    Get lines of query plan reading whole table, or sorting rows when it is not allowed
+    """
+    plan = queryset.explain().splitlines()
+    if connection.vendor == 'sqlite':
+        scans = [line for line in plan if re.search(r'\bSCAN \w+$', line)]
+        sorts = [line for line in plan if 'USE TEMP B-TREE' in line]
+    else:
+        scans = [line for line in plan if 'Seq Scan' in line]
+        sorts = [line for line in plan if re.search(r'\bSort\b', line) and 'Incremental' not in line]
+    return scans + ([] if allow_sort else sorts)
+
+
+class QueryPlanTest(TestCase):
+    """
+    Hot paths are served from indexes, not by scanning tables
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        topic = Topic.objects.create(name='test')
+        users = [User.objects.create_user(username='user{}'.format(i), email='user{}@gmail.com'.format(i))
+                 for i in range(20)]
+        rooms = Room.objects.bulk_create(Room(name='room{}'.format(i), host=users[i], topic=topic)
+                                         for i in range(20))
+        messages = Message.objects.bulk_create(Message(body='message', author=users[i % 20], room=rooms[i % 20])
+                                               for i in range(200))
+        MessageRating.objects.bulk_create(
+            MessageRating(message=message, user=user, author=message.author, room=message.room, topic=topic,
+                          value=MessageRating.LIKE if user.id % 3 else MessageRating.DISLIKE)
+            for message in messages[:50] for user in users[:10])
+
+    def setUp(self):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        elif connection.vendor == 'postgresql':
+            # planner prefers scans of tables this small, so only missing indexes make it scan
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        else:
+            self.skipTest('query plans are checked on sqlite and postgresql')
+
+    def test_hot_queries_use_indexes(self):
+        for name, queryset, allow_sort in hot_queries():
+            with self.subTest(name):
+                self.assertEqual(full_scans(queryset, allow_sort), [], queryset.query)
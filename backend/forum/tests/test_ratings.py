@@ -0,0 +1,104 @@
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase, Client
+from django.urls import reverse
+from rest_framework import status
+
+from forum.models import Room, User, Topic, Message, MessageRating
+from forum.ratings import rate_message
+
+client = Client()
+
+
+class RateMessageTest(TestCase):
+
+    def setUp(self):
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+        self.message = Message.objects.create(body='test', author=self.user, room=self.room)
+
+    def assertCounters(self, likes, dislikes):
+        self.message.refresh_from_db()
+        self.assertEqual((self.message.likes_count, self.message.dislikes_count), (likes, dislikes))
+
+    def test_toggle(self):
+        rating = rate_message(self.user, self.message.id, 'Like')
+        self.assertEqual((rating.value, rating.topic_id), ('Like', self.topic.id))
+        self.assertCounters(1, 0)
+
+        rate_message(self.user, self.message.id, 'Dislike')
+        self.assertCounters(0, 1)
+
+        rating = rate_message(self.user, self.message.id, 'Dislike')
+        self.assertIsNone(rating.pk)
+        self.assertFalse(MessageRating.objects.exists())
+        self.assertCounters(0, 0)
+
+    def test_toggle_queries(self):
+        rate_message(self.user, self.message.id, 'Like')
+        # savepoint, select for update, update, counters update, release savepoint
+        with self.assertNumQueries(5):
+            rate_message(self.user, self.message.id, 'Dislike')
+
+    def test_unique_rating(self):
+        rate_message(self.user, self.message.id, 'Like')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user, user=self.user,
+                                         message=self.message, value='Dislike')
+
+    def test_retry_only_conflicts(self):
+        # rating of the other request is committed when insert of this one fails
+        rating = MessageRating.objects.create(room=self.room, topic=self.topic, author=self.user, user=self.user,
+                                              message=self.message, value='Dislike')
+
+        def insert(user, message_id, value, creating):
+            creating.add(message_id)
+            if toggle.call_count == 1:
+                raise IntegrityError('unique')
+            return rating
+        with mock.patch('forum.ratings._toggle', side_effect=insert) as toggle:
+            self.assertEqual(rate_message(self.user, self.message.id, 'Like'), rating)
+        self.assertEqual(toggle.call_count, 2)
+
+        rating.delete()
+        with mock.patch('forum.ratings._toggle', side_effect=insert) as toggle:
+            with self.assertRaises(IntegrityError):
+                rate_message(self.user, self.message.id, 'Like')
+        self.assertEqual(toggle.call_count, 1)
+
+    def test_rate_view(self):
+        client.force_login(self.user)
+        response = client.post(reverse('message_rate', kwargs={'option': 'Like', 'pk': self.message.id}))
+        self.assertRedirects(response, reverse('room_detail', kwargs={'pk': self.room.id}),
+                             fetch_redirect_response=False)
+        self.assertCounters(1, 0)
+
+        response = client.post(reverse('message_rate', kwargs={'option': 'Love', 'pk': self.message.id}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rate_api(self):
+        data = {'message': self.message.id, 'value': 'Like'}
+        client.logout()
+        response = client.post(reverse('api-messages-rate'), data=data)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        client.force_login(self.user)
+        response = client.post(reverse('api-messages-rate'), data=data)
+        self.assertEqual(response.json(), {'message': self.message.id, 'value': 'Like'})
+        response = client.post(reverse('api-messages-rate'), data=data)
+        self.assertEqual(response.json(), {'message': self.message.id, 'value': None})
+
+        response = client.post(reverse('api-messages-rate'), data={'message': -1, 'value': 'Like'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_room_without_topic(self):
+        self.topic.delete()
+        client.force_login(self.user)
+        response = client.post(reverse('api-messages-rate'), data={'message': self.message.id, 'value': 'Like'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'message': ['Message room has no topic.']})
+        response = client.post(reverse('message_rate', kwargs={'option': 'Like', 'pk': self.message.id}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertCounters(0, 0)
@@ -0,0 +1,35 @@
+from django.test import TestCase
+
+from forum import redis_client
+from forum.fake_redis import FakeRedis
+
+
+class FakeRedisTest(TestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+
+    def test_sorted_set(self):
+        self.redis.zadd('board', {1: 5, 2: 7})
+        self.redis.zincrby('board', 3, 1)
+        self.assertEqual(self.redis.zrevrange('board', 0, -1, withscores=True), [(b'1', 8.0), (b'2', 7.0)])
+        self.assertEqual((self.redis.zrevrank('board', 2), self.redis.zscore('board', 3)), (1, None))
+
+        self.redis.zunionstore('union', {'board': 0.5, 'missing': 1})
+        self.assertEqual(self.redis.zrevrange('union', 0, 0, withscores=True), [(b'1', 4.0)])
+
+    def test_pipelined(self):
+        previous = redis_client.set_client(self.redis)
+        try:
+            results = redis_client.pipelined(range(5), lambda pipe, item: pipe.rpush('list', item), batch_size=2)
+        finally:
+            redis_client.set_client(previous)
+        self.assertEqual(results, [1, 2, 3, 4, 5])
+        self.assertEqual(self.redis.lrange('list', -2, -1), [b'3', b'4'])
+
+    def test_pubsub(self):
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe('channel')
+        self.assertEqual(self.redis.publish('channel', 'hello'), 1)
+        self.assertEqual(pubsub.get_message(timeout=1)['data'], b'hello')
+
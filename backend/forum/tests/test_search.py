@@ -0,0 +1,78 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum import search
+from forum.models import Room, User, Topic
+
+client = Client()
+
+
+class RoomSearchTest(TestCase):
+
+    def setUp(self):
+        self.topic = Topic.objects.create(name='python')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='Django tips', host=self.user, topic=self.topic,
+                                        description='Share <b>django</b> tricks')
+        self.other = Room.objects.create(name='Cooking', host=self.user, topic=Topic.objects.create(name='food'),
+                                         description='Recipes with python')
+
+    def found(self, query, **kwargs):
+        return [room.id for room in search.search_rooms(query, **kwargs)]
+
+    def test_prefix_and_ranking(self):
+        self.assertEqual(self.found('djan'), [self.room.id])
+        self.assertEqual(self.found('pyth'), [self.room.id, self.other.id])
+        self.assertEqual(self.found('pyth', columns=(search.TOPIC,)), [self.room.id])
+        self.assertEqual(self.found('django recipes'), [])
+        self.assertEqual(self.found('"*'), [])
+
+    def test_snippet_escaped(self):
+        room, = search.search_rooms('tricks')
+        self.assertIn('&lt;b&gt;django&lt;/b&gt; <mark>tricks</mark>', room.snippet)
+
+    def test_index_follows_changes(self):
+        self.room.name = 'Flask tips'
+        self.room.save()
+        self.assertEqual(self.found('flask'), [self.room.id])
+
+        self.topic.name = 'snakes'
+        self.topic.save()
+        self.assertEqual(self.found('snak'), [self.room.id])
+
+        self.room.delete()
+        self.assertEqual(self.found('flask'), [])
+
+    def test_topic_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.topic.delete()
+        self.assertEqual(self.found('python'), [self.other.id])
+        self.assertEqual(self.found('djan'), [self.room.id])
+        response = client.get(reverse('topic_search'), {'q': 'python'})
+        self.assertEqual(response.context['rooms'], [])
+
+    def test_rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM {}'.format(search.TABLE))
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.found('cook'), [self.other.id])
+
+    def test_home_search(self):
+        response = client.get(reverse('home'), {'q': 'cook'})
+        self.assertEqual([room.id for room in response.context['rooms']], [self.other.id])
+        self.assertEqual(response.context['room_count'], 1)
+
+    @mock.patch('forum.search.LIMIT', 1)
+    def test_home_search_over_limit(self):
+        response = client.get(reverse('home'), {'q': 'pyth'})
+        self.assertEqual([room.id for room in response.context['rooms']], [self.room.id])
+        self.assertEqual(response.context['room_count'], '1+')
+        self.assertContains(response, '1+ Rooms available')
+
+        response = client.get(reverse('topic_search'), {'q': 'pyth'})
+        self.assertEqual(response.context['room_count'], 1)
@@ -0,0 +1,78 @@
+import time
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum import trending
+from forum.models import Room, User, Topic, Message
+from forum.tests.base import FakeRedisMixin
+
+client = Client()
+
+# Start of an hour, so buckets of both windows start with it
+NOW = 3600 * 1000
+
+
+class TrendingTest(FakeRedisMixin, TestCase):
+    """
+    Trending windows over fake redis, time of activity and of redis expiry is mocked
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+        self.messages = [Message.objects.create(body='test{}'.format(i), author=self.user, room=self.room)
+                         for i in range(4)]
+        self.monotonic = time.monotonic()
+        for target, value in (('forum.trending.time.time', lambda: NOW),
+                              ('forum.fake_redis.time.monotonic', lambda: self.monotonic)):
+            patcher = mock.patch(target, side_effect=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def scores(self, window):
+        response = client.get(reverse('api-messages-trending'), {'window': window})
+        return {entry['id']: entry['score'] for entry in response.json()['results']}
+
+    def test_decay(self):
+        new, half_hour, old, outside = self.messages
+        trending.record_many([(trending.MESSAGES, new.id, 1), (trending.MESSAGES, half_hour.id, 2)], now=NOW)
+        trending.record(trending.MESSAGES, half_hour.id, now=NOW - 15 * 60)
+        trending.record(trending.MESSAGES, old.id, 4, now=NOW - 30 * 60)
+        trending.record(trending.MESSAGES, outside.id, now=NOW - 60 * 60)
+
+        # half-life of hour window is 15 minute buckets
+        self.assertEqual(self.scores('hour'), {new.id: 1, half_hour.id: 2.5, old.id: 1})
+        # events of the last hour before NOW are in the previous hour bucket of day window
+        previous = round(0.5 ** (1 / 6), 2)
+        self.assertEqual(self.scores('day'), {new.id: 1, half_hour.id: round(2 + 0.5 ** (1 / 6), 2),
+                                              old.id: round(4 * 0.5 ** (1 / 6), 2), outside.id: previous})
+        self.assertEqual(client.get(reverse('api-messages-trending'), {'window': 'week'}).status_code, 400)
+
+    def test_buckets_expire(self):
+        message = self.messages[0]
+        trending.record(trending.MESSAGES, message.id, now=NOW)
+        hour_key = trending._bucket_key(trending.MESSAGES, 'hour', NOW // 60)
+        day_key = trending._bucket_key(trending.MESSAGES, 'day', NOW // 3600)
+
+        self.monotonic += 60 * 60
+        self.assertEqual(self.redis.exists(hour_key, day_key), 2)
+        self.monotonic += 61 * 60
+        self.assertEqual(self.redis.exists(hour_key, day_key), 1)
+        self.monotonic += 24 * 3600
+        self.assertEqual(self.redis.exists(day_key), 0)
+
+    def test_merged_window_cached(self):
+        first, second = self.messages[:2]
+        trending.record(trending.MESSAGES, first.id, now=NOW)
+        self.assertEqual(self.scores('hour'), {first.id: 1})
+
+        trending.record(trending.MESSAGES, second.id, 3, now=NOW)
+        self.assertEqual(self.scores('hour'), {first.id: 1})
+        self.assertEqual(self.scores('day'), {first.id: 1, second.id: 3})
+
+        self.monotonic += trending.CACHE_SECONDS
+        self.assertEqual(self.scores('hour'), {second.id: 3, first.id: 1})
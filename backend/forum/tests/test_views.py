@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum import push
+from forum.models import Room, User, Topic, Message, MessageRating
+from forum.tests.base import FakeRedisMixin
+
+client = Client()
+
+# Queries of room page with user, topic, user cards and participants cached
+WARM_QUERIES = 4
+# Queries added by caches missing authenticated user, user cards, topic and participants
+COLD_CACHE_QUERIES = 5
+
+
+class RoomDetailViewTest(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.topic = Topic.objects.create(name='test')
+        self.user = User.objects.create_user(username='test', email='test@gmail.com', password='test')
+        self.room = Room.objects.create(name='test', host=self.user, topic=self.topic, description='test')
+        client.force_login(self.user)
+
+    def add_messages(self, count):
+        start = User.objects.count()
+        for i in range(start, start + count):
+            author = User.objects.create_user(username='author{}'.format(i), email='author{}@gmail.com'.format(i))
+            message = Message.objects.create(body='test', author=author, room=self.room)
+            MessageRating.objects.create(room=self.room, topic=self.topic, author=author, user=self.user,
+                                         message=message, value='Like')
+
+    def get_room(self):
+        response = client.get(reverse('room_detail', kwargs={'pk': self.room.id}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_queries_do_not_depend_on_message_count(self):
+        self.add_messages(2)
+        # Cold caches: room, page of messages, ratings of current user, time of last message,
+        # authenticated user, user cards, topic, participants loaded to cache and read back
+        with self.assertNumQueries(WARM_QUERIES + COLD_CACHE_QUERIES):
+            self.get_room()
+        # Warm caches: room, page of messages, ratings of current user, time of last message
+        with self.assertNumQueries(WARM_QUERIES):
+            self.get_room()
+        # Cards of new authors are loaded in one query whatever their number
+        self.add_messages(10)
+        with self.assertNumQueries(WARM_QUERIES + 1):
+            self.get_room()
+        with self.assertNumQueries(WARM_QUERIES):
+            self.get_room()
+
+    def test_user_rating_marked(self):
+        self.add_messages(1)
+        response = client.get(reverse('room_detail', kwargs={'pk': self.room.id}))
+        self.assertEqual([message.user_rating for message in response.context['room_messages']], ['Like'])
+        self.assertContains(response, 'like_button_active.svg')
+
+    def test_events_only_with_push(self):
+        events_url = reverse('room_events', kwargs={'pk': self.room.id})
+        response = client.get(reverse('room_detail', kwargs={'pk': self.room.id}))
+        self.assertNotContains(response, 'data-events-url')
+        self.assertNotContains(response, 'room_events.js')
+        with mock.patch.object(push, 'ENABLED', True):
+            response = client.get(reverse('room_detail', kwargs={'pk': self.room.id}))
+        self.assertContains(response, 'data-events-url="{}"'.format(events_url))
+        self.assertContains(response, 'room_events.js')
+        # without asgi application in front the stream is not served
+        self.assertEqual(client.get(events_url).status_code, 503)
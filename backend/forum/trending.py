@@ -0,0 +1,131 @@
+import time
+
+from django.db import transaction
+
+from .leaderboards import Leaderboard, MessageLeaderboard
+from .models import Room
+from .redis_client import client, get_async_client, pipelined, run_safely
+
+MESSAGES = 'messages'
+ROOMS = 'rooms'
+
+# window: (bucket length in seconds, buckets in window, score half-life in buckets)
+WINDOWS = {
+    'hour': (60, 60, 15),
+    'day': (3600, 24, 6),
+}
+
+# How long merged window is reused by readers
+CACHE_SECONDS = 15
+
+
+def _bucket_key(kind, window, bucket):
+    return 'trending:{}:{}:{}'.format(kind, window, bucket)
+
+
+def record(kind, member, weight=1, now=None):
+    """
+    Add activity of member to current bucket of every window,
+    buckets expire by themselves once they leave the window
+    """
+    record_many([(kind, member, weight)], now=now)
+
+
+def record_many(events, now=None):
+    """
+    Add (kind, member, weight) activities in batched pipelines
+    """
+    now = time.time() if now is None else now
+
+    def queue(pipe, event):
+        kind, member, weight = event
+        for window, (length, count, _) in WINDOWS.items():
+            key = _bucket_key(kind, window, int(now // length))
+            pipe.zincrby(key, weight, member)
+            pipe.expire(key, length * (count + 1))
+    pipelined(events, queue)
+
+
+def on_rating(message_id, room_id):
+    """
+    Count new rating of message as activity of message and its room after transaction commit
+    """
+    transaction.on_commit(lambda: run_safely(_record_rating, message_id, room_id))
+
+
+def on_message(room_id):
+    """
+    Count new message as activity of room after transaction commit
+    """
+    transaction.on_commit(lambda: run_safely(record, ROOMS, room_id))
+
+
+def on_events(events):
+    """
+    Add batch of (kind, member, weight) activities after transaction commit
+    """
+    transaction.on_commit(lambda: run_safely(record_many, events))
+
+
+def _record_rating(message_id, room_id):
+    record(MESSAGES, message_id)
+    record(ROOMS, room_id)
+
+
+class Trending:
+    """
+    Activity in the last window, older buckets weigh less with exponential decay.
+    Buckets are merged with ZUNIONSTORE at most once in CACHE_SECONDS
+    """
+
+    def __init__(self, kind, window):
+        self.kind = kind
+        self.window = window
+
+    @property
+    def _merged_key(self):
+        return 'trending:{}:{}'.format(self.kind, self.window)
+
+    def _merge(self, pipe):
+        length, count, half_life = WINDOWS[self.window]
+        current = int(time.time() // length)
+        weights = {_bucket_key(self.kind, self.window, current - age): 0.5 ** (age / half_life)
+                   for age in range(count)}
+        pipe.zunionstore(self._merged_key, weights)
+        pipe.expire(self._merged_key, CACHE_SECONDS)
+
+    @property
+    def key(self):
+        key = self._merged_key
+        if not client.exists(key):
+            pipe = client.pipeline(transaction=True)
+            self._merge(pipe)
+            pipe.execute()
+        return key
+
+    async def get_key(self):
+        async_client = get_async_client()
+        key = self._merged_key
+        if not await async_client.exists(key):
+            pipe = async_client.pipeline(transaction=True)
+            self._merge(pipe)
+            await pipe.execute()
+        return key
+
+    def format_score(self, value):
+        return round(value, 2)
+
+
+class TrendingMessages(Trending, MessageLeaderboard):
+    pass
+
+
+class TrendingRooms(Trending, Leaderboard):
+
+    def get_details(self, ids):
+        rooms = Room.objects.filter(id__in=ids).values_list('id', 'name', 'topic__name', 'host__username')
+        return {pk: {'id': pk, 'name': name, 'topic': topic, 'host': host} for pk, name, topic, host in rooms}
+
+
+trending_messages = {window: TrendingMessages(MESSAGES, window) for window in WINDOWS}
+trending_rooms = {window: TrendingRooms(ROOMS, window) for window in WINDOWS}
@@ -1,12 +1,13 @@
 from django.urls import path, include
 
 from . import views
-from .api import viewsets as api_views
+from .api import async_views, viewsets as api_views
 
 urlpatterns = [
     path('', views.HomeView.as_view(), name='home'),
 
     path('room/detail/<str:pk>/', views.RoomDetailView.as_view(), name='room_detail'),
+    path('room/events/<int:pk>/', views.RoomEventsView.as_view(), name='room_events'),
     path('room/create/', views.RoomCreateView.as_view(), name='room_create'),
     path('room/update/<str:pk>', views.RoomUpdateView.as_view(), name='room_update'),
     path('room/delete/<str:pk>', views.RoomDeleteView.as_view(), name='room_delete'),
@@ -32,29 +33,64 @@ api_urls = [
     path('api/topics/', api_views.TopicListView.as_view(), name='topics-all'),
     path('api/topics/retrieve/<str:pk>/', api_views.TopicRetrieveView.as_view(), name='topics-detail'),
     path('api/topics/rooms/<str:pk>/', api_views.TopicRoomsView.as_view(),  name='topics-rooms'),
+    path('api/topics/best/<int:pk>/', api_views.GetTopicBestMessagesList.as_view(), name='topics-best'),
+    path('api/topics/worst/<int:pk>/', api_views.GetTopicWorstMessagesList.as_view(), name='topics-worst'),
+    path('api/topics/scoring/<int:pk>/', api_views.GetTopicUserScoringList.as_view(), name='topics-scoring'),
 
-    path('api/rooms/', api_views.RoomListView.as_view()),
+    path('api/rooms/', api_views.RoomListView.as_view(), name='rooms-all'),
     path('api/rooms/retrieve/<str:pk>/', api_views.RoomRetrieveView.as_view()),
-    path('api/rooms/messages/<str:pk>/', api_views.RoomMessagesView.as_view()),
+    path('api/rooms/messages/<str:pk>/', api_views.RoomMessagesView.as_view(), name='rooms-messages'),
     path('api/rooms/participants/<str:pk>/', api_views.RoomParticipantsView.as_view(), name='rooms-participants'),
+    path('api/rooms/best/<int:pk>/', api_views.GetRoomBestMessagesList.as_view(), name='rooms-best'),
+    path('api/rooms/worst/<int:pk>/', api_views.GetRoomWorstMessagesList.as_view(), name='rooms-worst'),
+    path('api/rooms/scoring/<int:pk>/', api_views.GetRoomUserScoringList.as_view(), name='rooms-scoring'),
+    path('api/rooms/trending', api_views.GetTrendingRoomsList.as_view(), name='api-rooms-trending'),
 
-    path('api/messages/', api_views.MessageListView.as_view()),
+    path('api/messages/', api_views.MessageListView.as_view(), name='api-messages-all'),
     path('api/messages/retrieve/<str:pk>/', api_views.MessageRetrieveView.as_view()),
     path('api/messages/create/', api_views.MessageCreateAPIView.as_view(), name='api-messages-create'),
+    path('api/messages/bulk/', api_views.MessageBulkCreateView.as_view(), name='api-messages-bulk'),
     path('api/messages/update/<str:pk>/', api_views.MessageUpdateView.as_view(), name='api-messages-update'),
     path('api/messages/delete/<str:pk>/', api_views.MessageDestroyView.as_view(), name='api-messages-delete'),
-    path('api/messages/ratings/<str:pk>/', api_views.GetMessageRatesView.as_view()),
-    path('api/messages/best', api_views.GetBestMessagesList.as_view()),
+    path('api/messages/rate/', api_views.MessageRateView.as_view(), name='api-messages-rate'),
+    path('api/messages/ratings/<str:pk>/', api_views.GetMessageRatesView.as_view(), name='api-messages-ratings'),
+    path('api/messages/best', api_views.GetBestMessagesList.as_view(), name='api-messages-best'),
+    path('api/messages/best/rank/<str:pk>/', api_views.GetBestMessagesRank.as_view(), name='api-messages-best-rank'),
+    path('api/messages/trending', api_views.GetTrendingMessagesList.as_view(), name='api-messages-trending'),
+    path('api/messages/search', api_views.MessageSearchView.as_view(), name='api-messages-search'),
+    path('api/messages/export', api_views.MessageExportView.as_view(), name='api-messages-export'),
 
-    path('api/ratings/', api_views.MessageRatingListView.as_view()),
+    path('api/ratings/', api_views.MessageRatingListView.as_view(), name='api-messagerating-all'),
     path('api/ratings/retrieve/<str:pk>', api_views.MessageRatingRetrieveView.as_view()),
+    path('api/ratings/bulk/', api_views.MessageRatingBulkView.as_view(), name='api-messagerating-bulk'),
+    path('api/ratings/export', api_views.MessageRatingExportView.as_view(), name='api-messagerating-export'),
     path('api/ratings/likes', api_views.MessageRatingLikeList.as_view(), name='api-messagerating-likes'),
     path('api/ratings/dislikes', api_views.MessageRatingDislikeList.as_view(), name='api-messagerating-dislikes'),
 
-    path('api/users/worst', api_views.GetWorstMessagesList.as_view()),
-    path('api/users/scoring', api_views.GetUserScoringList.as_view()),
+    path('api/users/worst', api_views.GetWorstMessagesList.as_view(), name='api-messages-worst'),
+    path('api/users/worst/rank/<str:pk>/', api_views.GetWorstMessagesRank.as_view(), name='api-messages-worst-rank'),
+    path('api/users/scoring', api_views.GetUserScoringList.as_view(), name='api-users-scoring'),
+    path('api/users/scoring/rank/<str:pk>/', api_views.GetUserScoringRank.as_view(), name='api-users-scoring-rank'),
 
     path('api/', include('api.urls'))
 ]
 
-urlpatterns += api_urls
+# Async variants of hot read endpoints, served by ASGI deployment
+async_api_urls = [
+    path('api/async/rooms/', async_views.room_list, name='async-rooms-all'),
+    path('api/async/rooms/retrieve/<int:pk>/', async_views.room_detail, name='async-rooms-detail'),
+    path('api/async/rooms/messages/<int:pk>/', async_views.room_messages, name='async-rooms-messages'),
+    path('api/async/rooms/best/<int:pk>/', async_views.room_best_messages, name='async-rooms-best'),
+    path('api/async/rooms/worst/<int:pk>/', async_views.room_worst_messages, name='async-rooms-worst'),
+    path('api/async/rooms/scoring/<int:pk>/', async_views.room_users_scoring, name='async-rooms-scoring'),
+    path('api/async/rooms/trending', async_views.trending_rooms, name='async-rooms-trending'),
+    path('api/async/topics/best/<int:pk>/', async_views.topic_best_messages, name='async-topics-best'),
+    path('api/async/topics/worst/<int:pk>/', async_views.topic_worst_messages, name='async-topics-worst'),
+    path('api/async/topics/scoring/<int:pk>/', async_views.topic_users_scoring, name='async-topics-scoring'),
+    path('api/async/messages/best', async_views.best_messages, name='async-messages-best'),
+    path('api/async/messages/worst', async_views.worst_messages, name='async-messages-worst'),
+    path('api/async/messages/trending', async_views.trending_messages, name='async-messages-trending'),
+    path('api/async/users/scoring', async_views.users_scoring, name='async-users-scoring'),
+]
+
+urlpatterns += api_urls + async_api_urls
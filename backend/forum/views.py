@@ -1,14 +1,36 @@
+import redis
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView, LogoutView
-from django.http import HttpResponseRedirect
+from django.core.exceptions import BadRequest
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect
 from django.urls import reverse
 from django.views import View
 from django.views.generic import CreateView, UpdateView, TemplateView, DeleteView
 from django.views.generic.detail import DetailView
-from django.db.models import Q
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
 
+from . import activity, leaderboards, membership, object_cache, push, search
 from .models import Topic, Room, Message, User, MessageRating
 from .forms import UserUpdateForm, UserSignUpForm
+from .pagination import InvalidCursor, keyset_page
+from .ratings import NO_TOPIC, rate_message
+
+TOP_MESSAGES_COUNT = 5
+ROOM_MESSAGES_PAGE_SIZE = 50
+PARTICIPANTS_SHOWN = 50
+
+
+def add_activity(context, request, user_id=None):
+    """
+    Add page of activity feed from ?activity_page and number of the next page to context
+    """
+    try:
+        page = max(int(request.GET.get('activity_page', 1)), 1)
+    except ValueError:
+        page = 1
+    context['room_messages'], has_more = activity.recent(user_id, page)
+    context['activity_next_page'] = page + 1 if has_more else None
 
 
 # HOME TEMPLATE VIEW
@@ -20,22 +42,23 @@ class HomeView(TemplateView):
     def get_queryset(self):
         query = self.request.GET.get('q')
         if query:
-            object_list = self.model.objects.filter(
-                Q(topic__name__icontains=query) |
-                Q(name__icontains=query) |
-                Q(description__icontains=query)
-            )
+            # one room over the limit tells that more rooms match
+            object_list = search.search_rooms(query, limit=search.LIMIT + 1)
         else:
-            object_list = self.model.objects.all()
+            object_list = self.model.objects.select_related('host', 'topic')
         return object_list
 
     def get_context_data(self, **kwargs):
         context = super(HomeView, self).get_context_data()
         rooms_queried = self.get_queryset()
+        context['topics'] = object_cache.all_topics()
+        add_activity(context, self.request)
+        if self.request.GET.get('q') and len(rooms_queried) > search.LIMIT:
+            rooms_queried = rooms_queried[:search.LIMIT]
+            context['room_count'] = '{}+'.format(search.LIMIT)
+        else:
+            context['room_count'] = len(rooms_queried)
         context['rooms'] = rooms_queried
-        context['topics'] = Topic.objects.all()
-        context['room_messages'] = Message.objects.all()
-        context['room_count'] = rooms_queried.count()
         context['room_total'] = Room.objects.all().count()
         return context
 
@@ -48,24 +71,69 @@ class RoomDetailView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super(RoomDetailView, self).get_context_data()
         room = Room.objects.get(id=self.kwargs['pk'])
+        try:
+            room_messages, next_cursor = keyset_page(room.message_set.all(),
+                                                     Message.HISTORY_ORDERING, ROOM_MESSAGES_PAGE_SIZE,
+                                                     self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise BadRequest('Invalid cursor')
+        user_ratings = self.get_user_ratings(room_messages)
+        users = object_cache.users.get_many({room.host_id} | {message.author_id for message in room_messages})
+        for message in room_messages:
+            message.user_rating = user_ratings.get(message.id)
+            message.author_card = users.get(message.author_id)
         context['room'] = room
-        context['room_messages'] = room.message_set.all()
-        context['participants'] = room.participants.all()
+        context['room_host'] = users.get(room.host_id)
+        context['room_topic'] = object_cache.topics.get(room.topic_id) if room.topic_id else None
+        context['room_messages'] = room_messages
+        context['next_cursor'] = next_cursor
+        context['last_message_at'] = room.message_set.values_list('updated', flat=True).first()
+        context['participants'], _ = membership.page(room.id, PARTICIPANTS_SHOWN)
+        context['top_messages'] = self.get_top_messages(room)
+        context['room_events'] = push.ENABLED
         return context
 
+    def get_user_ratings(self, messages):
+        """
+        Get {message id: rating value} of current user for messages in one query
+        """
+        if not self.request.user.is_authenticated:
+            return {}
+        return dict(MessageRating.objects.filter(user=self.request.user, message__in=messages)
+                    .values_list('message_id', 'value'))
+
+    def get_top_messages(self, room):
+        leaderboard = leaderboards.MessageLeaderboard(
+            leaderboards.scoped_key(leaderboards.BEST_MESSAGES, leaderboards.ROOM, room.id))
+        try:
+            return leaderboard[:TOP_MESSAGES_COUNT]
+        except redis.RedisError:
+            return []
+
+
+class RoomEventsView(View):
+    """
+    Room events are streamed by asgi application before requests reach django, see core.asgi.
+    Route names the stream for templates and answers where push is not served
+    """
+
+    def get(self, request, pk):
+        return HttpResponse('Room events are unavailable', status=503)
+
 
 class RoomCreateView(CreateView):
     model = Room
     template_name = 'forum/room_add.html'
     fields = ['topic', 'name', 'description']
 
+    @transaction.atomic
     def form_valid(self, form):
         form.instance.host = self.request.user
         return super(RoomCreateView, self).form_valid(form)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['topics'] = Topic.objects.all()
+        context['topics'] = object_cache.all_topics()
         return context
 
     def get_success_url(self):
@@ -78,6 +146,10 @@ class RoomUpdateView(UpdateView):
     fields = ['topic', 'name', 'description']
     slug_name = 'pk'
 
+    @transaction.atomic
+    def form_valid(self, form):
+        return super(RoomUpdateView, self).form_valid(form)
+
     def get_object(self, **kwargs):
         return Room.objects.get(pk=self.kwargs['pk'])
 
@@ -120,8 +192,9 @@ class MessageCreateView(View):
         body = request.POST.get('body')
         user = request.user
         room = Room.objects.get(id=self.kwargs['pk'])
-        room.participants.add(request.user)
-        Message.objects.create(body=body, author=user, room=room)
+        with transaction.atomic():
+            membership.join(room, user)
+            Message.objects.create(body=body, author=user, room=room)
 
         return HttpResponseRedirect(reverse('room_detail', kwargs={'pk': room.id}))
 
@@ -141,11 +214,9 @@ class TopicSearchView(HomeView):
     def get_queryset(self):
         query = self.request.GET.get('q')
         if query:
-            object_list = self.model.objects.filter(
-                Q(topic__name__icontains=query)
-            )
+            object_list = search.search_rooms(query, columns=(search.TOPIC,), limit=search.LIMIT + 1)
         else:
-            object_list = self.model.objects.all()
+            object_list = self.model.objects.select_related('host', 'topic')
         return object_list
 
 
@@ -159,10 +230,10 @@ class ProfileView(DetailView):
         context = super().get_context_data(**kwargs)
         user = User.objects.get(id=self.kwargs['pk'])
         context['user'] = user
-        context['rooms'] = user.host.all()
-        context['room_messages'] = user.message_set.all()
+        context['rooms'] = user.host.select_related('host', 'topic')
+        add_activity(context, self.request, user.id)
         context['room_total'] = Room.objects.all().count()
-        context['topics'] = Topic.objects.all()
+        context['topics'] = object_cache.all_topics()
         return context
 
 
@@ -212,21 +283,13 @@ class SignOut(LogoutView):
 class LikeOrDislikeMessage(LoginRequiredMixin, View):
 
     def post(self, request, *args, **kwargs):
-        message = Message.objects.get(id=self.kwargs['pk'])
-        message_author = message.author
-        room = message.room
-        topic = room.topic
-        user = request.user
-        option = self.kwargs['option']
-        if not MessageRating.objects.filter(user=user).filter(message=message).exists():
-            MessageRating.objects.create(room=room, topic=topic, author=message_author, user=user, value=option,
-                                         message=message)
-        else:
-            existing_message = MessageRating.objects.filter(user=user).get(message=message)
-            if existing_message.value != option:
-                existing_message.value = option
-                existing_message.save()
-            else:
-                existing_message.delete()
-
-        return HttpResponseRedirect(reverse('room_detail', kwargs={'pk': room.id}))
+        try:
+            rating = rate_message(request.user, self.kwargs['pk'], self.kwargs['option'])
+        except ValueError:
+            return HttpResponseBadRequest('Invalid rating')
+        except ValidationError:
+            return HttpResponseBadRequest(NO_TOPIC)
+        except Message.DoesNotExist:
+            raise Http404('Message does not exist')
+
+        return HttpResponseRedirect(reverse('room_detail', kwargs={'pk': rating.room_id}))
@@ -0,0 +1,67 @@
+// Room updates pushed by server, see forum/push.py. Included only where ROOM_EVENTS setting is on
+
+const threads = document.querySelector(".threads[data-events-url]");
+
+if (threads && window.EventSource) {
+  const defaultAvatar = threads.dataset.defaultAvatar;
+  const source = new EventSource(threads.dataset.eventsUrl);
+
+  const findThread = (id) => threads.querySelector(`.thread[data-message-id="${id}"]`);
+
+  const element = (tag, className, text) => {
+    const node = document.createElement(tag);
+    if (className) node.className = className;
+    if (text !== undefined) node.textContent = text;
+    return node;
+  };
+
+  source.addEventListener("message", (event) => {
+    const message = JSON.parse(event.data);
+    if (findThread(message.id)) return;
+
+    const avatar = element("div", "avatar avatar--small active");
+    const image = element("img");
+    image.src = message.author.avatar || defaultAvatar;
+    avatar.appendChild(image);
+
+    const authorInfo = element("a", "thread__authorInfo");
+    authorInfo.href = `/profile/${message.author.id}/`;
+    authorInfo.append(avatar, element("span", null, `@${message.author.username}`));
+
+    const author = element("div", "thread__author");
+    author.append(authorInfo, element("span", "thread__date", "just now"),
+      element("span", "thread__likes", "0"), element("span", "thread__dislikes", "0"));
+
+    const top = element("div", "thread__top");
+    top.appendChild(author);
+
+    const thread = element("div", "thread");
+    thread.dataset.messageId = message.id;
+    thread.append(top, element("div", "thread__details", message.body));
+    threads.prepend(thread);
+  });
+
+  source.addEventListener("message_update", (event) => {
+    const message = JSON.parse(event.data);
+    const thread = findThread(message.id);
+    if (thread) {
+      thread.querySelector(".thread__details").textContent = message.body;
+      threads.prepend(thread);
+    }
+  });
+
+  source.addEventListener("message_delete", (event) => {
+    const thread = findThread(JSON.parse(event.data).id);
+    if (thread) thread.remove();
+  });
+
+  source.addEventListener("rating", (event) => {
+    const rating = JSON.parse(event.data);
+    const thread = findThread(rating.id);
+    if (!thread) return;
+    for (const [name, delta] of [["likes", rating.likes], ["dislikes", rating.dislikes]]) {
+      const counter = thread.querySelector(`.thread__${name}`);
+      counter.textContent = parseInt(counter.textContent, 10) + delta;
+    }
+  });
+}